@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: fused vs stepwise ThumbnailGenerator.apply_effects
+Times both paths over a batch of 1280x720 images and reports the
+speedup and the largest per-channel difference between them
+"""
+
+import sys
+import time
+import tempfile
+import argparse
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from thumbnails.thumbnail_generator import ThumbnailGenerator
+
+
+def make_batch(count: int, width: int = 1280, height: int = 720, seed: int = 0):
+    """Deterministic screencast-like test images: gradients plus noise"""
+    rng = np.random.default_rng(seed)
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    images = []
+    for i in range(count):
+        base = np.stack([
+            np.broadcast_to(x, (height, width)),
+            np.broadcast_to(y, (height, width)),
+            np.full((height, width), (i * 37) % 256, dtype=np.float32)
+        ], axis=-1)
+        noise = rng.normal(0, 20, base.shape)
+        images.append(Image.fromarray(np.clip(base + noise, 0, 255).astype(np.uint8)))
+    return images
+
+
+def time_path(generator, images, fused, repeats, **effects):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for image in images:
+            generator.apply_effects(image, fused=fused, **effects)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark fused vs stepwise apply_effects')
+    parser.add_argument('--count', type=int, default=50, help='Images per batch')
+    parser.add_argument('--repeats', type=int, default=3, help='Timed repeats (best is kept)')
+    parser.add_argument('--brightness', type=float, default=1.1)
+    parser.add_argument('--contrast', type=float, default=1.2)
+    parser.add_argument('--saturation', type=float, default=1.3)
+    args = parser.parse_args()
+
+    effects = {
+        'brightness': args.brightness,
+        'contrast': args.contrast,
+        'saturation': args.saturation
+    }
+    generator = ThumbnailGenerator(output_dir=tempfile.gettempdir())
+    images = make_batch(args.count)
+
+    stepwise = time_path(generator, images, False, args.repeats, **effects)
+    fused = time_path(generator, images, True, args.repeats, **effects)
+
+    max_diff = 0
+    for image in images[:5]:
+        a = np.asarray(generator.apply_effects(image, fused=False, **effects), dtype=np.int16)
+        b = np.asarray(generator.apply_effects(image, fused=True, **effects), dtype=np.int16)
+        max_diff = max(max_diff, int(np.abs(a - b).max()))
+
+    print(f"Images: {args.count} x 1280x720, effects: {effects}")
+    print(f"Stepwise: {stepwise * 1000 / args.count:.2f} ms/image")
+    print(f"Fused:    {fused * 1000 / args.count:.2f} ms/image")
+    print(f"Speedup:  {stepwise / fused:.2f}x")
+    print(f"Max per-channel difference: {max_diff}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Start-up benchmark for scripts/cli.py
+Runs CLI commands in fresh interpreters under `python -X importtime`,
+reports the import time of each and the heaviest modules, and fails when
+a budgeted (metadata-only) command goes over its budget or imports a
+module it must not need
+
+    python bench_startup.py
+    python bench_startup.py --budget-ms 80 --repeats 9 -o results/startup.json
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import List, Dict
+
+CLI = Path(__file__).parent.parent / 'scripts' / 'cli.py'
+
+# Import-time budget (ms) for commands that only touch metadata
+DEFAULT_BUDGET_MS = 100
+
+# Heavy subsystems a metadata-only command must never load
+METADATA_FORBIDDEN = ['PIL', 'numpy', 'asyncio', 'scripts.process_video',
+                      'thumbnails.thumbnail_generator']
+
+# Workflow commands load config and their helpers only once they run
+WORKFLOW_HELP_FORBIDDEN = ['PIL', 'numpy', 'yaml', 'scripts.render_cache', 'scripts.job_store',
+                           'scripts.dag', 'scripts.preflight', 'scripts.ffmpeg_progress']
+
+# name -> (cli arguments, budgeted, modules it must not import)
+CASES = {
+    'help': (['--help'], True, METADATA_FORBIDDEN),
+    'metadata/usage': (['metadata'], True, METADATA_FORBIDDEN),
+    'metadata/generate': (['metadata', 'Startup Benchmark', 'Description', 'python'],
+                          True, METADATA_FORBIDDEN),
+    'metadata/batch': (['metadata', '--batch', 'videos.json', 'catalog.jsonl'],
+                       True, METADATA_FORBIDDEN + ['yaml']),
+    'probe/help': (['probe', '--help'], False, ['PIL', 'numpy']),
+    'process/help': (['process', '--help'], False, WORKFLOW_HELP_FORBIDDEN),
+    'batch/help': (['batch', '--help'], False, WORKFLOW_HELP_FORBIDDEN),
+    'thumbnail/usage': (['thumbnail'], False, []),
+}
+
+
+def parse_importtime(stderr: str) -> Dict[str, Dict[str, int]]:
+    """{module: {'self': us, 'cumulative': us, 'depth': n}} from -X importtime output"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        stripped = name.rstrip().lstrip(' ')
+        depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+        modules[stripped] = {'self': int(self_us), 'cumulative': int(cumulative_us), 'depth': depth}
+    return modules
+
+
+def measure(args: List[str], work_dir: Path) -> Dict[str, Dict[str, int]]:
+    """Import profile of one CLI run in a fresh interpreter"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', str(CLI), *args],
+                            cwd=work_dir, capture_output=True, text=True,
+                            env=dict(os.environ, PYTHONDONTWRITEBYTECODE='1'))
+    if result.returncode not in (0, 1):
+        raise RuntimeError(f"cli.py {' '.join(args)} failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def prepare_work_dir() -> Path:
+    """Scratch tree shaped like the project, so ../metadata lands in it"""
+    root = Path(tempfile.mkdtemp(prefix='bench-startup-'))
+    work_dir = root / 'scripts'
+    work_dir.mkdir()
+    (root / 'metadata').mkdir()
+    videos = [{'title': f'Episode {i}', 'description': 'Benchmark episode', 'tags': ['python'],
+               'output_file': f'episode_{i}.json'} for i in range(20)]
+    (work_dir / 'videos.json').write_text(json.dumps(videos))
+    return work_dir
+
+
+def run_case(name: str, repeats: int, work_dir: Path, budget_ms: float) -> Dict:
+    args, budgeted, forbidden = CASES[name]
+    totals = []
+    profile = {}
+    for _ in range(repeats):
+        profile = measure(args, work_dir)
+        totals.append(sum(m['cumulative'] for m in profile.values() if m['depth'] == 0) / 1000)
+
+    heaviest = sorted(profile.items(), key=lambda item: -item[1]['self'])[:5]
+    loaded = [module for module in forbidden
+              if any(name == module or name.startswith(module + '.') for name in profile)]
+    # Best of the repeats: the first run also pays for cold disk caches
+    best = min(totals)
+    return {
+        'case': name,
+        'args': args,
+        'import_ms': round(best, 1),
+        'median_ms': round(statistics.median(totals), 1),
+        'modules': len(profile),
+        'heaviest': [(module, round(stats['self'] / 1000, 1)) for module, stats in heaviest],
+        'budget_ms': budget_ms if budgeted else None,
+        'forbidden_loaded': loaded,
+        'ok': not loaded and (not budgeted or best <= budget_ms),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure cli.py start-up import time')
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS,
+                        help=f'Import budget for metadata-only commands (default: {DEFAULT_BUDGET_MS})')
+    parser.add_argument('--repeats', type=int, default=5, help='Runs per command (best is kept)')
+    parser.add_argument('--only', nargs='+', choices=CASES, default=None,
+                        help='Commands to measure (default: all)')
+    parser.add_argument('-o', '--output', default=None, help='Write results as JSON')
+
+    args = parser.parse_args()
+    work_dir = prepare_work_dir()
+
+    print(f"{'command':<20} {'import':>9} {'median':>9} {'budget':>8} {'modules':>8}  heaviest")
+    results = []
+    for name in args.only or CASES:
+        result = run_case(name, args.repeats, work_dir, args.budget_ms)
+        results.append(result)
+        budget = f"{result['budget_ms']:.0f}ms" if result['budget_ms'] else '-'
+        heaviest = ', '.join(f"{module} {ms}ms" for module, ms in result['heaviest'][:3])
+        print(f"{name:<20} {result['import_ms']:>7.1f}ms {result['median_ms']:>7.1f}ms "
+              f"{budget:>8} {result['modules']:>8}  {heaviest}")
+        if result['forbidden_loaded']:
+            print(f"  imports {', '.join(result['forbidden_loaded'])}")
+
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+    failed = [result['case'] for result in results if not result['ok']]
+    if failed:
+        print(f"\nOver budget or importing heavy modules: {', '.join(failed)}")
+        sys.exit(1)
+    print("\nAll commands within budget")
+
+
+if __name__ == '__main__':
+    main()
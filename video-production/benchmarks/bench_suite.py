@@ -0,0 +1,478 @@
+#!/usr/bin/env python3
+"""
+Reproducible Benchmark Suite
+Generates deterministic synthetic media with ffmpeg's lavfi sources, times
+every VideoProcessor, ThumbnailGenerator and YouTubeMetadataGenerator entry
+point across presets and CRFs, and compares result files for regressions
+
+    python bench_suite.py run --profile quick -o results/baseline.json
+    python bench_suite.py run --profile quick -o results/candidate.json
+    python bench_suite.py compare results/baseline.json results/candidate.json
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import statistics
+import subprocess
+import tempfile
+from contextlib import redirect_stdout
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, List, Dict, Callable
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.process_video import VideoProcessor
+from scripts.probe_cache import ProbeCache
+from thumbnails.thumbnail_generator import ThumbnailGenerator
+from metadata.youtube_metadata import YouTubeMetadataGenerator
+
+RESOLUTIONS = {
+    '720p': (1280, 720),
+    '1080p': (1920, 1080),
+    '4k': (3840, 2160),
+}
+
+# lavfi video sources; "screen" is a static IDE-like frame (dark background,
+# sidebar and a fine grid standing in for text), the common tutorial case
+VIDEO_SOURCES = {
+    'testsrc2': 'testsrc2=size={width}x{height}:rate=30',
+    'screen': ('color=c=0x1e1e1e:size={width}x{height}:rate=30,'
+               'drawbox=x=0:y=0:w=iw/6:h=ih:color=0x252526:t=fill,'
+               'drawgrid=w=iw/96:h=ih/54:t=1:color=0x9cdcfe@0.5'),
+}
+AUDIO_SOURCE = 'sine=frequency=440:sample_rate=48000'
+
+# Benchmark matrices, from a smoke test up to the full 30-minute 4K sweep
+PROFILES = {
+    'quick': {
+        'sources': ['testsrc2', 'screen'],
+        'resolutions': ['720p'],
+        'durations': [10],
+        'presets': ['veryfast'],
+        'crfs': [23],
+        'repeats': 1,
+    },
+    'standard': {
+        'sources': ['testsrc2', 'screen'],
+        'resolutions': ['720p', '1080p'],
+        'durations': [10, 60],
+        'presets': ['ultrafast', 'veryfast', 'medium'],
+        'crfs': [18, 23, 28],
+        'repeats': 3,
+    },
+    'full': {
+        'sources': ['testsrc2', 'screen'],
+        'resolutions': ['720p', '1080p', '4k'],
+        'durations': [10, 60, 300, 1800],
+        'presets': ['ultrafast', 'veryfast', 'medium', 'slow'],
+        'crfs': [18, 23, 28],
+        'repeats': 3,
+    },
+}
+
+# Relative slowdown of the median that compare reports as a regression
+DEFAULT_THRESHOLD = 0.10
+# Changes smaller than this (seconds) are timer noise, never regressions
+NOISE_FLOOR = 0.005
+
+
+def generate_media(source: str, resolution: str, duration: int, media_dir: Path) -> Path:
+    """
+    Render a synthetic input once and reuse it on later runs
+    Bit-exact flags and a single encoder thread make the file identical
+    across runs on the same ffmpeg build
+    """
+    width, height = RESOLUTIONS[resolution]
+    output = media_dir / f'{source}_{resolution}_{duration}s.mp4'
+    if output.exists():
+        return output
+
+    media_dir.mkdir(parents=True, exist_ok=True)
+    temp = output.with_suffix('.tmp.mp4')
+    cmd = [
+        'ffmpeg', '-y', '-v', 'error',
+        '-f', 'lavfi', '-i', VIDEO_SOURCES[source].format(width=width, height=height),
+        '-f', 'lavfi', '-i', AUDIO_SOURCE,
+        '-t', str(duration),
+        '-c:v', 'libx264', '-preset', 'veryfast', '-crf', '18', '-g', '60',
+        '-pix_fmt', 'yuv420p', '-threads', '1',
+        '-c:a', 'aac', '-b:a', '128k',
+        '-fflags', '+bitexact', '-flags:v', '+bitexact', '-flags:a', '+bitexact',
+        '-map_metadata', '-1',
+        str(temp)
+    ]
+    print(f"Generating {output.name}...")
+    subprocess.run(cmd, check=True)
+    os.replace(temp, output)
+    return output
+
+
+def generate_assets(media_dir: Path, resolution: str) -> Dict[str, Path]:
+    """Watermark, subtitles and a short intro clip used by the editing benchmarks"""
+    media_dir.mkdir(parents=True, exist_ok=True)
+
+    watermark = media_dir / 'watermark.png'
+    if not watermark.exists():
+        logo = np.zeros((120, 320, 4), dtype=np.uint8)
+        logo[20:100, 20:300] = (255, 255, 255, 160)
+        Image.fromarray(logo, 'RGBA').save(watermark)
+
+    subtitles = media_dir / 'subtitles.srt'
+    if not subtitles.exists():
+        cues = [f"{i + 1}\n00:00:{i * 2:02d},000 --> 00:00:{i * 2 + 1:02d},500\nSubtitle line {i + 1}\n"
+                for i in range(5)]
+        subtitles.write_text('\n'.join(cues))
+
+    return {
+        'watermark': watermark,
+        'subtitles': subtitles,
+        'intro': generate_media('testsrc2', resolution, 3, media_dir),
+    }
+
+
+def machine_info() -> Dict:
+    """Hardware and software versions recorded alongside every result file"""
+    info = {
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count(),
+    }
+
+    try:
+        with open('/proc/cpuinfo') as f:
+            for line in f:
+                if line.startswith('model name'):
+                    info['cpu_model'] = line.split(':', 1)[1].strip()
+                    break
+        with open('/proc/meminfo') as f:
+            info['memory_gb'] = round(int(f.readline().split()[1]) / 1024 / 1024, 1)
+    except OSError:
+        pass
+
+    try:
+        version = subprocess.run(['ffmpeg', '-version'], capture_output=True, text=True, check=True)
+        info['ffmpeg'] = (version.stdout.splitlines() or [None])[0]
+    except (OSError, subprocess.CalledProcessError):
+        info['ffmpeg'] = None
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, check=True, cwd=Path(__file__).parent)
+        info['git_commit'] = commit.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        info['git_commit'] = None
+
+    info['numpy'] = np.__version__
+    info['pillow'] = Image.__version__
+    return info
+
+
+class BenchmarkSuite:
+    """Builds the benchmark cases for a profile and times them"""
+
+    def __init__(self, profile: str = 'quick', work_dir: Optional[str] = None,
+                 media_dir: str = "../.cache/bench-media", repeats: Optional[int] = None,
+                 only: Optional[List[str]] = None):
+        self.profile = profile
+        self.matrix = PROFILES[profile]
+        self.repeats = repeats or self.matrix['repeats']
+        self.media_dir = Path(media_dir)
+        self.work_dir = Path(work_dir or tempfile.mkdtemp(prefix='bench-'))
+        self.only = only or []
+        self.results: List[Dict] = []
+
+    def _selected(self, case_id: str) -> bool:
+        return not self.only or any(pattern in case_id for pattern in self.only)
+
+    def _time(self, case_id: str, group: str, params: Dict, func: Callable[[], object]):
+        """Run func `repeats` times with a clean output directory each time"""
+        if not self._selected(case_id):
+            return
+
+        times = []
+        realtime_factor = None
+        for _ in range(self.repeats):
+            out_dir = self.work_dir / 'out'
+            shutil.rmtree(out_dir, ignore_errors=True)
+            out_dir.mkdir(parents=True)
+
+            start = time.perf_counter()
+            with redirect_stdout(io.StringIO()):
+                result = func()
+            times.append(time.perf_counter() - start)
+
+            summary = getattr(result, 'last_summary', None)
+            if summary and summary.realtime_factor:
+                realtime_factor = summary.realtime_factor
+
+        record = {
+            'case': case_id,
+            'group': group,
+            'params': params,
+            'times': [round(t, 4) for t in times],
+            'best': round(min(times), 4),
+            'median': round(statistics.median(times), 4),
+            'realtime_factor': round(realtime_factor, 2) if realtime_factor else None,
+        }
+        self.results.append(record)
+        print(f"  {case_id:<60} median {record['median']:>8.3f}s")
+
+    def run(self) -> Dict:
+        """Run every case in the profile and return the result document"""
+        started = datetime.now().isoformat(timespec='seconds')
+        for resolution in self.matrix['resolutions']:
+            assets = generate_assets(self.media_dir, resolution)
+            for source in self.matrix['sources']:
+                for duration in self.matrix['durations']:
+                    media = generate_media(source, resolution, duration, self.media_dir)
+                    params = {'source': source, 'resolution': resolution, 'duration': duration}
+                    print(f"\n{media.name}")
+                    self._video_cases(media, params, assets)
+                    self._thumbnail_cases(media, params)
+
+        print("\nmetadata")
+        self._metadata_cases()
+
+        return {
+            'suite': 'video-production',
+            'profile': self.profile,
+            'created': started,
+            'repeats': self.repeats,
+            'machine': machine_info(),
+            'results': self.results,
+        }
+
+    def _processor(self, media: Path, probe_cache: Optional[ProbeCache] = None) -> VideoProcessor:
+        # A throwaway probe cache keeps probing cold and out of the shared cache
+        probe_cache = probe_cache or ProbeCache(str(self.work_dir / 'probe.db'))
+        return VideoProcessor(str(media), str(self.work_dir / 'out'), probe_cache=probe_cache)
+
+    def _video_cases(self, media: Path, params: Dict, assets: Dict[str, Path]):
+        prefix = f"video/{params['source']}/{params['resolution']}/{params['duration']}s"
+        duration = params['duration']
+
+        for preset in self.matrix['presets']:
+            for crf in self.matrix['crfs']:
+                def compress(preset=preset, crf=crf):
+                    processor = self._processor(media)
+                    processor.compress_video(crf=crf, preset=preset)
+                    return processor
+                self._time(f"{prefix}/compress_video/{preset}/crf{crf}", 'VideoProcessor',
+                           dict(params, preset=preset, crf=crf), compress)
+
+        def get_video_info():
+            (self.work_dir / 'probe.db').unlink(missing_ok=True)
+            return self._processor(media).get_video_info()
+
+        def run(method: str, *args, **kwargs):
+            def call():
+                processor = self._processor(media)
+                getattr(processor, method)(*args, **kwargs)
+                return processor
+            return call
+
+        clips = [(0, duration * 0.2), (duration * 0.4, duration * 0.6), (duration * 0.8, duration)]
+
+        cases = {
+            'get_video_info': get_video_info,
+            'create_youtube_formats': run('create_youtube_formats'),
+            'resize_video': run('resize_video', 854, 480),
+            'extract_audio': run('extract_audio'),
+            'add_watermark': run('add_watermark', str(assets['watermark'])),
+            'add_subtitles': run('add_subtitles', str(assets['subtitles'])),
+            'add_intro_outro': run('add_intro_outro', str(assets['intro']), str(assets['intro'])),
+            'create_clips': run('create_clips', clips),
+            'create_clips_single_pass': run('create_clips_single_pass', clips),
+        }
+        for name, func in cases.items():
+            self._time(f"{prefix}/{name}", 'VideoProcessor', params, func)
+
+    def _thumbnail_cases(self, media: Path, params: Dict):
+        prefix = f"thumbnail/{params['source']}/{params['resolution']}/{params['duration']}s"
+        generator = ThumbnailGenerator(str(self.work_dir / 'out'))
+        timestamp = f"{params['duration'] / 2:.3f}"
+        frame = generator.extract_frame_from_video(str(media), timestamp)
+        title = 'Building a REST API with Python and FastAPI: Complete Beginner Tutorial'
+
+        cases = {
+            'extract_frame_from_video': lambda: generator.extract_frame_from_video(str(media), timestamp),
+            'select_best_frame': lambda: generator.select_best_frame(str(media)),
+            'create_thumbnail_from_video': lambda: generator.create_thumbnail_from_video(
+                str(media), title, timestamp),
+            'create_thumbnail_from_video/auto': lambda: generator.create_thumbnail_from_video(
+                str(media), title, 'auto'),
+            'apply_effects': lambda: generator.apply_effects(
+                frame, brightness=1.1, contrast=1.2, saturation=1.3),
+            'add_title_overlay': lambda: generator.add_title_overlay(frame.copy(), title),
+        }
+        for name, func in cases.items():
+            self._time(f"{prefix}/{name}", 'ThumbnailGenerator', params, func)
+
+    def _metadata_cases(self):
+        generator = YouTubeMetadataGenerator('Benchmark Series')
+        generator.metadata_dir = self.work_dir / 'metadata'
+        generator.metadata_dir.mkdir(parents=True, exist_ok=True)
+
+        timestamps = [{'time': f'{i}:00', 'label': f'Chapter {i}'} for i in range(20)]
+        links = [{'label': f'Link {i}', 'url': f'https://example.com/{i}'} for i in range(5)]
+        chapters_text = '\n'.join(f"{t['time']} - {t['label']}" for t in timestamps)
+        videos = [{'title': f'Episode {i}', 'description': 'Benchmark episode',
+                   'tags': ['python'], 'output_file': f'episode_{i}.json'} for i in range(50)]
+
+        def generate():
+            return generator.generate_metadata('Benchmark', 'Description', ['python', 'api'],
+                                               timestamps=timestamps, links=links,
+                                               output_file='benchmark.json')
+
+        # load/update need an existing file even when run on their own
+        with redirect_stdout(io.StringIO()):
+            generate()
+
+        cases = {
+            'generate_metadata': generate,
+            'create_from_template': lambda: generator.create_from_template(
+                'tutorial', title='Benchmark', description='Description',
+                output_file='template.json'),
+            'generate_seo_tags': lambda: generator.generate_seo_tags(
+                ['python'], 'building rest apis with fastapi'),
+            'parse_timestamps_from_text': lambda: generator.parse_timestamps_from_text(chapters_text),
+            'create_batch_metadata': lambda: generator.create_batch_metadata(videos),
+            'load_metadata': lambda: generator.load_metadata('benchmark.json'),
+            'update_metadata': lambda: generator.update_metadata('benchmark.json', {'title': 'New'}),
+        }
+        for name, func in cases.items():
+            self._time(f"metadata/{name}", 'YouTubeMetadataGenerator', {}, func)
+
+
+def compare(baseline: Dict, candidate: Dict, threshold: float = DEFAULT_THRESHOLD) -> List[Dict]:
+    """
+    Compare median times case by case
+    Returns one row per case present in both files, with status
+    'regression', 'improvement' or 'ok' against the relative threshold
+    (differences under NOISE_FLOOR seconds are always 'ok')
+    """
+    base = {r['case']: r for r in baseline['results']}
+    rows = []
+    for result in candidate['results']:
+        old = base.get(result['case'])
+        if not old or not old['median']:
+            continue
+        change = result['median'] / old['median'] - 1
+        status = 'ok'
+        if abs(result['median'] - old['median']) < NOISE_FLOOR:
+            pass
+        elif change > threshold:
+            status = 'regression'
+        elif change < -threshold:
+            status = 'improvement'
+        rows.append({
+            'case': result['case'],
+            'baseline': old['median'],
+            'candidate': result['median'],
+            'change': change,
+            'status': status
+        })
+    return rows
+
+
+def print_comparison(baseline: Dict, candidate: Dict, rows: List[Dict], threshold: float):
+    """Print the comparison table, regressions first"""
+    for key in ('cpu_model', 'cpu_count', 'ffmpeg'):
+        before = baseline['machine'].get(key)
+        after = candidate['machine'].get(key)
+        if before != after:
+            print(f"Warning: {key} differs between runs ({before!r} vs {after!r})")
+
+    order = {'regression': 0, 'improvement': 1, 'ok': 2}
+    rows = sorted(rows, key=lambda r: (order[r['status']], -abs(r['change'])))
+
+    print(f"\n{'case':<64} {'baseline':>9} {'candidate':>9} {'change':>8}")
+    print('-' * 93)
+    for row in rows:
+        mark = {'regression': '✗', 'improvement': '✓', 'ok': ' '}[row['status']]
+        print(f"{mark} {row['case'][:62]:<62} {row['baseline']:>8.3f}s {row['candidate']:>8.3f}s "
+              f"{row['change'] * 100:>+7.1f}%")
+
+    regressions = sum(1 for r in rows if r['status'] == 'regression')
+    improvements = sum(1 for r in rows if r['status'] == 'improvement')
+    print(f"\n{len(rows)} cases compared (threshold ±{threshold * 100:.0f}%): "
+          f"{regressions} regression(s), {improvements} improvement(s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark suite over synthetic media')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help='Run the benchmarks')
+    run_parser.add_argument('--profile', choices=sorted(PROFILES), default='quick')
+    run_parser.add_argument('-o', '--output', default=None,
+                            help='Result file (default: results/<profile>-<timestamp>.json)')
+    run_parser.add_argument('--repeats', type=int, default=None,
+                            help='Timed repeats per case (default: per profile)')
+    run_parser.add_argument('--only', nargs='+', default=None,
+                            help='Run only cases whose id contains one of these strings')
+    run_parser.add_argument('--media-dir', default='../.cache/bench-media',
+                            help='Where generated inputs are kept (default: ../.cache/bench-media)')
+    run_parser.add_argument('--work-dir', default=None,
+                            help='Scratch directory for outputs (default: a temp dir)')
+
+    generate_parser = subparsers.add_parser('generate', help='Only generate the synthetic inputs')
+    generate_parser.add_argument('--profile', choices=sorted(PROFILES), default='quick')
+    generate_parser.add_argument('--media-dir', default='../.cache/bench-media')
+
+    compare_parser = subparsers.add_parser('compare', help='Compare two result files')
+    compare_parser.add_argument('baseline', help='Earlier result file')
+    compare_parser.add_argument('candidate', help='Newer result file')
+    compare_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                                help='Relative slowdown counted as a regression (default: 0.10)')
+
+    args = parser.parse_args()
+
+    if args.command == 'generate':
+        matrix = PROFILES[args.profile]
+        for resolution in matrix['resolutions']:
+            generate_assets(Path(args.media_dir), resolution)
+            for source in matrix['sources']:
+                for duration in matrix['durations']:
+                    generate_media(source, resolution, duration, Path(args.media_dir))
+
+    elif args.command == 'run':
+        suite = BenchmarkSuite(args.profile, args.work_dir, args.media_dir, args.repeats, args.only)
+        try:
+            document = suite.run()
+        finally:
+            if not args.work_dir:
+                shutil.rmtree(suite.work_dir, ignore_errors=True)
+
+        output = Path(args.output or Path(__file__).parent / 'results' /
+                      f"{args.profile}-{datetime.now():%Y%m%d-%H%M%S}.json")
+        output.parent.mkdir(parents=True, exist_ok=True)
+        with open(output, 'w') as f:
+            json.dump(document, f, indent=2)
+        print(f"\nResults saved to: {output}")
+
+    elif args.command == 'compare':
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.candidate) as f:
+            candidate = json.load(f)
+
+        rows = compare(baseline, candidate, args.threshold)
+        print_comparison(baseline, candidate, rows, args.threshold)
+        if any(r['status'] == 'regression' for r in rows):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
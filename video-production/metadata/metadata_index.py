@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Metadata Index
+Inverted index (SQLite) over saved metadata: titles, tags, description
+words and links, so tag, term and prefix queries don't have to open every
+*_metadata.json file. YouTubeMetadataGenerator keeps it current as it
+saves; refresh() picks up files changed by other means.
+"""
+
+import re
+import json
+import sqlite3
+import argparse
+import threading
+from pathlib import Path
+from typing import Optional, List, Dict, Iterable, Tuple
+from urllib.parse import urlparse
+
+FIELDS = ['title', 'tag', 'description', 'link']
+
+URL_PATTERN = re.compile(r'https?://[^\s<>"\')]+')
+WORD_PATTERN = re.compile(r'\w+')
+
+
+def _terms(metadata: Dict) -> List[Tuple[str, str]]:
+    """(field, term) pairs for one metadata record"""
+    terms = set()
+    for word in WORD_PATTERN.findall(str(metadata.get('title') or '').lower()):
+        terms.add(('title', word))
+    for tag in metadata.get('tags') or []:
+        terms.add(('tag', str(tag).strip().lower()))
+
+    description = str(metadata.get('description') or '')
+    for url in URL_PATTERN.findall(description):
+        url = url.rstrip('.,;:!?').lower()
+        terms.add(('link', url))
+        host = urlparse(url).netloc
+        if host:
+            terms.add(('link', host[4:] if host.startswith('www.') else host))
+    for word in WORD_PATTERN.findall(URL_PATTERN.sub(' ', description).lower()):
+        terms.add(('description', word))
+    return sorted(terms)
+
+
+class MetadataIndex:
+    """SQLite inverted index of metadata files (and catalog entries)"""
+
+    def __init__(self, db_path: str = "../metadata/index.db"):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        with self._db:
+            self._db.execute('''
+                CREATE TABLE IF NOT EXISTS documents (
+                    file TEXT PRIMARY KEY,
+                    source TEXT,
+                    title TEXT,
+                    mtime_ns INTEGER
+                )
+            ''')
+            # Keyed (field, term, file): exact and prefix lookups are range
+            # scans of the primary key
+            self._db.execute('''
+                CREATE TABLE IF NOT EXISTS postings (
+                    field TEXT,
+                    term TEXT,
+                    file TEXT,
+                    PRIMARY KEY (field, term, file)
+                ) WITHOUT ROWID
+            ''')
+            self._db.execute('CREATE INDEX IF NOT EXISTS postings_file ON postings (file)')
+
+    def _replace(self, file: str, metadata: Dict, source: str, mtime_ns: Optional[int]):
+        self._db.execute('DELETE FROM postings WHERE file = ?', (file,))
+        self._db.execute('INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?)',
+                         (file, source, metadata.get('title'), mtime_ns))
+        self._db.executemany('INSERT INTO postings VALUES (?, ?, ?)',
+                             [(field, term, file) for field, term in _terms(metadata)])
+
+    def add(self, file: str, metadata: Dict, source: Optional[str] = None,
+            mtime_ns: Optional[int] = None):
+        """(Re)index one record; source is the file it lives in (default: file itself)"""
+        with self._lock, self._db:
+            self._replace(file, metadata, source or file, mtime_ns)
+
+    def add_many(self, entries: Dict[str, Dict], source: str, mtime_ns: Optional[int] = None):
+        """
+        (Re)index records from one source (e.g. the new entries of a
+        catalog) in a single transaction; the source's other records are
+        kept and marked current as of mtime_ns
+        """
+        with self._lock, self._db:
+            for file, metadata in entries.items():
+                self._replace(file, metadata, source, mtime_ns)
+            self._db.execute('UPDATE documents SET mtime_ns = ? WHERE source = ?', (mtime_ns, source))
+
+    def remove(self, file: str):
+        with self._lock, self._db:
+            self._db.execute('DELETE FROM postings WHERE file = ?', (file,))
+            self._db.execute('DELETE FROM documents WHERE file = ?', (file,))
+
+    def refresh(self, metadata_dir: str = "../metadata") -> int:
+        """
+        Bring the index in line with the files on disk: reindex metadata
+        files and catalogs whose mtime changed, drop entries whose source
+        is gone. Returns the number of records reindexed.
+        """
+        metadata_dir = Path(metadata_dir)
+        with self._lock:
+            known = {}
+            for file, source, mtime_ns in self._db.execute(
+                    'SELECT file, source, mtime_ns FROM documents'):
+                known.setdefault(source, (mtime_ns, []))[1].append(file)
+
+        sources = {path.name: path for path in metadata_dir.glob('*_metadata.json')}
+        sources.update({path.name: path for path in metadata_dir.glob('*.jsonl')})
+
+        reindexed = 0
+        for name, path in sources.items():
+            mtime_ns = path.stat().st_mtime_ns
+            if name in known and known[name][0] == mtime_ns:
+                continue
+            try:
+                if path.suffix == '.jsonl':
+                    with open(path, 'r', encoding='utf-8') as f:
+                        entries = {record['file']: record['metadata']
+                                   for record in map(json.loads, filter(str.strip, f))}
+                else:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        entries = {name: json.load(f)}
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Skipping {path}: {e}")
+                continue
+
+            stale = set(known.get(name, (None, []))[1]) - set(entries)
+            with self._lock, self._db:
+                self._db.executemany('DELETE FROM postings WHERE file = ?', [(f,) for f in stale])
+                self._db.executemany('DELETE FROM documents WHERE file = ?', [(f,) for f in stale])
+                for file, metadata in entries.items():
+                    self._replace(file, metadata, name, mtime_ns)
+            reindexed += len(entries)
+
+        for source in set(known) - set(sources):
+            for file in known[source][1]:
+                self.remove(file)
+        return reindexed
+
+    def _lookup(self, fields: List[str], term: str, prefix: bool = False) -> set:
+        placeholders = ', '.join('?' for _ in fields)
+        term = term.strip().lower()
+        if prefix:
+            # Range scan instead of LIKE so the primary key index is used
+            sql = (f'SELECT DISTINCT file FROM postings WHERE field IN ({placeholders}) '
+                   'AND term >= ? AND term < ?')
+            args = (*fields, term, term + '\U0010ffff')
+        else:
+            sql = f'SELECT DISTINCT file FROM postings WHERE field IN ({placeholders}) AND term = ?'
+            args = (*fields, term)
+        with self._lock:
+            return {row[0] for row in self._db.execute(sql, args)}
+
+    def search(self, tags: Iterable[str] = (), terms: Iterable[str] = (),
+               prefixes: Iterable[str] = (), links: Iterable[str] = (),
+               field: Optional[str] = None, has_links: bool = False) -> List[Dict]:
+        """
+        Records matching every condition (AND), sorted by file:
+            tags       exact tags
+            terms      words in title or description (or only `field`)
+            prefixes   word/tag/link prefixes in any field (or only `field`)
+            links      URLs or hosts, e.g. github.com
+            has_links  description contains at least one URL
+        """
+        fields = [field] if field else None
+        lookups = ([(['tag'], tag, False) for tag in tags] +
+                   [(fields or ['title', 'description'], term, False) for term in terms] +
+                   [(fields or FIELDS, prefix, True) for prefix in prefixes] +
+                   [(['link'], link, False) for link in links])
+        if has_links:
+            lookups.append((['link'], 'http', True))
+
+        matches = None
+        for lookup_fields, value, prefix in lookups:
+            found = self._lookup(lookup_fields, value, prefix)
+            matches = found if matches is None else matches & found
+            if not matches:
+                return []
+
+        with self._lock:
+            if matches is None:
+                rows = self._db.execute('SELECT file, source, title FROM documents ORDER BY file').fetchall()
+            else:
+                # Chunked to stay under SQLite's bound-parameter limit
+                ordered = sorted(matches)
+                rows = []
+                for i in range(0, len(ordered), 500):
+                    chunk = ordered[i:i + 500]
+                    rows.extend(self._db.execute(
+                        f"SELECT file, source, title FROM documents WHERE file IN "
+                        f"({', '.join('?' for _ in chunk)})", chunk))
+                rows.sort()
+        return [{'file': file, 'source': source, 'title': title} for file, source, title in rows]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            documents = self._db.execute('SELECT COUNT(*) FROM documents').fetchone()[0]
+            postings = self._db.execute('SELECT COUNT(*) FROM postings').fetchone()[0]
+        return {'documents': documents, 'postings': postings}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Query the metadata index')
+    parser.add_argument('--tag', action='append', default=[], help='Exact tag (repeatable)')
+    parser.add_argument('--term', action='append', default=[],
+                        help='Word in title or description (repeatable)')
+    parser.add_argument('--prefix', action='append', default=[],
+                        help='Word, tag or link prefix (repeatable)')
+    parser.add_argument('--link', action='append', default=[],
+                        help='URL or host in the description, e.g. github.com (repeatable)')
+    parser.add_argument('--field', choices=FIELDS, default=None,
+                        help='Restrict --term/--prefix to one field')
+    parser.add_argument('--has-links', action='store_true',
+                        help='Only records whose description contains a URL')
+    parser.add_argument('--refresh', action='store_true',
+                        help='Reindex files changed on disk before querying')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    parser.add_argument('--metadata-dir', default='../metadata',
+                        help='Metadata directory (default: ../metadata)')
+    parser.add_argument('--db', default=None,
+                        help='Index database (default: <metadata-dir>/index.db)')
+
+    args = parser.parse_args()
+    index = MetadataIndex(args.db or str(Path(args.metadata_dir) / 'index.db'))
+
+    if args.refresh:
+        print(f"Reindexed {index.refresh(args.metadata_dir)} record(s)")
+
+    conditions = args.tag or args.term or args.prefix or args.link or args.has_links
+    if not conditions:
+        stats = index.stats()
+        print(f"Index: {stats['documents']} record(s), {stats['postings']} posting(s)")
+        return
+
+    results = index.search(args.tag, args.term, args.prefix, args.link, args.field, args.has_links)
+
+    if args.json:
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+        return
+    for result in results:
+        source = f"  [{result['source']}]" if result['source'] != result['file'] else ''
+        print(f"{result['file']:<50} {result['title']}{source}")
+    print(f"\n{len(results)} match(es)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Tutorial Series Store
+Keeps series and their episodes in SQLite, so adding an episode is a
+single-row insert instead of a rewrite of the whole series file, and
+concurrent writers (several processes included) are serialized by
+SQLite's file locking. Series can be exported to, and imported from, the
+<series>_series.json layout TutorialSeriesManager used to write.
+"""
+
+import json
+import sqlite3
+import argparse
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, List, Dict
+
+
+class SeriesStore:
+    """SQLite-backed tutorial series and episodes"""
+
+    def __init__(self, db_path: str = "../metadata/series.db"):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        # IMMEDIATE: every write transaction takes the database's write lock
+        # up front, so concurrent writers queue (up to the timeout) instead
+        # of failing halfway through
+        self._db = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False,
+                                   isolation_level='IMMEDIATE')
+        self._db.execute('PRAGMA journal_mode=WAL')
+        with self._db:
+            self._db.execute('''
+                CREATE TABLE IF NOT EXISTS series (
+                    name TEXT PRIMARY KEY,
+                    description TEXT,
+                    playlist_id TEXT,
+                    created_at TEXT
+                )
+            ''')
+            self._db.execute('''
+                CREATE TABLE IF NOT EXISTS episodes (
+                    series TEXT,
+                    episode INTEGER,
+                    title TEXT,
+                    metadata_file TEXT,
+                    added_at TEXT,
+                    PRIMARY KEY (series, episode)
+                )
+            ''')
+            self._db.execute('CREATE INDEX IF NOT EXISTS episodes_title ON episodes (series, title)')
+
+    def create_series(self, name: str, description: str, playlist_id: Optional[str] = None,
+                      created_at: Optional[str] = None) -> Dict:
+        """(Re)initialize a series; an existing series of that name loses its episodes"""
+        series = {
+            'series_name': name,
+            'description': description,
+            'playlist_id': playlist_id,
+            'created_at': created_at or datetime.now().isoformat()
+        }
+        with self._lock, self._db:
+            self._db.execute('DELETE FROM episodes WHERE series = ?', (name,))
+            self._db.execute('INSERT OR REPLACE INTO series VALUES (?, ?, ?, ?)',
+                             (name, description, playlist_id, series['created_at']))
+        return series
+
+    def get_series(self, name: str) -> Optional[Dict]:
+        """Series record (without episodes), or None"""
+        with self._lock:
+            row = self._db.execute(
+                'SELECT name, description, playlist_id, created_at FROM series WHERE name = ?',
+                (name,)
+            ).fetchone()
+        if not row:
+            return None
+        return {'series_name': row[0], 'description': row[1], 'playlist_id': row[2],
+                'created_at': row[3]}
+
+    def series_names(self) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self._db.execute('SELECT name FROM series ORDER BY name')]
+
+    def add_episode(self, name: str, episode: int, title: str, metadata_file: str):
+        """Record an episode (replacing an earlier one with the same number)"""
+        with self._lock, self._db:
+            self._db.execute('INSERT OR REPLACE INTO episodes VALUES (?, ?, ?, ?, ?)',
+                             (name, episode, title, metadata_file, datetime.now().isoformat()))
+
+    def _episodes(self, where: str, args: tuple) -> List[Dict]:
+        with self._lock:
+            rows = self._db.execute(
+                f'SELECT episode, title, metadata_file FROM episodes WHERE {where} ORDER BY episode',
+                args
+            ).fetchall()
+        return [{'episode': episode, 'title': title, 'metadata_file': metadata_file}
+                for episode, title, metadata_file in rows]
+
+    def episodes(self, name: str) -> List[Dict]:
+        """Episodes of a series in episode order"""
+        return self._episodes('series = ?', (name,))
+
+    def episode(self, name: str, number: int) -> Optional[Dict]:
+        found = self._episodes('series = ? AND episode = ?', (name, number))
+        return found[0] if found else None
+
+    def find_episodes(self, name: str, title: str) -> List[Dict]:
+        """Episodes with exactly this (full) title"""
+        return self._episodes('series = ? AND title = ?', (name, title))
+
+    def export_json(self, name: str) -> Dict:
+        """Series in the legacy <series>_series.json layout"""
+        series = self.get_series(name)
+        if not series:
+            raise ValueError(f"Series not found: {name}")
+        return {
+            'series_name': series['series_name'],
+            'description': series['description'],
+            'playlist_id': series['playlist_id'],
+            'videos': self.episodes(name),
+            'created_at': series['created_at']
+        }
+
+    def import_json(self, series_file: str) -> str:
+        """Load a legacy <series>_series.json file; returns the series name"""
+        with open(series_file, 'r') as f:
+            data = json.load(f)
+
+        name = data['series_name']
+        now = datetime.now().isoformat()
+        with self._lock, self._db:
+            self._db.execute('DELETE FROM episodes WHERE series = ?', (name,))
+            self._db.execute('INSERT OR REPLACE INTO series VALUES (?, ?, ?, ?)',
+                             (name, data.get('description'), data.get('playlist_id'),
+                              data.get('created_at') or now))
+            self._db.executemany(
+                'INSERT OR REPLACE INTO episodes VALUES (?, ?, ?, ?, ?)',
+                [(name, video['episode'], video['title'], video.get('metadata_file'), now)
+                 for video in data.get('videos', [])]
+            )
+        return name
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inspect and export tutorial series')
+    parser.add_argument('command', choices=['list', 'show', 'export', 'import'])
+    parser.add_argument('target', nargs='?',
+                        help='Series name (show, export) or legacy series JSON file (import)')
+    parser.add_argument('--output', default=None,
+                        help='Export destination (default: print to stdout)')
+    parser.add_argument('--db', default='../metadata/series.db',
+                        help='Series database (default: ../metadata/series.db)')
+
+    args = parser.parse_args()
+    store = SeriesStore(args.db)
+
+    if args.command == 'list':
+        for name in store.series_names():
+            print(f"{name:<40} {len(store.episodes(name)):>4} episode(s)")
+        return
+
+    if not args.target:
+        parser.error(f'{args.command} needs a series name or file')
+
+    if args.command == 'import':
+        print(f"Imported series: {store.import_json(args.target)}")
+
+    elif args.command == 'show':
+        for episode in store.episodes(args.target):
+            print(f"{episode['episode']:>4}  {episode['title']}  ({episode['metadata_file']})")
+
+    elif args.command == 'export':
+        data = json.dumps(store.export_json(args.target), indent=2)
+        if args.output:
+            Path(args.output).write_text(data)
+            print(f"Exported series to: {args.output}")
+        else:
+            print(data)
+
+
+if __name__ == '__main__':
+    main()
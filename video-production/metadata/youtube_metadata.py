@@ -5,18 +5,57 @@ Creates and manages metadata for YouTube video uploads including
 titles, descriptions, tags, and timestamps
 """
 
+import os
+import sys
+import copy
 import json
-import yaml
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime
 
+# Add parent directory to path to import our modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from metadata.series_store import SeriesStore
+from metadata.metadata_index import MetadataIndex
+
+
+def _write_atomic(path: Path, text: str):
+    """Write via a temp file and rename, so readers never see a partial file"""
+    temp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(temp, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(temp, path)
+
+
+def _dump_yaml(metadata: Dict) -> str:
+    # PyYAML is imported on first use: JSON-only runs (catalogs, queries)
+    # never pay for loading it. libyaml-backed (C) dumper when available.
+    import yaml
+    dumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+    return yaml.dump(metadata, Dumper=dumper, default_flow_style=False, allow_unicode=True)
+
+
+def _load_yaml(f) -> Dict:
+    import yaml
+    return yaml.load(f, Loader=getattr(yaml, 'CSafeLoader', yaml.SafeLoader))
+
 
 class YouTubeMetadataGenerator:
-    def __init__(self, project_name: str = "Tutorial Series"):
+    def __init__(self, project_name: str = "Tutorial Series", write_yaml: bool = True,
+                 index: Optional[MetadataIndex] = None):
         self.project_name = project_name
         self.metadata_dir = Path("../metadata")
         self.metadata_dir.mkdir(parents=True, exist_ok=True)
+        # Inverted index over everything saved, for tag/term/link queries
+        self.index = index or MetadataIndex(str(self.metadata_dir / "index.db"))
+        # Write a YAML copy next to every JSON file; when off, export_yaml
+        # produces it on demand
+        self.write_yaml = write_yaml
+        # Files written by the most recent save (JSON and YAML)
+        self.last_outputs = []
+        # Parsed files keyed by path, reused while (mtime, size) is unchanged
+        self._read_cache: Dict[Path, Tuple[Tuple[int, int], object]] = {}
 
     def generate_metadata(self,
                          title: str,
@@ -27,13 +66,30 @@ class YouTubeMetadataGenerator:
                          links: Optional[List[Dict[str, str]]] = None,
                          output_file: Optional[str] = None) -> Dict:
         """Generate complete YouTube metadata"""
+        metadata = self.build_metadata(title, description, tags, category, timestamps, links)
+        self._save_metadata(metadata, self._output_filename(title, output_file))
+        return metadata
+
+    def output_paths(self, title: str, output_file: Optional[str] = None) -> List[Path]:
+        """Files generate_metadata writes for title: the JSON and its YAML copy"""
+        output_path = self.metadata_dir / self._output_filename(title, output_file)
+        return [output_path, output_path.with_suffix('.yaml')] if self.write_yaml else [output_path]
+
+    def build_metadata(self,
+                       title: str,
+                       description: str,
+                       tags: List[str],
+                       category: str = "Education",
+                       timestamps: Optional[List[Dict[str, str]]] = None,
+                       links: Optional[List[Dict[str, str]]] = None) -> Dict:
+        """Metadata dict for one video, without saving it"""
 
         # Build description with timestamps and links
         full_description = self._build_description(
             description, timestamps, links
         )
 
-        metadata = {
+        return {
             "title": title,
             "description": full_description,
             "tags": tags,
@@ -50,17 +106,14 @@ class YouTubeMetadataGenerator:
             "defaultAudioLanguage": "en"
         }
 
-        # Save to file
+    @staticmethod
+    def _output_filename(title: str, output_file: Optional[str] = None) -> str:
+        """Given filename, or one generated from the title"""
         if output_file:
-            self._save_metadata(metadata, output_file)
-        else:
-            # Generate filename from title
-            safe_title = "".join(c for c in title if c.isalnum() or c in (' ', '-', '_')).rstrip()
-            safe_title = safe_title.replace(' ', '_')[:50]
-            output_file = f"{safe_title}_metadata.json"
-            self._save_metadata(metadata, output_file)
-
-        return metadata
+            return output_file
+        safe_title = "".join(c for c in title if c.isalnum() or c in (' ', '-', '_')).rstrip()
+        safe_title = safe_title.replace(' ', '_')[:50]
+        return f"{safe_title}_metadata.json"
 
     def _build_description(self,
                           base_description: str,
@@ -106,20 +159,37 @@ class YouTubeMetadataGenerator:
         ]
 
     def _save_metadata(self, metadata: Dict, filename: str):
-        """Save metadata to JSON file"""
+        """Save metadata to JSON file (plus a YAML copy when write_yaml is set)"""
         output_path = self.metadata_dir / filename
+        _write_atomic(output_path, json.dumps(metadata, indent=2, ensure_ascii=False))
+        self.last_outputs = [output_path]
+        self.index.add(output_path.name, metadata, mtime_ns=output_path.stat().st_mtime_ns)
 
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(metadata, f, indent=2, ensure_ascii=False)
-
-        print(f"Metadata saved to: {output_path}")
+        if not self.write_yaml:
+            print(f"Metadata saved to: {output_path}")
+            return
 
         # Also save as YAML for easier editing
         yaml_path = output_path.with_suffix('.yaml')
-        with open(yaml_path, 'w', encoding='utf-8') as f:
-            yaml.dump(metadata, f, default_flow_style=False, allow_unicode=True)
-
+        _write_atomic(yaml_path, _dump_yaml(metadata))
+        self.last_outputs.append(yaml_path)
+        print(f"Metadata saved to: {output_path} (YAML: {yaml_path.name})")
+
+    def export_yaml(self, filename: str, catalog: Optional[str] = None) -> Path:
+        """
+        YAML copy of a saved metadata file (or catalog entry), produced on
+        demand; an existing copy is reused while it's newer than its source
+        """
+        yaml_path = (self.metadata_dir / filename).with_suffix('.yaml')
+        source = self.metadata_dir / (catalog or filename)
+
+        if yaml_path.exists() and yaml_path.stat().st_mtime_ns >= source.stat().st_mtime_ns:
+            return yaml_path
+
+        metadata = self.load_catalog(catalog)[filename] if catalog else self.load_metadata(filename)
+        _write_atomic(yaml_path, _dump_yaml(metadata))
         print(f"YAML version saved to: {yaml_path}")
+        return yaml_path
 
     def create_from_template(self, template_name: str, **kwargs) -> Dict:
         """Create metadata from predefined template"""
@@ -220,8 +290,18 @@ class YouTubeMetadataGenerator:
 
         return timestamps
 
-    def create_batch_metadata(self, videos_info: List[Dict]) -> List[str]:
-        """Create metadata for multiple videos at once"""
+    def create_batch_metadata(self, videos_info: List[Dict],
+                              catalog: Optional[str] = None) -> List[Dict]:
+        """
+        Create metadata for multiple videos at once
+        catalog: bulk mode. Instead of a JSON + YAML pair per video, every
+                 record is merged into this JSONL file (one line per
+                 output_file, replacing earlier entries) in a single atomic
+                 write. YAML for an entry comes from export_yaml.
+        """
+        if catalog:
+            return self._write_catalog(videos_info, catalog)
+
         created_files = []
 
         for video in videos_info:
@@ -239,16 +319,74 @@ class YouTubeMetadataGenerator:
         print(f"\nCreated metadata for {len(created_files)} videos")
         return created_files
 
+    def _write_catalog(self, videos_info: List[Dict], catalog: str) -> List[Dict]:
+        """Build every record and merge them into the JSONL catalog"""
+        entries = self.load_catalog(catalog) if (self.metadata_dir / catalog).exists() else {}
+
+        created, added = [], {}
+        for video in videos_info:
+            metadata = self.build_metadata(
+                title=video['title'],
+                description=video['description'],
+                tags=video.get('tags', []),
+                category=video.get('category', 'Education'),
+                timestamps=video.get('timestamps', []),
+                links=video.get('links', [])
+            )
+            added[self._output_filename(video['title'], video.get('output_file'))] = metadata
+            created.append(metadata)
+        entries.update(added)
+
+        catalog_path = self.metadata_dir / catalog
+        _write_atomic(catalog_path, ''.join(
+            json.dumps({'file': name, 'metadata': metadata}, ensure_ascii=False) + '\n'
+            for name, metadata in entries.items()
+        ))
+        self.last_outputs = [catalog_path]
+        self.index.add_many(added, catalog_path.name, catalog_path.stat().st_mtime_ns)
+
+        print(f"\nCreated metadata for {len(created)} videos in {catalog_path} "
+              f"({len(entries)} entries)")
+        return created
+
+    def _read_cached(self, file_path: Path, parse):
+        """Parse a file, or reuse the last parse while its mtime and size are unchanged (shared)"""
+        stat = file_path.stat()
+        signature = (stat.st_mtime_ns, stat.st_size)
+        cached = self._read_cache.get(file_path)
+        if cached and cached[0] == signature:
+            return cached[1]
+
+        with open(file_path, 'r', encoding='utf-8') as f:
+            data = parse(f)
+        self._read_cache[file_path] = (signature, data)
+        return data
+
     def load_metadata(self, filename: str) -> Dict:
-        """Load metadata from file"""
+        """Load metadata from file (cached until the file changes)"""
         file_path = self.metadata_dir / filename
 
         if file_path.suffix == '.yaml':
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return yaml.safe_load(f)
+            metadata = self._read_cached(file_path, _load_yaml)
         else:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            metadata = self._read_cached(file_path, json.load)
+        return copy.deepcopy(metadata)
+
+    def load_catalog(self, catalog: str = "catalog.jsonl") -> Dict[str, Dict]:
+        """
+        Entries of a JSONL catalog as {output_file: metadata}, cached until
+        the file changes. Entries are shared with the cache: copy one
+        before modifying it.
+        """
+        def parse(f) -> Dict[str, Dict]:
+            entries = {}
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    entries[record['file']] = record['metadata']
+            return entries
+
+        return dict(self._read_cached(self.metadata_dir / catalog, parse))
 
     def update_metadata(self, filename: str, updates: Dict) -> Dict:
         """Update existing metadata file"""
@@ -261,31 +399,29 @@ class YouTubeMetadataGenerator:
 class TutorialSeriesManager:
     """Manage metadata for a series of tutorial videos"""
 
-    def __init__(self, series_name: str):
+    def __init__(self, series_name: str, store: Optional[SeriesStore] = None):
         self.series_name = series_name
         self.generator = YouTubeMetadataGenerator(series_name)
         self.series_file = self.generator.metadata_dir / f"{series_name}_series.json"
+        self.store = store or SeriesStore(str(self.generator.metadata_dir / "series.db"))
+
+        # Pick up a series last saved as a whole JSON file
+        if self.store.get_series(series_name) is None and self.series_file.exists():
+            self.store.import_json(str(self.series_file))
 
     def create_series(self, description: str, playlist_id: Optional[str] = None):
         """Initialize a new tutorial series"""
-        series_data = {
-            "series_name": self.series_name,
-            "description": description,
-            "playlist_id": playlist_id,
-            "videos": [],
-            "created_at": datetime.now().isoformat()
-        }
-
-        with open(self.series_file, 'w') as f:
-            json.dump(series_data, f, indent=2)
-
+        self.store.create_series(self.series_name, description, playlist_id)
         print(f"Created series: {self.series_name}")
 
-    def add_episode(self, episode_number: int, title: str, **kwargs):
-        """Add episode to series with auto-numbering"""
-        # Load series
-        with open(self.series_file, 'r') as f:
-            series_data = json.load(f)
+    def add_episode(self, episode_number: int, title: str, replace: bool = False, **kwargs):
+        """Add episode to series with auto-numbering (replace=True to redo an episode)"""
+        series_data = self.store.get_series(self.series_name)
+        if series_data is None:
+            raise ValueError(f"Series not found: {self.series_name} (call create_series first)")
+        if not replace and self.store.episode(self.series_name, episode_number):
+            raise ValueError(f"Episode {episode_number} already in series {self.series_name} "
+                             f"(pass replace=True to replace it)")
 
         # Generate episode title
         full_title = f"{self.series_name} #{episode_number}: {title}"
@@ -293,6 +429,8 @@ class TutorialSeriesManager:
         # Add series description to video description
         series_desc = f"Part {episode_number} of the {self.series_name} series.\n\n{kwargs.get('description', '')}"
 
+        metadata_file = f"{self.series_name.replace(' ', '_')}_ep{episode_number:02d}_metadata.json"
+
         # Create metadata
         metadata = self.generator.generate_metadata(
             title=full_title,
@@ -301,26 +439,29 @@ class TutorialSeriesManager:
             category=kwargs.get('category', 'Education'),
             timestamps=kwargs.get('timestamps', []),
             links=kwargs.get('links', []),
-            output_file=f"{self.series_name.replace(' ', '_')}_ep{episode_number:02d}_metadata.json"
+            output_file=metadata_file
         )
 
         # Update playlist if set
         if series_data.get('playlist_id'):
             metadata['playlist'] = series_data['playlist_id']
 
-        # Add to series
-        series_data['videos'].append({
-            "episode": episode_number,
-            "title": full_title,
-            "metadata_file": f"{self.series_name.replace(' ', '_')}_ep{episode_number:02d}_metadata.json"
-        })
-
-        # Save series
-        with open(self.series_file, 'w') as f:
-            json.dump(series_data, f, indent=2)
+        # Add to series (one row; <series>_series.json only changes on export_series_json)
+        self.store.add_episode(self.series_name, episode_number, full_title, metadata_file)
 
         print(f"Added episode {episode_number} to series")
 
+    def episodes(self) -> List[Dict]:
+        """Episodes in episode order"""
+        return self.store.episodes(self.series_name)
+
+    def export_series_json(self, output_file: Optional[str] = None) -> Path:
+        """Write the series in the <series>_series.json layout"""
+        path = self.generator.metadata_dir / output_file if output_file else self.series_file
+        _write_atomic(path, json.dumps(self.store.export_json(self.series_name), indent=2))
+        print(f"Exported series to: {path}")
+        return path
+
 
 def main():
     import sys
@@ -331,10 +472,19 @@ def main():
         print("YouTube Metadata Generator")
         print("\nUsage:")
         print("  python youtube_metadata.py <title> <description> [tags...]")
+        print("  python youtube_metadata.py --batch <videos.json> [catalog.jsonl]")
         print("\nExample:")
         print("  python youtube_metadata.py 'My Tutorial' 'Learn to code' python tutorial coding")
         sys.exit(1)
 
+    # Bulk mode: a JSON list of videos ({title, description, tags, ...}) into one catalog
+    if sys.argv[1] == '--batch':
+        with open(sys.argv[2], 'r', encoding='utf-8') as f:
+            videos = json.load(f)
+        catalog = sys.argv[3] if len(sys.argv) > 3 else 'catalog.jsonl'
+        generator.create_batch_metadata(videos, catalog=catalog)
+        return
+
     title = sys.argv[1]
     description = sys.argv[2]
     tags = sys.argv[3:] if len(sys.argv) > 3 else []
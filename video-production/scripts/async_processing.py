@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Asyncio Video Processing
+Awaitable counterparts of VideoProcessor and ThumbnailGenerator built on
+asyncio.create_subprocess_exec, so one event loop can drive many
+concurrent encodes and their thumbnails. Each operation gets an `_async`
+coroutine next to the inherited blocking method, and both share its code;
+cancelling a task kills its ffmpeg processes.
+
+    async def publish(video):
+        processor = AsyncVideoProcessor(video)
+        thumbnails = AsyncThumbnailGenerator()
+        return await asyncio.gather(
+            processor.compress_video_async(),
+            thumbnails.create_thumbnail_from_video_async(video, 'Title', 'auto'))
+"""
+
+import sys
+import asyncio
+import argparse
+import subprocess
+from pathlib import Path
+from typing import Optional, List, Dict, Tuple, Any, AsyncIterator
+
+import numpy as np
+from PIL import Image
+
+# Add parent directory to path to import our modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.process_video import ParallelSteps, Steps, VideoProcessor, resume_steps
+from scripts.ffmpeg_progress import (
+    ProgressEvent,
+    RunSummary,
+    capture_output_async,
+    install_signal_handlers,
+    process_scope,
+    run_ffmpeg_async,
+)
+from scripts.tracing import span
+from thumbnails.thumbnail_generator import DEFAULT_TIMESTAMP, ThumbnailGenerator
+
+
+class AsyncVideoProcessor(VideoProcessor):
+    """
+    VideoProcessor with a coroutine (name_async) for each operation; the
+    blocking methods are inherited unchanged
+    Python work between ffmpeg runs (probing, cache fingerprints, preset
+    tuning) runs in worker threads, so the event loop never blocks on it.
+    Summaries of runs driven here carry no peak RSS or CPU times.
+    """
+
+    async def _drive_async(self, steps: Steps) -> Any:
+        """Run an operation's steps with asyncio ffmpeg runs and return its result"""
+        result = error = None
+        with process_scope() as scope:
+            while True:
+                # The operation's own code runs in a thread, and may run
+                # blocking ffmpeg itself (preset tuning's sample encodes)
+                resumed = asyncio.ensure_future(
+                    asyncio.to_thread(resume_steps, steps, result, error))
+                try:
+                    finished, step = await asyncio.shield(resumed)
+                except asyncio.CancelledError:
+                    # Stop the thread's ffmpeg and let it finish before
+                    # closing the operation, which it is still running
+                    scope.cancel()
+                    await asyncio.wait([resumed])
+                    if not resumed.cancelled():
+                        resumed.exception()  # EncodeInterrupted, most likely
+                    steps.close()
+                    raise
+                if finished:
+                    return step
+                try:
+                    result, error = await self._execute_async(step), None
+                except Exception as e:
+                    result, error = None, e
+                except BaseException:
+                    # Cancelled: let the operation clean up, then stop
+                    steps.close()
+                    raise
+
+    async def _execute_async(self, step) -> Any:
+        """Run one FFmpegStep (its RunSummary) or ParallelSteps (a list of them)"""
+        if isinstance(step, ParallelSteps):
+            slots = asyncio.Semaphore(step.workers)
+
+            async def bounded(parallel_step):
+                async with slots:
+                    return await self._execute_async(parallel_step)
+
+            # Like the thread pool: let the others finish (and checkpoint) first
+            results = await asyncio.gather(*(bounded(s) for s in step.steps),
+                                           return_exceptions=True)
+            for result in results:
+                if isinstance(result, BaseException):
+                    raise result
+            return results
+
+        summary = await self._run_async(step.cmd, step.outputs, step.inputs,
+                                        step.operation, step.duration)
+        if step.then:
+            step.then()
+        return summary
+
+    async def _run_async(self, cmd: List[str], outputs: List[Path],
+                         inputs: Optional[List[str]] = None, operation: str = '',
+                         duration: Optional[float] = None) -> RunSummary:
+        """Awaitable _run: cache bookkeeping in a thread, ffmpeg on the loop"""
+        with span(operation or 'ffmpeg', 'ffmpeg', input=str(self.input_file)) as trace:
+            key, summary = await asyncio.to_thread(self._cache_lookup, cmd, outputs,
+                                                   inputs, operation)
+            if not summary:
+                duration = duration or await asyncio.to_thread(self._input_duration)
+                summary = await run_ffmpeg_async(cmd, operation, duration, outputs,
+                                                 self.progress_callbacks)
+                summary = await asyncio.to_thread(self._record, summary, key, outputs, operation)
+            trace.set(cache_hit=summary.cache_hit, realtime_factor=summary.realtime_factor)
+        return summary
+
+    async def progress(self, task: asyncio.Future) -> AsyncIterator[ProgressEvent]:
+        """
+        Progress events from this processor's ffmpeg runs until `task` is done
+            task = asyncio.create_task(processor.compress_video_async())
+            async for event in processor.progress(task):
+                print(f"{event.operation}: {event.percent}")
+            output = await task
+        """
+        queue = asyncio.Queue()
+        self.progress_callbacks.append(queue.put_nowait)
+        task.add_done_callback(lambda _: queue.put_nowait(None))
+        try:
+            while True:
+                event = await queue.get()
+                if event is None:
+                    return
+                yield event
+        finally:
+            self.progress_callbacks.remove(queue.put_nowait)
+
+    async def get_video_info_async(self, entries: Optional[str] = None) -> Dict:
+        """See VideoProcessor.get_video_info"""
+        return await asyncio.to_thread(self._video_info, entries)
+
+    async def compress_video_async(self, output_name: Optional[str] = None,
+                                   crf: int = 23, preset: str = 'medium',
+                                   target_speed: Optional[float] = None,
+                                   deadline: Optional[float] = None) -> Path:
+        """See VideoProcessor.compress_video"""
+        return await self._drive_async(self._compress_video_steps(output_name, crf, preset,
+                                                                  target_speed, deadline))
+
+    async def compress_video_chunked_async(self, output_name: Optional[str] = None,
+                                           crf: int = 23, preset: str = 'medium',
+                                           chunks: Optional[int] = None,
+                                           workers: Optional[int] = None,
+                                           min_chunk_seconds: float = 30.0,
+                                           target_speed: Optional[float] = None,
+                                           deadline: Optional[float] = None) -> Path:
+        """See VideoProcessor.compress_video_chunked (chunks run as concurrent tasks)"""
+        return await self._drive_async(self._compress_video_chunked_steps(
+            output_name, crf, preset, chunks, workers, min_chunk_seconds, target_speed, deadline))
+
+    async def add_intro_outro_async(self, intro_file: Optional[str] = None,
+                                    outro_file: Optional[str] = None,
+                                    output_name: Optional[str] = None) -> Path:
+        """See VideoProcessor.add_intro_outro"""
+        return await self._drive_async(self._add_intro_outro_steps(intro_file, outro_file,
+                                                                   output_name))
+
+    async def add_watermark_async(self, watermark_file: str, position: str = 'bottom-right',
+                                  output_name: Optional[str] = None) -> Path:
+        """See VideoProcessor.add_watermark"""
+        return await self._drive_async(self._add_watermark_steps(watermark_file, position,
+                                                                 output_name))
+
+    async def extract_audio_async(self, output_name: Optional[str] = None) -> Path:
+        """See VideoProcessor.extract_audio"""
+        return await self._drive_async(self._extract_audio_steps(output_name))
+
+    async def create_clips_async(self, timestamps: List[tuple], output_prefix: str = "clip",
+                                 single_pass: bool = False) -> List[Path]:
+        """See VideoProcessor.create_clips"""
+        return await self._drive_async(self._create_clips_steps(timestamps, output_prefix,
+                                                                single_pass))
+
+    async def create_clips_single_pass_async(self, timestamps: List[tuple],
+                                             output_prefix: str = "clip") -> List[Dict]:
+        """See VideoProcessor.create_clips_single_pass"""
+        return await self._drive_async(self._create_clips_single_pass_steps(timestamps,
+                                                                            output_prefix))
+
+    async def add_subtitles_async(self, subtitle_file: str,
+                                  output_name: Optional[str] = None) -> Path:
+        """See VideoProcessor.add_subtitles"""
+        return await self._drive_async(self._add_subtitles_steps(subtitle_file, output_name))
+
+    async def resize_video_async(self, width: int, height: int,
+                                 output_name: Optional[str] = None) -> Path:
+        """See VideoProcessor.resize_video"""
+        return await self._drive_async(self._resize_video_steps(width, height, output_name))
+
+    async def create_youtube_formats_async(self, formats: Optional[List[Dict]] = None,
+                                           crf: int = 23, preset: str = 'medium',
+                                           target_speed: Optional[float] = None,
+                                           deadline: Optional[float] = None) -> Dict[str, Path]:
+        """See VideoProcessor.create_youtube_formats"""
+        return await self._drive_async(self._create_youtube_formats_steps(
+            formats, crf, preset, target_speed, deadline))
+
+
+class AsyncThumbnailGenerator(ThumbnailGenerator):
+    """
+    ThumbnailGenerator with coroutines (name_async) for its video and file
+    operations; the blocking methods are inherited unchanged
+    ffmpeg runs on the event loop; scoring and PIL work run in threads.
+    The image helpers (apply_effects, add_title_overlay, ...) stay blocking.
+    """
+
+    async def extract_frame_from_video_async(self, video_file: str, timestamp: str = "00:00:05",
+                                             size: Optional[Tuple[int, int]] = None) -> Image.Image:
+        """See ThumbnailGenerator.extract_frame_from_video"""
+        size = size or (self.width, self.height)
+        output = await capture_output_async(self._frame_cmd(video_file, timestamp, size))
+        return self._frame_image(output, size, video_file, timestamp)
+
+    async def get_video_duration_async(self, video_file: str) -> float:
+        """See ThumbnailGenerator.get_video_duration"""
+        output = await capture_output_async(self._duration_cmd(video_file))
+        return self._parse_duration(output)
+
+    async def sample_frames_async(self, video_file: str, count: int = 12,
+                                  size: Tuple[int, int] = (320, 180),
+                                  max_fraction: float = 0.25) -> Tuple[List[float], np.ndarray]:
+        """See ThumbnailGenerator.sample_frames"""
+        duration = await self.get_video_duration_async(video_file)
+        cmd, interval = self._sample_cmd(video_file, duration, count, size)
+
+        timeout = max(10.0, duration * max_fraction)
+        try:
+            output, log = await capture_output_async(cmd, timeout, with_stderr=True)
+        except subprocess.TimeoutExpired as e:
+            print(f"Frame sampling hit its {timeout:.0f}s budget, using frames sampled so far")
+            output, log = e.stdout or b'', e.stderr or b''
+
+        return self._sampled_frames(output, log, interval, size, video_file)
+
+    async def select_best_frame_async(self, video_file: str, candidates: int = 12,
+                                      max_fraction: float = 0.25) -> float:
+        """See ThumbnailGenerator.select_best_frame"""
+        with span('sample_frames', 'ffmpeg'):
+            timestamps, frames = await self.sample_frames_async(video_file, candidates,
+                                                          max_fraction=max_fraction)
+        with span('score_frames', 'numpy', frames=len(frames)):
+            scores = (await asyncio.to_thread(self.score_frames, frames))['score']
+        return self._best_timestamp(timestamps, scores)
+
+    async def create_thumbnail_from_video_async(self, video_file: str, title: str,
+                                                timestamp: str = "00:00:05",
+                                                output_name: Optional[str] = None) -> Path:
+        """See ThumbnailGenerator.create_thumbnail_from_video"""
+        if timestamp == 'auto':
+            with span('select_best_frame', 'thumbnail'):
+                try:
+                    timestamp = f"{await self.select_best_frame_async(video_file):.3f}"
+                except ValueError as e:
+                    print(f"Warning: {e}; using the frame at {DEFAULT_TIMESTAMP}")
+                    timestamp = DEFAULT_TIMESTAMP
+
+        with span('extract_frame', 'ffmpeg', timestamp=timestamp):
+            image = await self.extract_frame_from_video_async(video_file, timestamp)
+
+        return await asyncio.to_thread(self._finish_thumbnail, image, title, video_file,
+                                       output_name)
+
+    async def create_thumbnail_from_image_async(self, image_file: str, title: str,
+                                                output_name: Optional[str] = None) -> Path:
+        """See ThumbnailGenerator.create_thumbnail_from_image"""
+        return await asyncio.to_thread(self.create_thumbnail_from_image, image_file,
+                                       title, output_name)
+
+
+async def process_many(videos: List[str], output_dir: str, thumbnail_dir: str,
+                       jobs: int = 4, crf: int = 23, preset: str = 'medium',
+                       thumbnails: bool = True) -> Dict[str, Dict[str, Any]]:
+    """
+    Compress every video (and make an auto-picked thumbnail) with at most
+    `jobs` encodes at a time. Returns {video: {'output', 'thumbnail', 'error'}}.
+    """
+    slots = asyncio.Semaphore(jobs)
+    generator = AsyncThumbnailGenerator(thumbnail_dir)
+
+    async def compress(video: str) -> Path:
+        processor = AsyncVideoProcessor(video, output_dir)
+        return await processor.compress_video_async(crf=crf, preset=preset)
+
+    async def one(video: str) -> Dict[str, Any]:
+        async with slots:
+            work = [compress(video)]
+            if thumbnails:
+                work.append(generator.create_thumbnail_from_video_async(video, Path(video).stem,
+                                                                        'auto'))
+            results = await asyncio.gather(*work, return_exceptions=True)
+
+        errors = [r for r in results if isinstance(r, BaseException)]
+        return {
+            'output': None if isinstance(results[0], BaseException) else results[0],
+            'thumbnail': results[1] if len(results) > 1 and not errors else None,
+            'error': f"{type(errors[0]).__name__}: {errors[0]}" if errors else None
+        }
+
+    results = await asyncio.gather(*(one(video) for video in videos))
+    return dict(zip(videos, results))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compress many videos (plus thumbnails) concurrently on one event loop')
+    parser.add_argument('videos', nargs='+', help='Input videos')
+    parser.add_argument('--jobs', type=int, default=4, help='Concurrent encodes (default: 4)')
+    parser.add_argument('--crf', type=int, default=23, help='CRF value (default: 23)')
+    parser.add_argument('--preset', default='medium', help='x264 preset or "auto" (default: medium)')
+    parser.add_argument('--output-dir', default='../processed-videos',
+                       help='Output directory (default: ../processed-videos)')
+    parser.add_argument('--thumbnail-dir', default='../thumbnails',
+                       help='Thumbnail directory (default: ../thumbnails)')
+    parser.add_argument('--no-thumbnails', action='store_true', help='Only compress')
+
+    args = parser.parse_args()
+    install_signal_handlers()
+
+    results = asyncio.run(process_many(args.videos, args.output_dir, args.thumbnail_dir,
+                                       args.jobs, args.crf, args.preset,
+                                       not args.no_thumbnails))
+
+    failed = 0
+    for video, result in results.items():
+        if result['error']:
+            failed += 1
+            print(f"✗ {video}: {result['error']}")
+        else:
+            print(f"✓ {video} -> {result['output']}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
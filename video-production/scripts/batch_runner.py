@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Parallel Batch Runner
+Processes every video in raw-footage/ through WorkflowManager using the
+`batch:` settings from config.yaml, with a bounded worker pool
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Optional, List, Dict
+
+# Subsystems are imported where first used; the project root is put on
+# sys.path by the cli.py entry point
+
+VIDEO_EXTENSIONS = ['.mp4', '.mov', '.avi', '.mkv']
+
+
+def title_from_filename(video_file: Path) -> str:
+    """Derive a readable title from a raw footage file name"""
+    return video_file.stem.replace('_', ' ').replace('-', ' ').strip().title()
+
+
+class BatchRunner:
+    """Run the complete workflow over a directory of raw footage"""
+
+    def __init__(self, config_file: str = "../config.yaml",
+                 raw_dir: str = "../raw-footage",
+                 output_dir: str = "../processed-videos",
+                 max_workers: Optional[int] = None,
+                 parallel: Optional[bool] = None):
+        self.config_file = config_file
+        self.raw_dir = Path(raw_dir)
+        self.output_dir = output_dir
+
+        from scripts.complete_workflow import WorkflowManager
+        from scripts.preflight import QualityRules
+
+        config = WorkflowManager.load_config(config_file)
+        self.batch_config = config.get('batch', {})
+        self.quality = QualityRules.from_config(config)
+        self.check_quality = (config.get('quality') or {}).get('enabled', False)
+        # Report of the last run's quality gate
+        self.preflight_report = None
+        if parallel is None:
+            parallel = self.batch_config.get('parallel_processing', False)
+        if max_workers is None:
+            max_workers = self.batch_config.get('max_workers', 2)
+
+        self.max_workers = max(1, max_workers) if parallel else 1
+
+        # Split the cores between workers so concurrent encodes don't
+        # oversubscribe the CPU; a single worker lets ffmpeg use them all
+        cpu_count = os.cpu_count() or 1
+        self.threads = max(1, cpu_count // self.max_workers) if self.max_workers > 1 else None
+
+    def find_videos(self) -> List[Path]:
+        """List raw footage files to process"""
+        if not self.raw_dir.is_dir():
+            raise FileNotFoundError(f"Raw footage directory not found: {self.raw_dir}")
+
+        return sorted(
+            path for path in self.raw_dir.iterdir()
+            if path.is_file() and path.suffix.lower() in VIDEO_EXTENSIONS
+        )
+
+    def process_one(self, video_file: Path) -> Dict:
+        """Process a single video, capturing any failure in the result"""
+        from scripts.complete_workflow import WorkflowManager
+        from scripts.tracing import span
+
+        result = {'file': str(video_file), 'status': 'ok', 'error': None}
+        start = time.perf_counter()
+
+        try:
+            with span('batch_file', 'workflow', input=str(video_file)):
+                # One manager per video: WorkflowManager keeps per-run state
+                workflow = WorkflowManager(self.config_file, threads=self.threads)
+                title = title_from_filename(video_file)
+
+                result['video'] = str(workflow.process_video(str(video_file), self.output_dir))
+
+                if self.batch_config.get('auto_thumbnail', True):
+                    timestamp = self.batch_config.get('thumbnail_timestamp', '00:00:05')
+                    result['thumbnail'] = str(workflow.create_thumbnail(str(video_file), title, timestamp))
+
+                if self.batch_config.get('auto_metadata', True):
+                    metadata = workflow.generate_metadata(title=title, description=title,
+                                                          video_file=str(video_file))
+                    result['metadata'] = metadata['title']
+        except Exception as e:
+            result['status'] = 'failed'
+            result['error'] = f"{type(e).__name__}: {e}"
+            traceback.print_exc()
+
+        result['elapsed'] = round(time.perf_counter() - start, 2)
+        return result
+
+    def run(self, videos: Optional[List[Path]] = None) -> List[Dict]:
+        """Process all videos and return one result per file"""
+        if videos is None:
+            videos = self.find_videos()
+
+        if not videos:
+            print(f"No video files found in {self.raw_dir}")
+            return []
+
+        # Reject bad inputs up front, from headers only, before any encode
+        order = {str(video): i for i, video in enumerate(videos)}
+        rejected = []
+        if self.check_quality:
+            from scripts.preflight import preflight, print_report as print_preflight
+            self.preflight_report = preflight([str(video) for video in videos], self.quality)
+            print_preflight(self.preflight_report)
+            failed = {r['file']: r for r in self.preflight_report['files'] if not r['ok']}
+            rejected = [{'file': str(video), 'status': 'failed', 'elapsed': 0,
+                         'error': f"pre-flight: {'; '.join(failed[str(video)]['errors'])}"}
+                        for video in videos if str(video) in failed]
+            videos = [video for video in videos if str(video) not in failed]
+
+        threads = self.threads or 'auto'
+        print(f"Processing {len(videos)} video(s) with {self.max_workers} worker(s), "
+              f"{threads} ffmpeg thread(s) each")
+
+        results = list(rejected)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self.process_one, video): video for video in videos}
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                mark = '✓' if result['status'] == 'ok' else '✗'
+                print(f"{mark} {Path(result['file']).name} ({result['elapsed']}s)")
+
+        # Keep the report in input order
+        results.sort(key=lambda r: order[r['file']])
+        self.print_report(results)
+        return results
+
+    @staticmethod
+    def print_report(results: List[Dict]):
+        """Print per-file success/failure summary"""
+        failed = [r for r in results if r['status'] != 'ok']
+
+        print(f"\n{'='*60}")
+        print(f"BATCH COMPLETE: {len(results) - len(failed)} succeeded, {len(failed)} failed")
+        print(f"{'='*60}")
+        for result in results:
+            name = Path(result['file']).name
+            if result['status'] == 'ok':
+                print(f"  ✓ {name}: {result.get('video')}")
+            else:
+                print(f"  ✗ {name}: {result['error']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Process every video in raw-footage/ with a bounded worker pool'
+    )
+    parser.add_argument('--raw-dir', default='../raw-footage',
+                       help='Directory of raw videos (default: ../raw-footage)')
+    parser.add_argument('--output-dir', default='../processed-videos',
+                       help='Output directory (default: ../processed-videos)')
+    parser.add_argument('--workers', type=int, default=None,
+                       help='Worker count (default: batch.max_workers)')
+    parser.add_argument('--parallel', action='store_true', default=None,
+                       help='Force parallel processing (default: batch.parallel_processing)')
+    parser.add_argument('--config', default='../config.yaml',
+                       help='Config file path (default: ../config.yaml)')
+    parser.add_argument('--trace', metavar='TRACE_JSON',
+                       help='Record per-stage timings to a Chrome trace file and print a summary')
+    parser.add_argument('--preflight-report', metavar='REPORT_JSON',
+                       help='Write the quality gate report (see preflight.py) as JSON')
+
+    args = parser.parse_args()
+
+    from scripts.tracing import span, enable_tracing
+    from scripts.ffmpeg_progress import install_signal_handlers
+
+    tracer = enable_tracing() if args.trace else None
+    install_signal_handlers()
+
+    runner = BatchRunner(
+        config_file=args.config,
+        raw_dir=args.raw_dir,
+        output_dir=args.output_dir,
+        max_workers=args.workers,
+        parallel=True if args.workers else args.parallel
+    )
+    with span('batch', 'workflow'):
+        results = runner.run()
+
+    if args.preflight_report and runner.preflight_report:
+        Path(args.preflight_report).write_text(json.dumps(runner.preflight_report, indent=2))
+        print(f"Pre-flight report written to {args.preflight_report}")
+
+    if tracer:
+        print(tracer.summary_table())
+        print(f"\nTrace written to {tracer.write_chrome_trace(args.trace)}")
+
+    if any(r['status'] != 'ok' for r in results):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    # Run directly: go through the entry point, which makes the project importable
+    from cli import main as cli_main
+    sys.exit(cli_main(['batch', *sys.argv[1:]]))
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Video Production Toolkit CLI
+Single entry point for the toolkit. Each subcommand imports its subsystem
+only when it runs, so metadata commands never load Pillow, numpy or the
+encoding pipeline:
+
+    python cli.py process video.mp4 "Title" "Description" --tags python
+    python cli.py thumbnail video.mp4 "Title" auto
+    python cli.py metadata "Title" "Description" python tutorial
+    python cli.py probe ../raw-footage --recursive
+    python cli.py preflight ../raw-footage --json report.json
+    python cli.py batch --parallel
+
+Arguments after the subcommand go to that tool unchanged
+(python cli.py <command> --help for its options).
+"""
+
+import sys
+import argparse
+import importlib
+from pathlib import Path
+
+# The one place the project root is put on sys.path: complete_workflow.py
+# and batch_runner.py delegate here when run directly
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Subcommand -> (module with a main(), summary)
+COMMANDS = {
+    'process': ('scripts.complete_workflow', 'Process a video, then create its thumbnail and metadata'),
+    'thumbnail': ('thumbnails.thumbnail_generator', 'Create a thumbnail from a video or image'),
+    'metadata': ('metadata.youtube_metadata', 'Generate YouTube metadata (one video or --batch)'),
+    'probe': ('scripts.probe_cache', 'Probe media files (cached ffprobe), output JSONL'),
+    'preflight': ('scripts.preflight', 'Check videos against the quality: rules'),
+    'batch': ('scripts.batch_runner', 'Run the full workflow over every video in a folder'),
+}
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(
+        description='Video production toolkit',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog='commands:\n' + '\n'.join(f"  {name:<12} {summary}"
+                                        for name, (_, summary) in COMMANDS.items())
+    )
+    parser.add_argument('command', choices=COMMANDS, metavar='command',
+                        help=f"One of: {', '.join(COMMANDS)}")
+    parser.add_argument('args', nargs=argparse.REMAINDER,
+                        help='Arguments for the command (see: cli.py <command> --help)')
+
+    args = parser.parse_args(argv)
+
+    module = importlib.import_module(COMMANDS[args.command][0])
+    # The tools parse sys.argv themselves
+    sys.argv = [f"{Path(sys.argv[0]).name} {args.command}", *args.args]
+    return module.main()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
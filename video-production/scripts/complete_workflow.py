@@ -4,39 +4,155 @@ Complete Video Production Workflow
 Automates the entire pipeline: processing, thumbnail, and metadata generation
 """
 
+import os
 import sys
+import time
 import argparse
 from pathlib import Path
-import yaml
+from typing import Optional, List, Dict, Callable, Any
 
-# Add parent directory to path to import our modules
-sys.path.insert(0, str(Path(__file__).parent.parent))
-
-from scripts.process_video import VideoProcessor
-from thumbnails.thumbnail_generator import ThumbnailGenerator
-from metadata.youtube_metadata import YouTubeMetadataGenerator
+# PyYAML and every other subsystem (cache, job store, task graph, ffmpeg,
+# Pillow, numpy) are imported where first used, so --help starts fast.
+# The project root is put on sys.path by the cli.py entry point.
 
 
 class WorkflowManager:
-    def __init__(self, config_file: str = "../config.yaml"):
-        self.config = self._load_config(config_file)
+    def __init__(self, config_file: str = "../config.yaml", threads: Optional[int] = None):
+        self.config = self.load_config(config_file)
+        # ffmpeg thread cap per encode (set by the batch runner)
+        self.threads = threads
+        self.cache = self._build_cache()
+        self.jobs = self._build_job_store()
         self.video_processor = None
-        self.thumbnail_gen = ThumbnailGenerator()
-        self.metadata_gen = YouTubeMetadataGenerator(
-            self.config['project']['name']
-        )
-
-    def _load_config(self, config_file: str) -> dict:
-        """Load configuration from YAML file"""
+        self._thumbnail_gen = None
+        self._metadata_gen = None
+        self._quality = None
+        # Inputs that already passed the quality gate
+        self._preflighted = set()
+
+    @property
+    def quality(self):
+        """QualityRules from the `quality:` block, created on first use"""
+        if self._quality is None:
+            from scripts.preflight import QualityRules
+            self._quality = QualityRules.from_config(self.config)
+        return self._quality
+
+    @property
+    def thumbnail_gen(self):
+        """ThumbnailGenerator, created on first use"""
+        if self._thumbnail_gen is None:
+            from thumbnails.thumbnail_generator import ThumbnailGenerator
+            self._thumbnail_gen = ThumbnailGenerator(
+                title_style=self.config.get('thumbnail', {}).get('title'),
+                effects=self.config.get('thumbnail', {}).get('effects')
+            )
+        return self._thumbnail_gen
+
+    @property
+    def metadata_gen(self):
+        """YouTubeMetadataGenerator, created on first use"""
+        if self._metadata_gen is None:
+            from metadata.youtube_metadata import YouTubeMetadataGenerator
+            self._metadata_gen = YouTubeMetadataGenerator(
+                self.config['project']['name']
+            )
+        return self._metadata_gen
+
+    @staticmethod
+    def load_config(config_file: str = "../config.yaml") -> dict:
+        """
+        Load configuration from YAML file, without building a manager (no
+        render cache or job store is opened)
+        """
         config_path = Path(__file__).parent / config_file
         if config_path.exists():
+            import yaml
             with open(config_path, 'r') as f:
                 return yaml.safe_load(f)
         else:
             print(f"Warning: Config file not found at {config_path}")
-            return self._default_config()
+            return WorkflowManager._default_config()
+
+    def _build_cache(self):
+        """Create the render cache from the `cache:` config block, if enabled"""
+        cache_config = self.config.get('cache', {})
+        if not cache_config.get('enabled', False):
+            return None
+
+        from scripts.render_cache import RenderCache
+
+        cache_dir = Path(cache_config.get('dir', '../.cache')) / 'renders'
+        max_size_mb = cache_config.get('max_size_gb', 50) * 1024
+        return RenderCache(str(cache_dir), max_size_mb)
 
-    def _default_config(self) -> dict:
+    def _build_job_store(self):
+        """Create the stage-resume job store from the `jobs:` config block, if enabled"""
+        jobs_config = self.config.get('jobs', {})
+        if not jobs_config.get('enabled', False):
+            return None
+
+        from scripts.job_store import JobStore
+        return JobStore(jobs_config.get('db', '../.cache/jobs.db'))
+
+    def _stage(self, stage: str, video_file: Optional[str], params: Dict,
+               func: Callable[[], Any], inputs: Optional[List[str]] = None,
+               outputs: Optional[Callable[[Any], list]] = None) -> Any:
+        """
+        Run a workflow step through the job store, so a rerun skips it when
+        it already completed with the same parameters, its auxiliary input
+        files (watermark, intro/outro, ...) are unchanged and its outputs
+        are intact
+        """
+        if not self.jobs or not video_file:
+            return func()
+        job_id = self.jobs.job_for(video_file)
+        if inputs:
+            # A file appearing or disappearing changes what the stage does too
+            params = dict(params, inputs=[f for f in inputs if Path(f).exists()])
+        return self.jobs.run_stage(job_id, stage, params, func, inputs=inputs, outputs=outputs)
+
+    def _video_inputs(self) -> List[str]:
+        """Files besides the input video that processing reads, from the `video:` block"""
+        video_config = self.config['video']
+        watermark = video_config.get('watermark') or {}
+        return [f for f in (
+            video_config.get('intro_file'),
+            video_config.get('outro_file'),
+            watermark.get('file') if watermark.get('enabled', False) else None,
+            (video_config.get('subtitles') or {}).get('file')
+        ) if f]
+
+    def preflight(self, video_file: str) -> Optional[Dict]:
+        """
+        Check an input against the `quality:` rules before spending CPU on
+        it; raises PreflightError when it fails
+        """
+        if not (self.config.get('quality') or {}).get('enabled', False):
+            return None
+        key = str(Path(video_file).absolute())
+        if key in self._preflighted:
+            return None
+
+        from scripts.tracing import span
+        from scripts.preflight import require
+        with span('preflight', 'stage', input=str(video_file)):
+            result = require(video_file, self.quality)
+        self._preflighted.add(key)
+        print(f"✓ Pre-flight passed: {result['width']}x{result['height']}, "
+              f"{result['duration']}s, {result['size_mb']}MB ({result['elapsed_ms']:.0f}ms)")
+        return result
+
+    def _workflow_graph(self):
+        """Task graph sized by the `workflow:` config block"""
+        from scripts.dag import TaskGraph
+        workflow_config = self.config.get('workflow', {})
+        cpu_budget = workflow_config.get('cpu_budget') or os.cpu_count() or 1
+        max_workers = None if workflow_config.get('parallel', True) else 1
+        return TaskGraph(budget={'cpu': max(2, cpu_budget)}, max_workers=max_workers)
+
+    @staticmethod
+    def _default_config() -> dict:
         """Return default configuration"""
         return {
             'project': {'name': 'Tutorial Series'},
@@ -50,48 +166,179 @@ class WorkflowManager:
             }
         }
 
-    def process_video(self, input_file: str, output_dir: str = "../processed-videos") -> Path:
-        """Process video with compression and optimization"""
+    def process_video(self, input_file: str, output_dir: str = "../processed-videos",
+                      fused: Optional[bool] = None, dry_run: bool = False,
+                      streaming: Optional[bool] = None) -> Path:
+        """
+        Process video with compression and optimization
+        fused: run every step as one filter graph and a single encode
+               (defaults to video.fused in config.yaml)
+        dry_run: print the fused ffmpeg graph without encoding
+        streaming: run the separate steps piped together, without
+                   intermediate files (defaults to video.streaming)
+        """
         print(f"\n{'='*60}")
         print(f"STEP 1/3: Processing Video")
         print(f"{'='*60}\n")
 
-        self.video_processor = VideoProcessor(input_file, output_dir)
+        self.preflight(input_file)
+
+        if fused is None:
+            fused = self.config['video'].get('fused', False)
+        if streaming is None:
+            streaming = self.config['video'].get('streaming', False)
+        mode = 'fused' if fused else 'streaming' if streaming else 'stepwise'
+
+        from scripts.tracing import span
+
+        def render() -> Dict[str, Path]:
+            start = time.perf_counter()
+            with span('process_video', 'stage', input=str(input_file), mode=mode):
+                if fused or dry_run:
+                    from scripts.filter_graph import FilterGraphPlanner
+                    planner = FilterGraphPlanner.from_config(input_file, self.config['video'], output_dir,
+                                                           threads=self.threads, cache=self.cache)
+                    formats = planner.run(dry_run=dry_run)
+                else:
+                    formats = self._process_video_stepwise(input_file, output_dir, streaming)
+            elapsed = time.perf_counter() - start
+
+            if dry_run:
+                print(f"\n✓ Dry run complete (nothing encoded)")
+            else:
+                print(f"\n✓ Video processing complete in {elapsed:.1f}s ({mode})")
+            return formats
+
+        if dry_run:
+            formats = render()
+        else:
+            params = {
+                'output_dir': str(Path(output_dir).absolute()),
+                'fused': bool(fused),
+                'streaming': bool(streaming),
+                'video': self.config['video']
+            }
+            formats = self._stage('process_video', input_file, params, render,
+                                  inputs=self._video_inputs())
+
+        for name, path in formats.items():
+            print(f"  {name}: {path}")
+
+        # Upload the 1080p rendition, or the first configured one
+        return formats.get('1080p', next(iter(formats.values())))
+
+    def _process_video_stepwise(self, input_file: str, output_dir: str,
+                                streaming: bool = False) -> Dict[str, Path]:
+        """
+        Compress, burn in subtitles, add intro/outro, watermark and resize
+        as separate encodes, in the same order as the fused graph, through
+        files or (streaming, when there are no subtitles or intro/outro)
+        through pipes
+        """
+        from scripts.process_video import VideoProcessor
 
-        # Compress video
-        print("Compressing video...")
         crf = self.config['video']['compression']['crf']
         preset = self.config['video']['compression']['preset']
+        auto_tune = self.config['video']['compression'].get('auto_tune') or {}
+        deadline = auto_tune.get('deadline_minutes')
+
+        chunked = self.config['video']['compression'].get('chunked') or {}
+
+        watermark_config = self.config['video']['watermark']
+        watermark_file = watermark_config.get('file') if watermark_config.get('enabled', False) else None
+        if watermark_file and not Path(watermark_file).exists():
+            watermark_file = None
+        position = watermark_config.get('position', 'bottom-right')
+
+        def existing(path: Optional[str]) -> Optional[str]:
+            return path if path and Path(path).exists() else None
+
+        video_config = self.config['video']
+        subtitle_file = existing((video_config.get('subtitles') or {}).get('file'))
+        intro_file = existing(video_config.get('intro_file'))
+        outro_file = existing(video_config.get('outro_file'))
+
+        if streaming and chunked.get('enabled', False):
+            print("Chunked compression splits a file on disk; running stepwise instead of streaming")
+            streaming = False
+        if streaming and (subtitle_file or intro_file or outro_file):
+            print("Streaming covers compress, watermark and formats only; "
+                  "running stepwise for subtitles and intro/outro")
+            streaming = False
+
+        if streaming:
+            from scripts.streaming import StreamingPipeline
+            pipeline = StreamingPipeline(input_file, output_dir, self.threads)
+            return pipeline.run(
+                crf=crf,
+                preset=preset,
+                watermark=watermark_file,
+                position=position,
+                formats=self.config['video'].get('formats'),
+                target_speed=auto_tune.get('target_realtime'),
+                deadline=deadline * 60 if deadline else None
+            )
+
+        self.video_processor = VideoProcessor(input_file, output_dir, self.threads, self.cache)
 
-        compressed = self.video_processor.compress_video(
-            crf=crf,
-            preset=preset,
-            output_name=f"{Path(input_file).stem}_compressed.mp4"
-        )
+        # Compress video
+        print("Compressing video...")
+        if chunked.get('enabled', False):
+            compressed = self.video_processor.compress_video_chunked(
+                crf=crf,
+                preset=preset,
+                output_name=f"{Path(input_file).stem}_compressed.mp4",
+                chunks=chunked.get('chunks'),
+                workers=chunked.get('workers'),
+                target_speed=auto_tune.get('target_realtime'),
+                deadline=deadline * 60 if deadline else None
+            )
+        else:
+            compressed = self.video_processor.compress_video(
+                crf=crf,
+                preset=preset,
+                output_name=f"{Path(input_file).stem}_compressed.mp4",
+                target_speed=auto_tune.get('target_realtime'),
+                deadline=deadline * 60 if deadline else None
+            )
+
+        # Subtitles are timed against the main recording, so burn them in
+        # before the intro is prepended
+        if subtitle_file:
+            processor = VideoProcessor(compressed, output_dir, self.threads, self.cache)
+            compressed = processor.add_subtitles(
+                subtitle_file,
+                output_name=f"{Path(input_file).stem}_subtitled.mp4"
+            )
+
+        if intro_file or outro_file:
+            processor = VideoProcessor(compressed, output_dir, self.threads, self.cache)
+            compressed = processor.add_intro_outro(
+                intro_file,
+                outro_file,
+                output_name=f"{Path(input_file).stem}_intro_outro.mp4"
+            )
 
         # Add watermark if enabled
-        if self.config['video']['watermark'].get('enabled', False):
-            watermark_file = self.config['video']['watermark'].get('file')
-            if watermark_file and Path(watermark_file).exists():
-                print("Adding watermark...")
-                processor = VideoProcessor(compressed, output_dir)
-                position = self.config['video']['watermark'].get('position', 'bottom-right')
-                compressed = processor.add_watermark(
-                    watermark_file,
-                    position=position,
-                    output_name=f"{Path(input_file).stem}_final.mp4"
-                )
+        if watermark_file:
+            print("Adding watermark...")
+            processor = VideoProcessor(compressed, output_dir, self.threads, self.cache)
+            compressed = processor.add_watermark(
+                watermark_file,
+                position=position,
+                output_name=f"{Path(input_file).stem}_final.mp4"
+            )
 
         # Create YouTube formats
         print("Creating YouTube-optimized formats...")
-        processor = VideoProcessor(compressed, output_dir)
-        formats = processor.create_youtube_formats()
-
-        print(f"\n✓ Video processing complete!")
-        print(f"  1080p: {formats['1080p']}")
-        print(f"  720p: {formats['720p']}")
-
-        return formats['1080p']
+        processor = VideoProcessor(compressed, output_dir, self.threads, self.cache)
+        return processor.create_youtube_formats(
+            self.config['video'].get('formats'),
+            crf=crf,
+            preset=preset,
+            target_speed=auto_tune.get('target_realtime'),
+            deadline=deadline * 60 if deadline else None
+        )
 
     def create_thumbnail(self, video_file: str, title: str,
                         timestamp: str = "00:00:05") -> Path:
@@ -100,11 +347,25 @@ class WorkflowManager:
         print(f"STEP 2/3: Creating Thumbnail")
         print(f"{'='*60}\n")
 
-        thumbnail = self.thumbnail_gen.create_thumbnail_from_video(
-            video_file=video_file,
-            title=title,
-            timestamp=timestamp
-        )
+        from scripts.tracing import span
+
+        def render() -> Path:
+            with span('create_thumbnail', 'stage', input=str(video_file)):
+                return self.thumbnail_gen.create_thumbnail_from_video(
+                    video_file=video_file,
+                    title=title,
+                    timestamp=timestamp
+                )
+
+        params = {
+            'title': title,
+            'timestamp': timestamp,
+            'output_dir': str(self.thumbnail_gen.output_dir.absolute()),
+            'thumbnail': self.config.get('thumbnail', {})
+        }
+        font_file = (self.config.get('thumbnail', {}).get('title') or {}).get('font_file')
+        thumbnail = self._stage('create_thumbnail', video_file, params, render,
+                                inputs=[font_file] if font_file else None)
 
         print(f"\n✓ Thumbnail created: {thumbnail}")
         return thumbnail
@@ -112,12 +373,15 @@ class WorkflowManager:
     def generate_metadata(self, title: str, description: str,
                          tags: list = None,
                          timestamps: list = None,
-                         links: list = None) -> dict:
-        """Generate YouTube metadata"""
+                         links: list = None,
+                         video_file: Optional[str] = None) -> dict:
+        """Generate YouTube metadata (recorded in video_file's job, when given)"""
         print(f"\n{'='*60}")
         print(f"STEP 3/3: Generating Metadata")
         print(f"{'='*60}\n")
 
+        from scripts.tracing import span
+
         # Merge tags with defaults
         if tags is None:
             tags = []
@@ -130,14 +394,31 @@ class WorkflowManager:
         standard_links = self.config['youtube'].get('standard_links', [])
         all_links = standard_links + links
 
-        metadata = self.metadata_gen.generate_metadata(
-            title=title,
-            description=description,
-            tags=all_tags,
-            category=self.config['youtube']['defaults']['category'],
-            timestamps=timestamps,
-            links=all_links
-        )
+        def generate() -> dict:
+            with span('generate_metadata', 'stage'):
+                return self.metadata_gen.generate_metadata(
+                    title=title,
+                    description=description,
+                    tags=sorted(all_tags),
+                    category=self.config['youtube']['defaults']['category'],
+                    timestamps=timestamps,
+                    links=all_links
+                )
+
+        # Recorded in video_file's job, next to its processing and thumbnail
+        params = {
+            'title': title,
+            'description': description,
+            'tags': sorted(all_tags),
+            'timestamps': timestamps,
+            'links': all_links,
+            'category': self.config['youtube']['defaults']['category']
+        }
+        # Named here rather than read back from the generator, which other
+        # threads may be using
+        output_files = self.metadata_gen.output_paths(title)
+        metadata = self._stage('generate_metadata', video_file, params, generate,
+                               outputs=lambda _: output_files)
 
         print(f"\n✓ Metadata generated!")
         print(f"  Title: {metadata['title']}")
@@ -150,7 +431,9 @@ class WorkflowManager:
                          tags: list = None,
                          timestamps: list = None,
                          links: list = None,
-                         thumbnail_timestamp: str = "00:00:05") -> dict:
+                         thumbnail_timestamp: str = "00:00:05",
+                         fused: Optional[bool] = None,
+                         streaming: Optional[bool] = None) -> dict:
         """Run complete workflow: video processing, thumbnail, and metadata"""
         print(f"\n{'#'*60}")
         print(f"# Complete Video Production Workflow")
@@ -158,20 +441,38 @@ class WorkflowManager:
         print(f"# Title: {title}")
         print(f"{'#'*60}")
 
-        # Step 1: Process video
-        processed_video = self.process_video(video_file)
-
-        # Step 2: Create thumbnail
-        thumbnail = self.create_thumbnail(video_file, title, thumbnail_timestamp)
-
-        # Step 3: Generate metadata
-        metadata = self.generate_metadata(
+        # Reject a bad input before the thumbnail and metadata start too
+        self.preflight(video_file)
+
+        # The thumbnail reads the raw video and the metadata needs neither,
+        # so both run alongside the encode. Each stage gets the video
+        # explicitly, and the generators are created here rather than
+        # lazily on the stages' threads
+        self.thumbnail_gen
+        self.metadata_gen
+        graph = self._workflow_graph()
+        graph.add('process_video', lambda: self.process_video(video_file, fused=fused,
+                                                                  streaming=streaming),
+                  cost={'cpu': self.threads or graph.budget['cpu'] - 1})
+        graph.add('create_thumbnail',
+                  lambda: self.create_thumbnail(video_file, title, thumbnail_timestamp),
+                  cost={'cpu': 1})
+        graph.add('generate_metadata', lambda: self.generate_metadata(
             title=title,
             description=description,
             tags=tags,
             timestamps=timestamps,
-            links=links
-        )
+            links=links,
+            video_file=video_file
+        ))
+        try:
+            results = graph.run()
+        finally:
+            print(f"\n{graph.report()}")
+
+        processed_video = results['process_video']
+        thumbnail = results['create_thumbnail']
+        metadata = results['generate_metadata']
 
         # Summary
         print(f"\n{'='*60}")
@@ -204,6 +505,13 @@ Examples:
   # With thumbnail timestamp
   python complete_workflow.py video.mp4 "My Tutorial" "Description" --thumbnail-time 00:00:10
 
+  # Single fused encode, or just print the planned ffmpeg graph
+  python complete_workflow.py video.mp4 "My Tutorial" "Description" --fused
+  python complete_workflow.py video.mp4 "My Tutorial" "Description" --dry-run
+
+  # Separate encodes piped together, no intermediate files
+  python complete_workflow.py video.mp4 "My Tutorial" "Description" --streaming
+
   # With timestamps for chapters
   python complete_workflow.py video.mp4 "Tutorial" "Description" \\
     --timestamps "0:00,Introduction" "2:30,Setup" "5:00,Coding"
@@ -221,10 +529,21 @@ Examples:
                        help='Links in format "label,url"',
                        default=[])
     parser.add_argument('--thumbnail-time', default='00:00:05',
-                       help='Timestamp for thumbnail extraction (default: 00:00:05)')
+                       help='Timestamp for thumbnail extraction, or "auto" to pick '
+                            'the best frame (default: 00:00:05)')
     parser.add_argument('--config', default='../config.yaml',
                        help='Config file path (default: ../config.yaml)')
 
+    parser.add_argument('--fused', action='store_true', default=None,
+                       help='Run all processing steps as a single fused encode')
+    parser.add_argument('--streaming', action='store_true', default=None,
+                       help='Pipe the processing steps together instead of writing '
+                            'intermediate files')
+    parser.add_argument('--dry-run', action='store_true',
+                       help='Print the fused ffmpeg graph and exit without encoding')
+    parser.add_argument('--trace', metavar='TRACE_JSON',
+                       help='Record per-stage timings to a Chrome trace file and print a summary')
+
     args = parser.parse_args()
 
     # Parse timestamps
@@ -241,18 +560,44 @@ Examples:
             label, url = link.split(',', 1)
             links.append({'label': label.strip(), 'url': url.strip()})
 
+    from scripts.tracing import span, enable_tracing
+    from scripts.preflight import PreflightError
+    from scripts.ffmpeg_progress import install_signal_handlers
+
+    tracer = enable_tracing() if args.trace else None
+    install_signal_handlers()
+
     # Run workflow
     workflow = WorkflowManager(args.config)
-    workflow.complete_workflow(
-        video_file=args.video_file,
-        title=args.title,
-        description=args.description,
-        tags=args.tags,
-        timestamps=timestamps if timestamps else None,
-        links=links if links else None,
-        thumbnail_timestamp=args.thumbnail_time
-    )
+
+    try:
+        if args.dry_run:
+            workflow.process_video(args.video_file, dry_run=True)
+            return
+
+        with span('complete_workflow', 'workflow', input=args.video_file):
+            workflow.complete_workflow(
+                video_file=args.video_file,
+                title=args.title,
+                description=args.description,
+                tags=args.tags,
+                timestamps=timestamps if timestamps else None,
+                links=links if links else None,
+                thumbnail_timestamp=args.thumbnail_time,
+                fused=args.fused,
+                streaming=args.streaming
+            )
+    except PreflightError as e:
+        print(f"\n✗ {e}")
+        sys.exit(1)
+    finally:
+        if tracer:
+            print(tracer.summary_table())
+            print(f"\nTrace written to {tracer.write_chrome_trace(args.trace)} "
+                  f"(open in chrome://tracing or ui.perfetto.dev)")
 
 
 if __name__ == '__main__':
-    main()
+    # Run directly: go through the entry point, which makes the project importable
+    from cli import main as cli_main
+    sys.exit(cli_main(['process', *sys.argv[1:]]))
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Task Graph Executor
+Runs a dependency graph of workflow tasks, starting every task whose
+dependencies are done as soon as its resource cost fits the budget, and
+reports the critical path once the graph finishes
+"""
+
+import time
+import contextvars
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from typing import Optional, List, Dict, Callable, Any
+
+
+@dataclass
+class Task:
+    """One node of the graph and, once run, its timings (seconds since the run started)"""
+    name: str
+    func: Callable[[], Any]
+    deps: List[str] = field(default_factory=list)
+    cost: Dict[str, float] = field(default_factory=dict)
+    status: str = 'pending'          # pending, running, done, failed, skipped
+    ready: Optional[float] = None    # dependencies finished
+    start: Optional[float] = None
+    end: Optional[float] = None
+    error: Optional[BaseException] = None
+
+    @property
+    def wall_time(self) -> float:
+        return (self.end - self.start) if self.start is not None and self.end is not None else 0.0
+
+    @property
+    def waited(self) -> float:
+        """Time spent ready but held back by the resource budget or a busy pool"""
+        return (self.start - self.ready) if self.start is not None and self.ready is not None else 0.0
+
+
+class TaskGraph:
+    """
+    Dependency graph of tasks run on a thread pool under a resource budget
+        graph = TaskGraph(budget={'cpu': 8})
+        graph.add('encode', encode, cost={'cpu': 7})
+        graph.add('thumbnail', thumbnail, cost={'cpu': 1})
+        graph.add('upload', upload, deps=['encode', 'thumbnail'])
+        results = graph.run()
+        print(graph.report())
+    A task whose cost exceeds the budget runs alone. When a task fails its
+    dependents are skipped, running tasks finish, and the first error is
+    raised.
+    """
+
+    def __init__(self, budget: Optional[Dict[str, float]] = None,
+                 max_workers: Optional[int] = None):
+        self.budget = budget or {}
+        self.max_workers = max_workers
+        self.tasks: Dict[str, Task] = {}
+        self.results: Dict[str, Any] = {}
+        self.elapsed = 0.0
+
+    def add(self, name: str, func: Callable[[], Any], deps: Optional[List[str]] = None,
+            cost: Optional[Dict[str, float]] = None) -> str:
+        """
+        Add a task; its dependencies must already be in the graph (so the
+        graph can't have cycles). func takes no arguments; dependency
+        results are in graph.results.
+        """
+        if name in self.tasks:
+            raise ValueError(f"Duplicate task: {name}")
+        missing = [dep for dep in deps or [] if dep not in self.tasks]
+        if missing:
+            raise ValueError(f"Task {name} depends on unknown task(s): {', '.join(missing)}")
+
+        self.tasks[name] = Task(name, func, list(deps or []), dict(cost or {}))
+        return name
+
+    def _cost(self, task: Task) -> Dict[str, float]:
+        """Task cost clamped to the budget, so oversized tasks can still run alone"""
+        return {resource: min(amount, self.budget[resource]) if resource in self.budget else 0
+                for resource, amount in task.cost.items()}
+
+    def _fits(self, cost: Dict[str, float], in_use: Dict[str, float]) -> bool:
+        return all(in_use[resource] + amount <= self.budget[resource]
+                   for resource, amount in cost.items() if resource in self.budget)
+
+    @staticmethod
+    def _timed(task: Task, now: Callable[[], float]) -> Any:
+        """Run task.func on its worker thread, so time queued for a free worker
+        counts as waiting rather than wall time"""
+        task.start = now()
+        try:
+            return task.func()
+        finally:
+            task.end = now()
+
+    def run(self) -> Dict[str, Any]:
+        """Run every task and return {name: result}"""
+        origin = time.perf_counter()
+        now = lambda: time.perf_counter() - origin
+        in_use = defaultdict(float)
+        running = {}
+        errors = []
+
+        with ThreadPoolExecutor(max_workers=self.max_workers or len(self.tasks) or 1) as executor:
+            try:
+                while True:
+                    for task in self.tasks.values():
+                        if task.status != 'pending':
+                            continue
+                        statuses = [self.tasks[dep].status for dep in task.deps]
+                        if any(status in ('failed', 'skipped') for status in statuses):
+                            task.status = 'skipped'
+                            continue
+                        if any(status != 'done' for status in statuses):
+                            continue
+
+                        if task.ready is None:
+                            task.ready = now()
+                        cost = self._cost(task)
+                        if not self._fits(cost, in_use):
+                            continue
+
+                        for resource, amount in cost.items():
+                            in_use[resource] += amount
+                        task.status = 'running'
+                        # Copy the context so tracing spans nest under the caller's
+                        future = executor.submit(contextvars.copy_context().run,
+                                                 self._timed, task, now)
+                        running[future] = task
+
+                    if not running:
+                        break
+
+                    finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        task = running.pop(future)
+                        for resource, amount in self._cost(task).items():
+                            in_use[resource] -= amount
+                        try:
+                            self.results[task.name] = future.result()
+                            task.status = 'done'
+                        except Exception as e:
+                            task.status = 'failed'
+                            task.error = e
+                            errors.append(e)
+                            print(f"Task {task.name} failed: {e}")
+            except BaseException:
+                # Interrupted: start nothing new, let running tasks wind down
+                executor.shutdown(wait=True, cancel_futures=True)
+                raise
+            finally:
+                self.elapsed = now()
+
+        if errors:
+            raise errors[0]
+        return self.results
+
+    def critical_path(self) -> List[Task]:
+        """
+        Chain of tasks that determined the end-to-end time: from the last
+        task to finish, repeatedly step to the dependency that finished last
+        """
+        finished = [task for task in self.tasks.values() if task.end is not None]
+        if not finished:
+            return []
+
+        path = [max(finished, key=lambda task: task.end)]
+        while path[-1].deps:
+            path.append(max((self.tasks[dep] for dep in path[-1].deps), key=lambda task: task.end))
+        return list(reversed(path))
+
+    def report(self) -> str:
+        """Per-task timings plus the critical path and the gain over running serially"""
+        critical = {task.name for task in self.critical_path()}
+        lines = [f"{'Task':<24} {'Status':<8} {'Start':>8} {'Wall':>8} {'Waited':>8}"]
+        for task in sorted(self.tasks.values(), key=lambda t: (t.start is None, t.start or 0)):
+            start = f"{task.start:.2f}s" if task.start is not None else '-'
+            marker = '  *' if task.name in critical else ''
+            lines.append(f"{task.name:<24} {task.status:<8} {start:>8} {task.wall_time:>7.2f}s "
+                         f"{task.waited:>7.2f}s{marker}")
+
+        path = self.critical_path()
+        serial = sum(task.wall_time for task in self.tasks.values())
+        lines.append(f"Critical path (*): {' -> '.join(task.name for task in path)} "
+                     f"({sum(task.wall_time + task.waited for task in path):.2f}s)")
+        if self.elapsed:
+            lines.append(f"End to end {self.elapsed:.2f}s vs {serial:.2f}s run serially "
+                         f"({serial / self.elapsed:.2f}x)")
+        return '\n'.join(lines)
@@ -0,0 +1,506 @@
+#!/usr/bin/env python3
+"""
+Multi-Node Encode Queue
+A filesystem spool on shared storage (NFS, SMB or a local directory) that
+lets a coordinator publish encode jobs - whole videos or chunks of one -
+to worker processes on any number of machines.
+
+Spool layout:
+    pending/<id>.json   waiting for a worker
+    leased/<id>.json    being worked on; its mtime is the lease heartbeat
+    done/<id>.json      finished, with the worker's result attached
+    failed/<id>.json    failed, or its lease expired too many times
+
+Every state change is committed by a rename, which is atomic on one
+filesystem, so exactly one worker wins each job. Lease expiry compares mtimes with the
+local clock, so keep the nodes' clocks in sync (NTP).
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import socket
+import argparse
+import threading
+import subprocess
+import traceback
+from pathlib import Path
+from typing import Optional, List, Dict, Tuple, Callable
+
+# Add parent directory to path to import our modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.process_video import VideoProcessor
+from scripts.encoder_tuning import EncoderTuner
+from scripts.ffmpeg_progress import install_signal_handlers, run_ffmpeg, process_scope
+
+STATES = ['pending', 'leased', 'done', 'failed']
+
+
+class EncodeQueue:
+    """Job spool shared by the coordinator and every worker"""
+
+    def __init__(self, spool_dir: str = "../.cache/encode-queue",
+                 lease_seconds: float = 60.0, max_attempts: int = 3):
+        self.spool_dir = Path(spool_dir)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        for state in STATES:
+            (self.spool_dir / state).mkdir(parents=True, exist_ok=True)
+
+    def _path(self, state: str, job_id: str) -> Path:
+        return self.spool_dir / state / f'{job_id}.json'
+
+    def _write(self, path: Path, job: Dict):
+        """Write a job file atomically (temp file + rename)"""
+        temp = path.with_name(f'.{path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+        with open(temp, 'w') as f:
+            json.dump(job, f, indent=2)
+        os.replace(temp, path)
+
+    def _read(self, path: Path) -> Optional[Dict]:
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def submit(self, kind: str, payload: Dict) -> str:
+        """Publish a job; returns its id (ids sort in submission order)"""
+        job_id = f"{time.time_ns()}-{uuid.uuid4().hex[:8]}"
+        job = {
+            'id': job_id,
+            'kind': kind,
+            'payload': payload,
+            'attempts': 0,
+            'submitted': time.time()
+        }
+        self._write(self._path('pending', job_id), job)
+        return job_id
+
+    def lease(self, worker_id: str) -> Optional[Dict]:
+        """Claim the oldest pending job, or None when the queue is empty"""
+        for path in sorted((self.spool_dir / 'pending').glob('*.json')):
+            try:
+                # Refresh the mtime first so the lease doesn't look expired
+                # the instant it lands in leased/
+                os.utime(path)
+                os.rename(path, self.spool_dir / 'leased' / path.name)
+            except FileNotFoundError:
+                continue  # another worker won this one
+
+            leased = self.spool_dir / 'leased' / path.name
+            job = self._read(leased)
+            if job is None:
+                continue
+            job['attempts'] += 1
+            job['worker'] = worker_id
+            job['leased'] = time.time()
+            self._write(leased, job)
+            return job
+        return None
+
+    def _holds(self, path: Path, job: Dict) -> bool:
+        """Whether the lease record at path is still this attempt's (not a re-lease)"""
+        record = self._read(path)
+        return (record is not None and record.get('worker') == job.get('worker')
+                and record.get('attempts') == job.get('attempts'))
+
+    def heartbeat(self, job: Dict) -> bool:
+        """Extend a lease; False means it expired and the job was requeued"""
+        leased = self._path('leased', job['id'])
+        if not self._holds(leased, job):
+            return False
+        try:
+            os.utime(leased)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def complete(self, job: Dict, result: Dict,
+                 commit: Optional[Callable[[], None]] = None) -> bool:
+        """
+        Record a result; False if the lease was lost in the meantime
+        commit runs once the lease is claimed and before the job shows as
+        done (e.g. renaming outputs into place), so it never runs for a
+        worker whose lease was requeued
+        """
+        return self._finish(job, 'done', commit, result=result)
+
+    def fail(self, job: Dict, error: str) -> bool:
+        """Record a failure; retried while attempts remain"""
+        if job['attempts'] < self.max_attempts:
+            return self._finish(job, 'pending', last_error=error)
+        return self._finish(job, 'failed', error=error)
+
+    def _finish(self, job: Dict, state: str, commit: Optional[Callable[[], None]] = None,
+                **fields) -> bool:
+        # Claim the lease by renaming it out of the reaper's sight; that
+        # rename is the commit point, after which the record is ours to move
+        leased = self._path('leased', job['id'])
+        finishing = leased.with_suffix('.finishing')
+        if not self._holds(leased, job):
+            return False  # requeued, and maybe leased to another worker since
+        try:
+            os.rename(leased, finishing)
+        except FileNotFoundError:
+            return False
+        if not self._holds(finishing, job):
+            # Re-leased between the check and the rename: hand it back
+            os.rename(finishing, leased)
+            return False
+
+        if commit:
+            try:
+                commit()
+            except BaseException:
+                # Hand the lease back so the failure can be recorded
+                os.rename(finishing, leased)
+                raise
+
+        self._write(self._path(state, job['id']), dict(job, finished=time.time(), **fields))
+        finishing.unlink()
+        return True
+
+    def requeue_expired(self) -> int:
+        """Return leases without a recent heartbeat to pending; returns count moved"""
+        now = time.time()
+        moved = 0
+        for path in (self.spool_dir / 'leased').glob('*.json'):
+            try:
+                if now - path.stat().st_mtime <= self.lease_seconds:
+                    continue
+            except FileNotFoundError:
+                continue
+
+            job = self._read(path) or {}
+            state = 'pending' if job.get('attempts', 0) < self.max_attempts else 'failed'
+            try:
+                os.rename(path, self.spool_dir / state / path.name)
+            except FileNotFoundError:
+                continue
+            if state == 'failed':
+                job['error'] = f"lease expired {job.get('attempts', 0)} time(s)"
+                self._write(self._path(state, path.stem), job)
+            print(f"Lease on {path.stem} held by {job.get('worker')} expired, moved to {state}")
+            moved += 1
+        return moved
+
+    def status(self, job_id: str) -> Optional[str]:
+        """Current state of a job"""
+        for state in STATES:
+            if self._path(state, job_id).exists():
+                return state
+        return None
+
+    def result(self, job_id: str) -> Optional[Dict]:
+        """Finished job record (done or failed), with its 'state' added"""
+        for state in ('done', 'failed'):
+            job = self._read(self._path(state, job_id))
+            if job:
+                return dict(job, state=state)
+        return None
+
+    def wait(self, job_ids: List[str], timeout: Optional[float] = None,
+             poll_interval: float = 1.0) -> Dict[str, Dict]:
+        """
+        Block until every job is done or failed, reaping expired leases meanwhile
+        Returns {job_id: job record}
+        """
+        deadline = time.time() + timeout if timeout else None
+        remaining = set(job_ids)
+        results = {}
+        while remaining:
+            self.requeue_expired()
+            for job_id in list(remaining):
+                job = self.result(job_id)
+                if job:
+                    results[job_id] = job
+                    remaining.discard(job_id)
+            if remaining:
+                if deadline and time.time() > deadline:
+                    raise TimeoutError(f"{len(remaining)} job(s) still unfinished")
+                time.sleep(poll_interval)
+        return results
+
+    def counts(self) -> Dict[str, int]:
+        return {state: len(list((self.spool_dir / state).glob('*.json'))) for state in STATES}
+
+
+class EncodeWorker:
+    """Leases jobs from the spool and runs them, heartbeating while busy"""
+
+    def __init__(self, queue: EncodeQueue, worker_id: Optional[str] = None,
+                 config_file: str = "../config.yaml", threads: Optional[int] = None,
+                 poll_interval: float = 2.0):
+        self.queue = queue
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.config_file = config_file
+        self.threads = threads
+        self.poll_interval = poll_interval
+
+    def run(self, max_jobs: Optional[int] = None, exit_when_idle: bool = False) -> int:
+        """Process jobs until max_jobs, or until the queue is empty with exit_when_idle"""
+        processed = 0
+        print(f"Worker {self.worker_id} polling {self.queue.spool_dir}")
+        while max_jobs is None or processed < max_jobs:
+            self.queue.requeue_expired()
+            job = self.queue.lease(self.worker_id)
+            if job is None:
+                if exit_when_idle:
+                    break
+                time.sleep(self.poll_interval)
+                continue
+
+            self.process(job)
+            processed += 1
+        return processed
+
+    def process(self, job: Dict):
+        """Run one leased job with a background heartbeat"""
+        print(f"[{self.worker_id}] {job['kind']} job {job['id']} (attempt {job['attempts']})")
+        stop = threading.Event()
+        scope = None
+
+        def heartbeat():
+            while not stop.wait(self.queue.lease_seconds / 3):
+                if not self.queue.heartbeat(job):
+                    # The job is someone else's now: stop its ffmpeg
+                    # processes, and only its own
+                    print(f"[{self.worker_id}] lost lease on {job['id']}, stopping it")
+                    scope.cancel()
+                    return
+
+        start = time.perf_counter()
+        try:
+            with process_scope() as scope:
+                beat = threading.Thread(target=heartbeat, daemon=True)
+                beat.start()
+                try:
+                    result = self.execute(job)
+                finally:
+                    # complete()/fail() check the lease themselves
+                    stop.set()
+                    beat.join()
+            result.update(worker=self.worker_id, elapsed=round(time.perf_counter() - start, 2))
+            recorded = self.queue.complete(job, result, lambda: self.commit(job))
+        except Exception as e:
+            traceback.print_exc()
+            recorded = self.queue.fail(job, f"{type(e).__name__}: {e}")
+        finally:
+            for partial, _ in self._attempt_renames(job):
+                Path(partial).unlink(missing_ok=True)
+
+        if not recorded:
+            print(f"[{self.worker_id}] lease on {job['id']} expired before it finished; "
+                  f"result discarded")
+
+    def _attempt_renames(self, job: Dict) -> List[Tuple[str, str]]:
+        """
+        (attempt file, final file) for a job's renames: each attempt writes
+        its own partial file, so a worker that lost its lease can never
+        write into the file the job's new owner is encoding
+        """
+        if job['kind'] != 'ffmpeg':
+            return []
+        tag = f"{job['id']}-{job['attempts']}"
+        renames = []
+        for partial, final in job['payload'].get('renames', []):
+            partial = Path(partial)
+            renames.append((str(partial.with_name(f"{partial.stem}.{tag}{partial.suffix}")), final))
+        return renames
+
+    def commit(self, job: Dict):
+        """Move a finished job's outputs into place; runs while complete() holds the lease"""
+        for attempt, final in self._attempt_renames(job):
+            os.replace(attempt, final)
+        for marker in job['payload'].get('markers', []):
+            Path(marker).touch()
+
+    def execute(self, job: Dict) -> Dict:
+        """Dispatch on job kind; returns the result recorded in done/"""
+        payload = job['payload']
+
+        if job['kind'] == 'ffmpeg':
+            # Prepared command, e.g. one chunk of a chunked encode; outputs are
+            # written to per-attempt partial files, renamed by commit()
+            attempt_of = {partial: attempt for (partial, _), (attempt, _)
+                          in zip(payload.get('renames', []), self._attempt_renames(job))}
+            cmd = [attempt_of.get(arg, arg) for arg in payload['cmd']]
+            if self.threads and '-threads' in cmd:
+                cmd[cmd.index('-threads') + 1] = str(self.threads)
+            summary = run_ffmpeg(cmd, payload.get('operation', 'ffmpeg'), payload.get('duration'))
+            return {'wall_time': summary.wall_time, 'realtime_factor': summary.realtime_factor}
+
+        if job['kind'] == 'video':
+            from scripts.complete_workflow import WorkflowManager
+            workflow = WorkflowManager(self.config_file, threads=self.threads)
+            video = workflow.process_video(payload['input'], payload['output_dir'])
+            return {'video': str(video)}
+
+        raise ValueError(f"Unknown job kind: {job['kind']}")
+
+
+class EncodeCoordinator:
+    """Publishes work to the spool and assembles the results"""
+
+    def __init__(self, queue: EncodeQueue):
+        self.queue = queue
+
+    def submit_videos(self, videos: List[str], output_dir: str) -> List[str]:
+        """One job per video, each running the configured processing pipeline"""
+        output_dir = str(Path(output_dir).absolute())
+        return [self.queue.submit('video', {'input': str(Path(v).absolute()), 'output_dir': output_dir})
+                for v in videos]
+
+    def encode_chunked(self, input_file: str, output_dir: str, crf: int = 23,
+                       preset: str = 'medium', chunks: int = 8, threads: int = 4,
+                       output_name: Optional[str] = None,
+                       timeout: Optional[float] = None,
+                       target_speed: Optional[float] = None) -> Path:
+        """
+        Chunked encode spread over the workers
+        The coordinator splits the source at keyframes into the shared spool
+        area, publishes one job per unfinished chunk, encodes the audio
+        itself while waiting, then stitches. Checkpoints match
+        VideoProcessor.compress_video_chunked, so an interrupted run resumes.
+        preset "auto" is tuned here, on the coordinator, so every worker
+        encodes with the same preset
+        """
+        processor = VideoProcessor(str(Path(input_file).absolute()), str(Path(output_dir).absolute()))
+        output_file = processor.output_dir / (output_name or f"{processor.input_file.stem}_compressed.mp4")
+
+        if preset == 'auto':
+            # The worker count isn't known here, so each chunk encode must
+            # meet the target on its own
+            preset = EncoderTuner.default().choose(str(processor.input_file), crf,
+                                                   target_speed, threads=threads)
+
+        split = processor.split_chunks(output_file, chunks, {'crf': crf, 'preset': preset})
+
+        job_ids = []
+        for seg in split['segments']:
+            if seg['done'].exists():
+                continue
+            job_ids.append(self.queue.submit('ffmpeg', {
+                'operation': f"chunk {seg['index']}",
+                'cmd': processor.chunk_encode_cmd(seg, crf, preset, threads),
+                'duration': seg['duration'],
+                'renames': [[str(seg['partial']), str(seg['encoded'])]],
+                'markers': [str(seg['done'])]
+            }))
+        print(f"Published {len(job_ids)} chunk job(s) to {self.queue.spool_dir}")
+
+        processor.encode_chunk_audio(split)
+
+        results = self.queue.wait(job_ids, timeout)
+        failed = [job for job in results.values() if job['state'] == 'failed']
+        if failed:
+            raise RuntimeError(f"{len(failed)} chunk(s) failed: {failed[0].get('error')}")
+
+        return processor.stitch_chunks(split, output_file)
+
+
+def start_local_workers(spool_dir: str, count: int, lease_seconds: float,
+                        threads: Optional[int] = None, exit_when_idle: bool = False,
+                        config_file: str = "../config.yaml") -> List[subprocess.Popen]:
+    """Local stand-in for a cluster: start worker processes on this machine"""
+    processes = []
+    for i in range(count):
+        cmd = [sys.executable, str(Path(__file__).absolute()),
+               '--spool', spool_dir, '--lease-seconds', str(lease_seconds),
+               'worker', '--id', f"{socket.gethostname()}-local{i}", '--config', config_file]
+        if threads:
+            cmd += ['--threads', str(threads)]
+        if exit_when_idle:
+            cmd.append('--exit-when-idle')
+        processes.append(subprocess.Popen(cmd))
+    return processes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Coordinator/worker encode queue on a shared spool')
+    parser.add_argument('--spool', default='../.cache/encode-queue',
+                       help='Spool directory on shared storage (default: ../.cache/encode-queue)')
+    parser.add_argument('--lease-seconds', type=float, default=60.0,
+                       help='Lease length without a heartbeat (default: 60)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    worker = subparsers.add_parser('worker', help='Run worker(s) on this machine')
+    worker.add_argument('--id', default=None, help='Worker id (default: host-pid)')
+    worker.add_argument('--count', type=int, default=1, help='Local worker processes to start')
+    worker.add_argument('--threads', type=int, default=None, help='ffmpeg threads per job')
+    worker.add_argument('--config', default='../config.yaml', help='Config file for video jobs')
+    worker.add_argument('--exit-when-idle', action='store_true', help='Stop once the queue is empty')
+
+    submit = subparsers.add_parser('submit', help='Queue whole videos for processing')
+    submit.add_argument('videos', nargs='+')
+    submit.add_argument('--output-dir', default='../processed-videos')
+    submit.add_argument('--wait', action='store_true', help='Block until the jobs finish')
+
+    chunked = subparsers.add_parser('encode-chunked', help='Spread one encode over the workers')
+    chunked.add_argument('input')
+    chunked.add_argument('--output-dir', default='../processed-videos')
+    chunked.add_argument('--chunks', type=int, default=8)
+    chunked.add_argument('--crf', type=int, default=23)
+    chunked.add_argument('--preset', default='medium')
+    chunked.add_argument('--threads', type=int, default=4, help='ffmpeg threads per chunk')
+
+    subparsers.add_parser('status', help='Show queue counts and active leases')
+    subparsers.add_parser('requeue', help='Requeue expired leases now')
+
+    args = parser.parse_args()
+    queue = EncodeQueue(args.spool, args.lease_seconds)
+    install_signal_handlers()
+
+    if args.command == 'worker':
+        if args.count > 1:
+            processes = start_local_workers(args.spool, args.count, args.lease_seconds,
+                                            args.threads, args.exit_when_idle, args.config)
+            try:
+                for process in processes:
+                    process.wait()
+            except (KeyboardInterrupt, SystemExit):
+                for process in processes:
+                    process.terminate()
+            return
+        EncodeWorker(queue, args.id, args.config, args.threads).run(exit_when_idle=args.exit_when_idle)
+
+    elif args.command == 'submit':
+        job_ids = EncodeCoordinator(queue).submit_videos(args.videos, args.output_dir)
+        for job_id in job_ids:
+            print(job_id)
+        if args.wait:
+            results = queue.wait(job_ids)
+            failed = [job for job in results.values() if job['state'] == 'failed']
+            for job in results.values():
+                outcome = job.get('error') if job['state'] == 'failed' else job['result'].get('video')
+                print(f"{job['id']}: {outcome}")
+            if failed:
+                sys.exit(1)
+
+    elif args.command == 'encode-chunked':
+        EncodeCoordinator(queue).encode_chunked(args.input, args.output_dir, args.crf,
+                                                args.preset, args.chunks, args.threads)
+
+    elif args.command == 'status':
+        for state, count in queue.counts().items():
+            print(f"{state:<8} {count}")
+        now = time.time()
+        for path in sorted((queue.spool_dir / 'leased').glob('*.json')):
+            job = queue._read(path) or {}
+            try:
+                age = now - path.stat().st_mtime
+            except FileNotFoundError:
+                continue
+            print(f"  {path.stem} {job.get('kind')} held by {job.get('worker')} "
+                  f"(last heartbeat {age:.0f}s ago)")
+
+    elif args.command == 'requeue':
+        print(f"Requeued {queue.requeue_expired()} job(s)")
+
+
+if __name__ == '__main__':
+    main()
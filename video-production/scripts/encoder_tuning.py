@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Time-Budgeted Encoder Auto-Tuning
+Encodes short sampled segments at several x264 presets, measures how fast
+this machine runs them, and picks the slowest (most efficient) preset that
+still meets a target realtime factor or deadline. Measured speeds are
+cached per machine and resolution/frame-rate profile.
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import threading
+import subprocess
+from pathlib import Path
+from typing import Optional, List, Dict
+
+# Add parent directory to path to import our modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.probe_cache import ProbeCache
+from scripts.ffmpeg_progress import run_ffmpeg
+
+# x264 presets, fastest first
+PRESETS = ['ultrafast', 'superfast', 'veryfast', 'faster', 'fast',
+           'medium', 'slow', 'slower', 'veryslow']
+
+# Presets considered by default; the extremes are rarely worth it
+DEFAULT_CANDIDATES = ['veryfast', 'faster', 'fast', 'medium', 'slow', 'slower']
+
+# Used when the input can't be measured (no duration in its header)
+FALLBACK_PRESET = 'medium'
+
+# Sampled speeds are a little optimistic (no container or audio work),
+# so a preset must beat the target by this margin to be chosen
+SAFETY_MARGIN = 0.1
+
+
+def target_speed_for(duration: float, target_speed: Optional[float] = None,
+                     deadline: Optional[float] = None) -> float:
+    """
+    Required realtime factor: the explicit target, or whatever finishes
+    `duration` seconds of video within `deadline` seconds, whichever is stricter
+    """
+    targets = [target_speed or 0.0]
+    if deadline:
+        targets.append(duration / deadline)
+    return max(targets) or 1.0
+
+
+class EncoderTuner:
+    """Measures x264 preset speed on sampled segments and picks a preset"""
+
+    _default = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, cache_file: str = "../.cache/encoder_tuning.json",
+                 sample_seconds: float = 4.0, samples: int = 3,
+                 candidates: Optional[List[str]] = None):
+        self.cache_file = Path(cache_file)
+        self.sample_seconds = sample_seconds
+        self.samples = samples
+        self.candidates = sorted(candidates or DEFAULT_CANDIDATES, key=PRESETS.index)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def default(cls) -> 'EncoderTuner':
+        """Process-wide tuner at the default cache location"""
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls()
+            return cls._default
+
+    def profile_key(self, input_file: str, crf: int, threads: Optional[int] = None) -> str:
+        """Cache key: machine, resolution, frame rate, CRF and thread cap"""
+        info = ProbeCache.default().probe(
+            input_file, 'stream=codec_type,width,height,avg_frame_rate')
+        video = next((s for s in info.get('streams', []) if s.get('codec_type') == 'video'), {})
+        num, _, den = video.get('avg_frame_rate', '0/1').partition('/')
+        fps = round(float(num) / float(den or 1)) if float(den or 1) else 0
+        machine = f"{platform.node()}-{os.cpu_count()}cpu"
+        return (f"{machine}|{video.get('width', 0)}x{video.get('height', 0)}@{fps}"
+                f"|crf{crf}|threads{threads or 'auto'}")
+
+    def _load(self) -> Dict:
+        try:
+            with open(self.cache_file) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_speed(self, key: str, preset: str, speed: float):
+        with self._lock:
+            cache = self._load()
+            entry = cache.setdefault(key, {'speeds': {}})
+            entry['speeds'][preset] = round(speed, 3)
+            entry['updated'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            temp = self.cache_file.with_suffix(f'.{os.getpid()}.tmp')
+            with open(temp, 'w') as f:
+                json.dump(cache, f, indent=2)
+            os.replace(temp, self.cache_file)
+
+    def _duration(self, input_file: str) -> float:
+        """Container duration in seconds, 0.0 when unknown (e.g. N/A)"""
+        info = ProbeCache.default().probe(input_file, 'format=duration')
+        try:
+            return max(0.0, float(info.get('format', {}).get('duration', 0)))
+        except (TypeError, ValueError):
+            return 0.0
+
+    def measure(self, input_file: str, preset: str, crf: int = 23,
+                threads: Optional[int] = None) -> float:
+        """
+        Realtime factor of `preset` over evenly spaced sample segments
+        Raises ValueError when the input's duration is unknown
+        """
+        duration = self._duration(input_file)
+        if duration <= 0:
+            raise ValueError(f"Unknown duration for {input_file}, can't sample it")
+        sample = min(self.sample_seconds, duration)
+        count = max(1, min(self.samples, int(duration // sample)))
+
+        encoded = 0.0
+        wall = 0.0
+        for i in range(count):
+            start = max(0.0, min(duration - sample, (i + 0.5) * duration / count - sample / 2))
+            cmd = [
+                'ffmpeg', '-v', 'error',
+                '-ss', f'{start:.3f}', '-t', f'{sample:.3f}',
+                '-i', str(input_file),
+                '-an', '-sn',
+                '-c:v', 'libx264', '-preset', preset, '-crf', str(crf),
+                *(['-threads', str(threads)] if threads else []),
+                '-f', 'null', '-'
+            ]
+            summary = run_ffmpeg(cmd, f'tune:{preset}', duration=sample)
+            encoded += summary.media_duration or sample
+            wall += summary.wall_time
+
+        return encoded / wall if wall else 0.0
+
+    def choose(self, input_file: str, crf: int = 23,
+               target_speed: Optional[float] = None, deadline: Optional[float] = None,
+               threads: Optional[int] = None, work_factor: float = 1.0) -> str:
+        """
+        Slowest candidate preset whose measured speed meets the target
+        target_speed: required realtime factor (default 1.0)
+        deadline: seconds the whole encode may take
+        work_factor: encode cost relative to one source-sized rendition
+                     (e.g. ~1.45 for a 1080p + 720p ladder from 1080p)
+        Speeds come from the cache when this profile was measured before;
+        presets are binary-searched, so only a few are ever sampled.
+        Inputs without a known duration get FALLBACK_PRESET.
+        """
+        duration = self._duration(input_file)
+        if duration <= 0:
+            print(f"Warning: unknown duration for {input_file}, "
+                  f"using preset {FALLBACK_PRESET} instead of tuning")
+            return FALLBACK_PRESET
+        target = target_speed_for(duration, target_speed, deadline)
+        required = target * work_factor * (1 + SAFETY_MARGIN)
+
+        key = self.profile_key(input_file, crf, threads)
+        speeds = self._load().get(key, {}).get('speeds', {})
+
+        def speed_of(preset: str) -> float:
+            if preset not in speeds:
+                print(f"Measuring preset {preset}...")
+                speeds[preset] = self.measure(input_file, preset, crf, threads)
+                self._save_speed(key, preset, speeds[preset])
+            return speeds[preset]
+
+        # Speed falls monotonically with slower presets
+        low, high = 0, len(self.candidates) - 1
+        best = None
+        while low <= high:
+            mid = (low + high) // 2
+            if speed_of(self.candidates[mid]) >= required:
+                best = mid
+                low = mid + 1
+            else:
+                high = mid - 1
+
+        if best is None:
+            preset = self.candidates[0]
+            print(f"Warning: no preset reaches {required:.2f}x realtime, "
+                  f"using fastest candidate {preset} ({speeds[preset]:.2f}x)")
+        else:
+            preset = self.candidates[best]
+            print(f"Auto preset: {preset} ({speeds[preset]:.2f}x realtime, "
+                  f"needs {required:.2f}x)")
+        return preset
+
+    def clear(self):
+        """Forget every measured speed"""
+        with self._lock:
+            self.cache_file.unlink(missing_ok=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pick the slowest x264 preset that meets a time budget')
+    parser.add_argument('input', help='Representative input video')
+    parser.add_argument('--crf', type=int, default=23, help='CRF value (default: 23)')
+    parser.add_argument('--target', type=float, default=None,
+                       help='Required realtime factor (default: 1.0)')
+    parser.add_argument('--deadline-minutes', type=float, default=None,
+                       help='Time allowed for the whole encode')
+    parser.add_argument('--threads', type=int, default=None, help='ffmpeg thread cap')
+    parser.add_argument('--candidates', nargs='+', choices=PRESETS, default=None,
+                       help='Presets to consider')
+    parser.add_argument('--cache', default='../.cache/encoder_tuning.json',
+                       help='Speed cache (default: ../.cache/encoder_tuning.json)')
+    parser.add_argument('--remeasure', action='store_true', help='Ignore cached speeds')
+
+    args = parser.parse_args()
+
+    tuner = EncoderTuner(args.cache, candidates=args.candidates)
+    if args.remeasure:
+        tuner.clear()
+
+    deadline = args.deadline_minutes * 60 if args.deadline_minutes else None
+    try:
+        print(tuner.choose(args.input, args.crf, args.target, deadline, args.threads))
+    except subprocess.CalledProcessError as e:
+        print(f"Error: ffmpeg failed while measuring: {e}")
+        sys.exit(1)
+    except FileNotFoundError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,496 @@
+"""
+FFmpeg Progress Telemetry
+Runs ffmpeg with `-progress pipe:1`, parses its key=value blocks into
+typed progress events and summarizes each run (wall time, realtime
+factor, output bitrate, peak memory). Blocking and asyncio runners share
+the parsing; cancelling or shutting down kills ffmpeg's process group.
+"""
+
+import os
+import sys
+import time
+import signal
+import threading
+import subprocess
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional, List, Tuple, Union, Callable, Iterator, AsyncIterator, IO
+
+ProgressCallback = Callable[['ProgressEvent'], None]
+
+# Running ffmpeg processes, each the leader of its own process group, so a
+# shutdown can stop them (and any helpers they spawn) from any thread
+_active_processes = set()
+_active_lock = threading.Lock()
+_shutdown = threading.Event()
+# Innermost ProcessScope of the running code (see process_scope)
+_scope: ContextVar[Optional['ProcessScope']] = ContextVar('ffmpeg_process_scope', default=None)
+
+
+class EncodeInterrupted(Exception):
+    """ffmpeg was stopped (or never started): shutdown, or its operation was cancelled"""
+
+
+def _kill_group(process, sig: int = signal.SIGKILL):
+    """Signal a process started with start_new_session=True, helpers included"""
+    try:
+        os.killpg(process.pid, sig)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def kill_active_processes(sig: int = signal.SIGTERM) -> int:
+    """
+    Request shutdown: signal every running ffmpeg process group and refuse
+    to start new ones. Safe to call from a signal handler. Returns the
+    number of processes signalled.
+    """
+    _shutdown.set()
+    return signal_active_processes(sig)
+
+
+def signal_active_processes(sig: int = signal.SIGKILL) -> int:
+    """
+    Signal every running ffmpeg process group without requesting shutdown,
+    so later runs still start. Returns the number of processes signalled.
+    """
+    with _active_lock:
+        processes = list(_active_processes)
+    for process in processes:
+        _kill_group(process, sig)
+    return len(processes)
+
+
+def shutdown_requested() -> bool:
+    return _shutdown.is_set()
+
+
+class ProcessScope:
+    """
+    The ffmpeg processes one operation starts, from any thread that
+    inherits its context (asyncio.to_thread copies it), so they can be
+    stopped without touching other operations' processes
+    """
+
+    def __init__(self, parent: Optional['ProcessScope'] = None):
+        self.parent = parent
+        self.processes = set()
+        self.cancelled = False
+        self._lock = threading.Lock()
+
+    def cancel(self, sig: int = signal.SIGKILL) -> int:
+        """Signal this scope's processes and refuse to start new ones in it"""
+        with self._lock:
+            self.cancelled = True
+            processes = list(self.processes)
+        for process in processes:
+            _kill_group(process, sig)
+        return len(processes)
+
+    def _chain(self) -> Iterator['ProcessScope']:
+        scope = self
+        while scope:
+            yield scope
+            scope = scope.parent
+
+
+@contextmanager
+def process_scope() -> Iterator[ProcessScope]:
+    """
+    Track the processes started inside the block
+        with process_scope() as scope:
+            ...             # elsewhere: scope.cancel()
+    """
+    scope = ProcessScope(_scope.get())
+    token = _scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _scope.reset(token)
+
+
+def _stopping() -> bool:
+    """Shutdown was requested, or the current operation was cancelled"""
+    scope = _scope.get()
+    return _shutdown.is_set() or bool(scope and any(s.cancelled for s in scope._chain()))
+
+
+def _register(process):
+    with _active_lock:
+        _active_processes.add(process)
+    scope = _scope.get()
+    for s in scope._chain() if scope else ():
+        with s._lock:
+            s.processes.add(process)
+            cancelled = s.cancelled
+        if cancelled:
+            # Started while its scope was being cancelled
+            _kill_group(process)
+
+
+def _unregister(process):
+    with _active_lock:
+        _active_processes.discard(process)
+    scope = _scope.get()
+    for s in scope._chain() if scope else ():
+        with s._lock:
+            s.processes.discard(process)
+
+
+def reset_shutdown():
+    """Allow ffmpeg to run again after a handled shutdown"""
+    _shutdown.clear()
+
+
+@contextmanager
+def managed_process(cmd: List[str], **popen_kwargs) -> Iterator[subprocess.Popen]:
+    """
+    Popen in its own process group, registered so a shutdown stops it too
+        with managed_process(cmd, stdout=subprocess.PIPE) as process:
+            ...
+    The process is killed if the block raises and always waited for on
+    exit; checking its return code is up to the caller.
+    """
+    if _stopping():
+        raise EncodeInterrupted(f"Not starting {cmd[0]}: shutting down")
+
+    process = subprocess.Popen(cmd, start_new_session=True, **popen_kwargs)
+    _register(process)
+    try:
+        yield process
+    except BaseException:
+        _kill_group(process)
+        raise
+    finally:
+        process.wait()
+        _unregister(process)
+
+
+def _handle_signal(signum, frame):
+    kill_active_processes()
+    if signum == signal.SIGINT:
+        raise KeyboardInterrupt
+    raise SystemExit(128 + signum)
+
+
+def install_signal_handlers():
+    """
+    Make SIGINT/SIGTERM kill every running ffmpeg process group, then
+    raise KeyboardInterrupt/SystemExit in the main thread. ffmpeg runs in
+    its own session, so without this a Ctrl-C only stops encodes driven
+    from the main thread. Call from a CLI entry point (main thread only).
+    """
+    signal.signal(signal.SIGINT, _handle_signal)
+    signal.signal(signal.SIGTERM, _handle_signal)
+
+
+@dataclass
+class ProgressEvent:
+    """One ffmpeg progress report (emitted roughly every 0.5s)"""
+    operation: str
+    frame: int = 0
+    fps: float = 0.0
+    out_time: float = 0.0            # seconds of output written so far
+    total_size: int = 0              # bytes written so far
+    bitrate_kbps: Optional[float] = None
+    speed: Optional[float] = None    # encode speed as a multiple of realtime
+    percent: Optional[float] = None  # of the expected duration, when known
+    eta: Optional[float] = None      # seconds remaining, when known
+    done: bool = False
+
+
+@dataclass
+class RunSummary:
+    """Per-operation summary attached to VideoProcessor results"""
+    operation: str
+    wall_time: float
+    media_duration: Optional[float] = None
+    realtime_factor: Optional[float] = None
+    frames: int = 0
+    output_bytes: int = 0
+    output_bitrate_kbps: Optional[float] = None
+    peak_rss_kb: Optional[int] = None
+    user_time: Optional[float] = None
+    system_time: Optional[float] = None
+    cache_hit: bool = False
+    outputs: List[str] = field(default_factory=list)
+
+
+def with_progress(cmd: List[str]) -> List[str]:
+    """Insert -progress reporting right after the ffmpeg executable"""
+    return [cmd[0], '-progress', 'pipe:1'] + cmd[1:]
+
+
+def _parse_float(value: str) -> Optional[float]:
+    value = value.strip().rstrip('x').replace('kbits/s', '')
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+class FFmpegJob:
+    """
+    Iterate over an ffmpeg run's progress events
+        job = FFmpegJob(cmd, 'compress', duration=600)
+        for event in job:
+            print(event.percent)
+        print(job.summary)
+    Raises CalledProcessError if ffmpeg exits non-zero
+    """
+
+    def __init__(self, cmd: List[str], operation: str = '',
+                 duration: Optional[float] = None,
+                 outputs: Optional[List[Path]] = None,
+                 stdin: Optional[IO] = None):
+        self.cmd = cmd
+        self.operation = operation
+        self.duration = duration
+        self.outputs = [Path(p) for p in (outputs or [])]
+        # Input stream for commands reading pipe:0 (e.g. an upstream ffmpeg's stdout)
+        self.stdin = stdin
+        self.summary: Optional[RunSummary] = None
+
+    def __iter__(self) -> Iterator[ProgressEvent]:
+        if _stopping():
+            raise EncodeInterrupted(f"Not starting {self.operation or 'ffmpeg'}: shutting down")
+
+        start = time.perf_counter()
+        process = subprocess.Popen(with_progress(self.cmd), stdin=self.stdin,
+                                   stdout=subprocess.PIPE, text=True, start_new_session=True)
+        _register(process)
+
+        fields = {}
+        last = ProgressEvent(self.operation)
+        try:
+            for line in process.stdout:
+                key, _, value = line.strip().partition('=')
+                if key != 'progress':
+                    fields[key] = value
+                    continue
+                last = self._event(fields, done=(value == 'end'))
+                fields = {}
+                yield last
+        except BaseException:
+            # The whole group, like the async path: ffmpeg's helpers too
+            _kill_group(process)
+            process.wait()
+            raise
+        finally:
+            rusage = None
+            if process.returncode is None and hasattr(os, 'wait4'):
+                _, status, rusage = os.wait4(process.pid, 0)
+                process.returncode = os.waitstatus_to_exitcode(status)
+            process.wait()
+            _unregister(process)
+
+        if process.returncode != 0:
+            if _stopping():
+                raise EncodeInterrupted(f"{self.operation or 'ffmpeg'} stopped by shutdown")
+            raise subprocess.CalledProcessError(process.returncode, self.cmd)
+
+        self.summary = self._summarize(time.perf_counter() - start, last, rusage)
+
+    def run(self, callbacks: Optional[List[ProgressCallback]] = None) -> RunSummary:
+        """Run to completion, passing every event to the callbacks"""
+        for event in self:
+            for callback in callbacks or []:
+                callback(event)
+        return self.summary
+
+    def _event(self, fields: dict, done: bool) -> ProgressEvent:
+        # out_time_ms is microseconds too (long-standing ffmpeg quirk)
+        out_us = fields.get('out_time_us') or fields.get('out_time_ms') or '0'
+        out_time = max(0.0, (_parse_float(out_us) or 0.0) / 1_000_000)
+        speed = _parse_float(fields.get('speed', 'N/A'))
+
+        percent = eta = None
+        if self.duration:
+            percent = min(100.0, out_time / self.duration * 100)
+            if speed:
+                eta = max(0.0, (self.duration - out_time) / speed)
+
+        return ProgressEvent(
+            operation=self.operation,
+            frame=int(_parse_float(fields.get('frame', '0')) or 0),
+            fps=_parse_float(fields.get('fps', '0')) or 0.0,
+            out_time=out_time,
+            total_size=int(_parse_float(fields.get('total_size', '0')) or 0),
+            bitrate_kbps=_parse_float(fields.get('bitrate', 'N/A')),
+            speed=speed,
+            percent=100.0 if done and self.duration else percent,
+            eta=0.0 if done else eta,
+            done=done
+        )
+
+    def _summarize(self, wall_time: float, last: ProgressEvent, rusage) -> RunSummary:
+        output_bytes = sum(p.stat().st_size for p in self.outputs if p.exists())
+        media_duration = last.out_time or None
+
+        summary = RunSummary(
+            operation=self.operation,
+            wall_time=wall_time,
+            media_duration=media_duration,
+            realtime_factor=media_duration / wall_time if media_duration and wall_time else None,
+            frames=last.frame,
+            output_bytes=output_bytes,
+            output_bitrate_kbps=(output_bytes * 8 / 1000 / media_duration
+                                 if media_duration and output_bytes else None),
+            outputs=[str(p) for p in self.outputs]
+        )
+
+        if rusage is not None:
+            # ru_maxrss is kilobytes on Linux, bytes on macOS
+            divisor = 1024 if sys.platform == 'darwin' else 1
+            summary.peak_rss_kb = rusage.ru_maxrss // divisor
+            summary.user_time = rusage.ru_utime
+            summary.system_time = rusage.ru_stime
+
+        return summary
+
+
+class AsyncFFmpegJob(FFmpegJob):
+    """
+    FFmpegJob on asyncio.create_subprocess_exec
+        job = AsyncFFmpegJob(cmd, 'compress', duration=600)
+        async for event in job:
+            print(event.percent)
+        print(job.summary)
+    Cancelling the consuming task (or closing the iterator early) kills
+    ffmpeg. The event loop reaps the child itself, so summaries carry no
+    peak RSS or CPU times.
+    """
+
+    async def __aiter__(self) -> AsyncIterator[ProgressEvent]:
+        # asyncio is imported by the async runners only, keeping it out of
+        # the start-up cost of blocking callers
+        import asyncio
+
+        if _stopping():
+            raise EncodeInterrupted(f"Not starting {self.operation or 'ffmpeg'}: shutting down")
+
+        start = time.perf_counter()
+        process = await asyncio.create_subprocess_exec(*with_progress(self.cmd),
+                                                       stdout=asyncio.subprocess.PIPE,
+                                                       start_new_session=True)
+        _register(process)
+
+        fields = {}
+        last = ProgressEvent(self.operation)
+        try:
+            async for raw in process.stdout:
+                key, _, value = raw.decode(errors='replace').strip().partition('=')
+                if key != 'progress':
+                    fields[key] = value
+                    continue
+                last = self._event(fields, done=(value == 'end'))
+                fields = {}
+                yield last
+            await process.wait()
+        except BaseException:
+            _kill_group(process)
+            await process.wait()
+            raise
+        finally:
+            _unregister(process)
+
+        if process.returncode != 0:
+            if _stopping():
+                raise EncodeInterrupted(f"{self.operation or 'ffmpeg'} stopped by shutdown")
+            raise subprocess.CalledProcessError(process.returncode, self.cmd)
+
+        self.summary = self._summarize(time.perf_counter() - start, last, None)
+
+    async def run(self, callbacks: Optional[List[ProgressCallback]] = None) -> RunSummary:
+        """Run to completion, passing every event to the callbacks"""
+        async for event in self:
+            for callback in callbacks or []:
+                callback(event)
+        return self.summary
+
+
+def run_ffmpeg(cmd: List[str], operation: str = '', duration: Optional[float] = None,
+               outputs: Optional[List[Path]] = None,
+               callbacks: Optional[List[ProgressCallback]] = None) -> RunSummary:
+    """Run ffmpeg with progress telemetry and return its summary"""
+    return FFmpegJob(cmd, operation, duration, outputs).run(callbacks)
+
+
+async def run_ffmpeg_async(cmd: List[str], operation: str = '', duration: Optional[float] = None,
+                           outputs: Optional[List[Path]] = None,
+                           callbacks: Optional[List[ProgressCallback]] = None) -> RunSummary:
+    """Awaitable run_ffmpeg; cancelling it kills ffmpeg"""
+    return await AsyncFFmpegJob(cmd, operation, duration, outputs).run(callbacks)
+
+
+async def capture_output_async(cmd: List[str], timeout: Optional[float] = None,
+                               with_stderr: bool = False) -> Union[bytes, Tuple[bytes, bytes]]:
+    """
+    Run a command and return its stdout, like subprocess.run(cmd,
+    check=True, capture_output=True, timeout=timeout).stdout
+    (or (stdout, stderr) with with_stderr)
+    Cancelling it kills the process. On timeout the process is killed and
+    subprocess.TimeoutExpired carries the output read so far.
+    """
+    import asyncio
+
+    if _stopping():
+        raise EncodeInterrupted(f"Not starting {cmd[0]}: shutting down")
+
+    process = await asyncio.create_subprocess_exec(*cmd, stdout=asyncio.subprocess.PIPE,
+                                                   stderr=asyncio.subprocess.PIPE,
+                                                   start_new_session=True)
+    _register(process)
+
+    chunks = []
+    errors = []
+
+    async def drain(stream, into: list):
+        while True:
+            chunk = await stream.read(1 << 16)
+            if not chunk:
+                return
+            into.append(chunk)
+
+    async def communicate():
+        await asyncio.gather(drain(process.stdout, chunks), drain(process.stderr, errors))
+        await process.wait()
+
+    try:
+        await asyncio.wait_for(communicate(), timeout)
+    except asyncio.TimeoutError:
+        _kill_group(process)
+        await process.wait()
+        raise subprocess.TimeoutExpired(cmd, timeout, output=b''.join(chunks),
+                                        stderr=b''.join(errors))
+    except BaseException:
+        _kill_group(process)
+        await process.wait()
+        raise
+    finally:
+        _unregister(process)
+
+    output = b''.join(chunks)
+    stderr = b''.join(errors)
+    if process.returncode != 0:
+        if _stopping():
+            raise EncodeInterrupted(f"{cmd[0]} stopped by shutdown")
+        raise subprocess.CalledProcessError(process.returncode, cmd, output, stderr)
+    return (output, stderr) if with_stderr else output
+
+
+def format_summary(summary: RunSummary) -> str:
+    """One-line human-readable summary"""
+    if summary.cache_hit:
+        return f"[{summary.operation}] cache hit in {summary.wall_time:.2f}s"
+
+    parts = [f"[{summary.operation}] {summary.wall_time:.1f}s"]
+    if summary.realtime_factor:
+        parts.append(f"{summary.realtime_factor:.2f}x realtime")
+    if summary.output_bitrate_kbps:
+        parts.append(f"{summary.output_bitrate_kbps:.0f} kb/s")
+    if summary.peak_rss_kb:
+        parts.append(f"peak RSS {summary.peak_rss_kb / 1024:.0f} MB")
+    return ', '.join(parts)
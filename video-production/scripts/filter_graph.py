@@ -0,0 +1,253 @@
+"""
+Fused Filter-Graph Planner
+Turns the configured processing steps (intro/outro, subtitles, watermark,
+compression and the resize ladder) into one FFmpeg filter graph so the
+whole pipeline runs as a single decode and a single encode per rendition
+"""
+
+import shlex
+import subprocess
+from pathlib import Path
+from typing import Optional, List, Dict
+
+from scripts.process_video import (
+    DEFAULT_FORMATS,
+    WATERMARK_POSITIONS,
+    VideoProcessor,
+    escape_filter_path,
+    ladder_work_factor,
+)
+from scripts.render_cache import RenderCache
+from scripts.probe_cache import ProbeCache
+from scripts.encoder_tuning import EncoderTuner
+
+
+def has_audio_stream(media_file: str) -> bool:
+    """Check whether a media file contains at least one audio stream"""
+    try:
+        info = ProbeCache.default().probe(media_file, 'stream=codec_type')
+    except (subprocess.CalledProcessError, OSError, ValueError):
+        return False
+    return any(stream.get('codec_type') == 'audio' for stream in info.get('streams', []))
+
+
+def auto_preset(input_file: str, crf: int, auto_tune: dict, formats: List[Dict],
+                threads: Optional[int] = None) -> str:
+    """
+    Tune the preset for a fused encode
+    Every rendition is encoded in the same pass, so the required speed is
+    scaled by the ladder's total pixels relative to the source
+    """
+    info = ProbeCache.default().probe(input_file, 'stream=codec_type,width,height')
+    video = next((s for s in info.get('streams', []) if s.get('codec_type') == 'video'), {})
+
+    deadline = auto_tune.get('deadline_minutes')
+    return EncoderTuner.default().choose(
+        input_file, crf,
+        target_speed=auto_tune.get('target_realtime'),
+        deadline=deadline * 60 if deadline else None,
+        threads=threads,
+        work_factor=ladder_work_factor(video, formats)
+    )
+
+
+class FilterGraphPlanner:
+    """Plan a single-encode FFmpeg command for the full processing pipeline"""
+
+    def __init__(self, input_file: str, output_dir: str = "../processed-videos",
+                 crf: int = 23, preset: str = 'medium', audio_bitrate: str = '128k',
+                 formats: Optional[List[Dict]] = None,
+                 watermark_file: Optional[str] = None,
+                 watermark_position: str = 'bottom-right',
+                 intro_file: Optional[str] = None,
+                 outro_file: Optional[str] = None,
+                 subtitle_file: Optional[str] = None,
+                 threads: Optional[int] = None,
+                 cache: Optional[RenderCache] = None,
+                 auto_tune: Optional[Dict] = None):
+        self.input_file = Path(input_file)
+        self.output_dir = Path(output_dir)
+        self.crf = crf
+        # "auto" is tuned by run(), so building or dry-running a plan never encodes
+        self.preset = preset
+        self.auto_tune = auto_tune or {}
+        self.audio_bitrate = audio_bitrate
+        self.formats = formats or DEFAULT_FORMATS
+        self.watermark_file = watermark_file
+        self.watermark_position = watermark_position
+        self.intro_file = intro_file
+        self.outro_file = outro_file
+        self.subtitle_file = subtitle_file
+        self.threads = threads
+        self.cache = cache
+        # RunSummary of the last fused encode
+        self.summary = None
+
+        if not self.input_file.exists():
+            raise FileNotFoundError(f"Input file not found: {input_file}")
+
+    @classmethod
+    def from_config(cls, input_file: str, video_config: dict,
+                    output_dir: str = "../processed-videos",
+                    threads: Optional[int] = None,
+                    cache: Optional[RenderCache] = None) -> 'FilterGraphPlanner':
+        """Build a planner from the `video:` block of config.yaml"""
+        compression = video_config.get('compression', {})
+        watermark = video_config.get('watermark', {})
+        subtitles = video_config.get('subtitles') or {}
+
+        def existing(path: Optional[str]) -> Optional[str]:
+            return path if path and Path(path).exists() else None
+
+        return cls(
+            input_file,
+            output_dir,
+            crf=compression.get('crf', 23),
+            preset=compression.get('preset', 'medium'),
+            audio_bitrate=compression.get('audio_bitrate', '128k'),
+            formats=video_config.get('formats'),
+            watermark_file=existing(watermark.get('file')) if watermark.get('enabled', False) else None,
+            watermark_position=watermark.get('position', 'bottom-right'),
+            intro_file=existing(video_config.get('intro_file')),
+            outro_file=existing(video_config.get('outro_file')),
+            subtitle_file=existing(subtitles.get('file')),
+            threads=threads,
+            cache=cache,
+            auto_tune=compression.get('auto_tune')
+        )
+
+    def plan(self) -> Dict:
+        """
+        Build the fused command
+        Returns {'cmd': [...], 'filter_graph': [...], 'outputs': {name: Path}}
+        """
+        segments = [f for f in (self.intro_file, str(self.input_file), self.outro_file) if f]
+        main_index = segments.index(str(self.input_file))
+        inputs = list(segments)
+        if self.watermark_file:
+            inputs.append(self.watermark_file)
+
+        filters = []
+
+        # Subtitles are timed against the main recording, so burn them in
+        # before anything is concatenated around it
+        main_label = f'{main_index}:v'
+        if self.subtitle_file:
+            filters.append(f"[{main_label}]subtitles='{escape_filter_path(self.subtitle_file)}'[main]")
+            main_label = 'main'
+
+        # Intro/outro: normalize every segment to the largest rendition so
+        # the concat filter sees matching frame sizes
+        audio_label = None
+        if len(segments) > 1:
+            width, height = self._canvas_size()
+            with_audio = all(has_audio_stream(f) for f in segments)
+            concat_inputs = ''
+            for i in range(len(segments)):
+                source = main_label if i == main_index else f'{i}:v'
+                filters.append(
+                    f'[{source}]scale={width}:{height}:force_original_aspect_ratio=decrease,'
+                    f'pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1[seg{i}v]'
+                )
+                concat_inputs += f'[seg{i}v]'
+                if with_audio:
+                    filters.append(f'[{i}:a]aresample=48000,aformat=channel_layouts=stereo[seg{i}a]')
+                    concat_inputs += f'[seg{i}a]'
+
+            if with_audio:
+                filters.append(f'{concat_inputs}concat=n={len(segments)}:v=1:a=1[joined][aout]')
+                audio_label = 'aout'
+            else:
+                print("Warning: intro/outro without audio, output will be silent")
+                filters.append(f'{concat_inputs}concat=n={len(segments)}:v=1:a=0[joined]')
+            video_label = 'joined'
+        else:
+            video_label = main_label
+
+        # Watermark over the whole programme, as batch_process.sh does
+        if self.watermark_file:
+            overlay_pos = WATERMARK_POSITIONS.get(self.watermark_position,
+                                                  WATERMARK_POSITIONS['bottom-right'])
+            filters.append(f'[{len(inputs) - 1}:v]scale=120:-1[wm]')
+            filters.append(f'[{video_label}][wm]overlay={overlay_pos}[marked]')
+            video_label = 'marked'
+
+        # Resize ladder
+        count = len(self.formats)
+        filters.append(f'[{video_label}]split={count}' + ''.join(f'[s{i}]' for i in range(count)))
+        if audio_label and count > 1:
+            filters.append(f'[{audio_label}]asplit={count}' + ''.join(f'[a{i}]' for i in range(count)))
+
+        outputs = {}
+        output_args = []
+        for i, fmt in enumerate(self.formats):
+            filters.append(f"[s{i}]scale={fmt['width']}:{fmt['height']}[v{i}]")
+            output_file = self.output_dir / f"{self.input_file.stem}_{fmt['name']}.mp4"
+            if audio_label:
+                audio_map = f'[a{i}]' if count > 1 else f'[{audio_label}]'
+            else:
+                audio_map = f'{main_index}:a?' if len(segments) == 1 else None
+
+            output_args += ['-map', f'[v{i}]']
+            if audio_map:
+                output_args += ['-map', audio_map, '-c:a', 'aac', '-b:a', self.audio_bitrate]
+            output_args += [
+                '-c:v', 'libx264',
+                '-crf', str(self.crf),
+                '-preset', self.preset
+            ]
+            if self.threads:
+                output_args += ['-threads', str(self.threads)]
+            output_args += ['-movflags', '+faststart', str(output_file)]
+            outputs[fmt['name']] = output_file
+
+        cmd = ['ffmpeg']
+        for input_file in inputs:
+            cmd += ['-i', str(input_file)]
+        cmd += ['-filter_complex', ';'.join(filters), '-y'] + output_args
+
+        return {'cmd': cmd, 'filter_graph': filters, 'outputs': outputs}
+
+    def describe(self, plan: Optional[Dict] = None) -> str:
+        """Human-readable rendering of the planned graph and command"""
+        plan = plan or self.plan()
+        lines = ["Fused filter graph:"]
+        lines += [f"  {chain}" for chain in plan['filter_graph']]
+        lines.append("Outputs:")
+        lines += [f"  {name}: {path}" for name, path in plan['outputs'].items()]
+        if self.preset == 'auto':
+            lines.append("Preset: auto (tuned on this machine when the encode runs)")
+        lines.append("Command:")
+        lines.append(f"  {shlex.join(plan['cmd'])}")
+        return "\n".join(lines)
+
+    def run(self, dry_run: bool = False) -> Dict[str, Path]:
+        """Run the fused encode, or only print the plan when dry_run is set"""
+        if dry_run:
+            plan = self.plan()
+            print(self.describe(plan))
+            return plan['outputs']
+
+        if self.preset == 'auto':
+            self.preset = auto_preset(str(self.input_file), self.crf, self.auto_tune,
+                                      self.formats, self.threads)
+        plan = self.plan()
+
+        names = ', '.join(plan['outputs'])
+        print(f"Running fused encode ({names})...")
+        processor = VideoProcessor(self.input_file, self.output_dir, self.threads, self.cache)
+        self.summary = processor.run_command(
+            plan['cmd'],
+            list(plan['outputs'].values()),
+            inputs=[self.intro_file, self.outro_file, self.watermark_file, self.subtitle_file],
+            operation='fused'
+        )
+        for name, output_file in plan['outputs'].items():
+            print(f"{name} version saved to: {output_file}")
+
+        return plan['outputs']
+
+    def _canvas_size(self) -> tuple:
+        """Largest configured rendition, used as the common concat frame size"""
+        largest = max(self.formats, key=lambda fmt: fmt['width'] * fmt['height'])
+        return largest['width'], largest['height']
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Durable Workflow Job Store
+Records every workflow stage (parameters, inputs, outputs, status) per
+video in SQLite, so a rerun skips stages that finished and whose outputs
+still verify, and an interrupted stage is picked up again
+"""
+
+import sys
+import json
+import time
+import sqlite3
+import hashlib
+import argparse
+import threading
+from pathlib import Path
+from typing import Optional, List, Dict, Callable, Any
+
+# Add parent directory to path to import our modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.ffmpeg_progress import EncodeInterrupted, shutdown_requested
+
+
+def _file_signature(path: Path) -> Dict:
+    stat = Path(path).stat()
+    return {'path': str(Path(path).absolute()), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _params_hash(params: Dict) -> str:
+    return hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _encode(value: Any) -> Any:
+    """JSON-safe stage result; Paths are tagged so they come back as Paths"""
+    if isinstance(value, Path):
+        return {'__path__': str(value)}
+    if isinstance(value, dict):
+        return {k: _encode(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_encode(v) for v in value]
+    return value
+
+
+def _decode(value: Any) -> Any:
+    if isinstance(value, dict):
+        if set(value) == {'__path__'}:
+            return Path(value['__path__'])
+        return {k: _decode(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_decode(v) for v in value]
+    return value
+
+
+def result_paths(value: Any) -> List[Path]:
+    """Every Path in a stage result (the default notion of its outputs)"""
+    if isinstance(value, Path):
+        return [value]
+    if isinstance(value, dict):
+        return [p for v in value.values() for p in result_paths(v)]
+    if isinstance(value, (list, tuple)):
+        return [p for v in value for p in result_paths(v)]
+    return []
+
+
+class JobStore:
+    """SQLite record of workflow jobs and their stages"""
+
+    def __init__(self, db_path: str = "../.cache/jobs.db"):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        with self._db:
+            self._db.execute('''
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    input TEXT UNIQUE,
+                    size INTEGER,
+                    mtime_ns INTEGER,
+                    created REAL,
+                    updated REAL
+                )
+            ''')
+            self._db.execute('''
+                CREATE TABLE IF NOT EXISTS stages (
+                    job_id INTEGER,
+                    stage TEXT,
+                    status TEXT,
+                    params TEXT,
+                    params_hash TEXT,
+                    inputs TEXT,
+                    outputs TEXT,
+                    result TEXT,
+                    error TEXT,
+                    started REAL,
+                    finished REAL,
+                    PRIMARY KEY (job_id, stage)
+                )
+            ''')
+
+    def job_for(self, input_file: str) -> int:
+        """Job id for an input video; a changed input starts from scratch"""
+        signature = _file_signature(Path(input_file))
+        now = time.time()
+
+        with self._lock, self._db:
+            row = self._db.execute('SELECT id, size, mtime_ns FROM jobs WHERE input = ?',
+                                   (signature['path'],)).fetchone()
+            if row and row[1:] == (signature['size'], signature['mtime_ns']):
+                self._db.execute('UPDATE jobs SET updated = ? WHERE id = ?', (now, row[0]))
+                return row[0]
+
+            if row:
+                self._db.execute('DELETE FROM stages WHERE job_id = ?', (row[0],))
+                self._db.execute('UPDATE jobs SET size = ?, mtime_ns = ?, updated = ? WHERE id = ?',
+                                 (signature['size'], signature['mtime_ns'], now, row[0]))
+                return row[0]
+
+            cursor = self._db.execute(
+                'INSERT INTO jobs (input, size, mtime_ns, created, updated) VALUES (?, ?, ?, ?, ?)',
+                (signature['path'], signature['size'], signature['mtime_ns'], now, now)
+            )
+            return cursor.lastrowid
+
+    def completed(self, job_id: int, stage: str, params: Dict) -> Optional[Any]:
+        """
+        Stored result of a finished stage, or None when it has to run
+        (never finished, different parameters, or an output is missing or
+        has changed since)
+        """
+        with self._lock:
+            row = self._db.execute(
+                'SELECT status, params_hash, inputs, outputs, result FROM stages '
+                'WHERE job_id = ? AND stage = ?', (job_id, stage)
+            ).fetchone()
+        if not row or row[0] != 'done' or row[1] != _params_hash(params):
+            return None
+
+        for recorded in json.loads(row[2]) + json.loads(row[3]):
+            try:
+                if _file_signature(Path(recorded['path'])) != recorded:
+                    return None
+            except FileNotFoundError:
+                return None
+
+        return _decode(json.loads(row[4]))
+
+    def _set(self, job_id: int, stage: str, **fields):
+        columns = ', '.join(f'{name} = ?' for name in fields)
+        with self._lock, self._db:
+            self._db.execute(f'UPDATE stages SET {columns} WHERE job_id = ? AND stage = ?',
+                             (*fields.values(), job_id, stage))
+
+    def run_stage(self, job_id: int, stage: str, params: Dict, func: Callable[[], Any],
+                  inputs: Optional[List[str]] = None,
+                  outputs: Optional[Callable[[Any], List[Path]]] = None) -> Any:
+        """
+        Run func as a recorded stage, or return the stored result if it's
+        already done and verified
+        inputs: files the stage reads (changes to them force a rerun)
+        outputs: maps the result to the files it produced (default: every Path in it)
+        """
+        cached = self.completed(job_id, stage, params)
+        if cached is not None:
+            print(f"Skipping {stage}: already completed with these settings")
+            return cached
+
+        input_signatures = [_file_signature(Path(f)) for f in (inputs or []) if f and Path(f).exists()]
+        with self._lock, self._db:
+            self._db.execute(
+                'INSERT OR REPLACE INTO stages (job_id, stage, status, params, params_hash, inputs, '
+                'outputs, result, error, started, finished) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (job_id, stage, 'running', json.dumps(params, default=str), _params_hash(params),
+                 json.dumps(input_signatures), '[]', None, None, time.time(), None)
+            )
+
+        try:
+            result = func()
+        except (KeyboardInterrupt, SystemExit, EncodeInterrupted) as e:
+            self._set(job_id, stage, status='interrupted', error=type(e).__name__, finished=time.time())
+            raise
+        except BaseException as e:
+            # Failures caused by a shutdown (a killed ffmpeg) are resumable too
+            status = 'interrupted' if shutdown_requested() else 'failed'
+            self._set(job_id, stage, status=status, error=f"{type(e).__name__}: {e}",
+                      finished=time.time())
+            raise
+
+        produced = (outputs or result_paths)(result)
+        self._set(job_id, stage, status='done', finished=time.time(),
+                  outputs=json.dumps([_file_signature(p) for p in produced if Path(p).exists()]),
+                  result=json.dumps(_encode(result)))
+        return result
+
+    def stages(self, job_id: Optional[int] = None) -> List[Dict]:
+        """Stage records, optionally for one job"""
+        query = ('SELECT jobs.input, stages.job_id, stage, status, error, started, finished '
+                 'FROM stages JOIN jobs ON jobs.id = stages.job_id')
+        args = ()
+        if job_id is not None:
+            query += ' WHERE stages.job_id = ?'
+            args = (job_id,)
+        with self._lock:
+            rows = self._db.execute(query + ' ORDER BY stages.job_id, started', args).fetchall()
+        return [
+            {'input': input_file, 'job_id': jid, 'stage': stage, 'status': status,
+             'error': error, 'started': started, 'finished': finished}
+            for input_file, jid, stage, status, error, started, finished in rows
+        ]
+
+    def reset(self, input_file: str, stage: Optional[str] = None) -> int:
+        """Forget a job's stages (or one stage) so they rerun; returns count removed"""
+        with self._lock, self._db:
+            row = self._db.execute('SELECT id FROM jobs WHERE input = ?',
+                                   (str(Path(input_file).absolute()),)).fetchone()
+            if not row:
+                return 0
+            if stage:
+                cursor = self._db.execute('DELETE FROM stages WHERE job_id = ? AND stage = ?',
+                                          (row[0], stage))
+            else:
+                cursor = self._db.execute('DELETE FROM stages WHERE job_id = ?', (row[0],))
+            return cursor.rowcount
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inspect the workflow job store')
+    parser.add_argument('command', choices=['list', 'reset'])
+    parser.add_argument('input', nargs='?', help='Input video (reset)')
+    parser.add_argument('--stage', default=None, help='Reset only this stage')
+    parser.add_argument('--db', default='../.cache/jobs.db',
+                       help='Job database (default: ../.cache/jobs.db)')
+
+    args = parser.parse_args()
+    store = JobStore(args.db)
+
+    if args.command == 'list':
+        for record in store.stages():
+            elapsed = ''
+            if record['finished'] and record['started']:
+                elapsed = f"{record['finished'] - record['started']:.1f}s"
+            print(f"{Path(record['input']).name:<32} {record['stage']:<20} "
+                  f"{record['status']:<12} {elapsed:>8}  {record['error'] or ''}")
+
+    elif args.command == 'reset':
+        if not args.input:
+            parser.error('reset needs an input video')
+        print(f"Removed {store.reset(args.input, args.stage)} stage record(s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Pre-flight Quality Gate
+Checks inputs against the `quality:` rules in config.yaml (minimum
+resolution and duration, maximum file size) before any encoding starts.
+Only the file's stat and a cached, header-level ffprobe are used, so a bad
+capture is rejected in milliseconds; directories are checked concurrently
+and the result is a JSON report.
+"""
+
+import sys
+import json
+import time
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Optional, List, Dict
+import yaml
+
+# Add parent directory to path to import our modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.probe_cache import ProbeCache, iter_media_files
+
+# Container duration and stream dimensions only: ffprobe reads the headers
+# and stops, no packets are decoded
+PROBE_ENTRIES = 'format=duration:stream=codec_type,width,height'
+
+VIDEO_EXTENSIONS = ['.mp4', '.mov', '.avi', '.mkv', '.webm', '.flv', '.wmv', '.m4v']
+
+
+class PreflightError(Exception):
+    """An input failed the quality rules"""
+
+    def __init__(self, result: Dict):
+        self.result = result
+        super().__init__(f"{Path(result['file']).name} failed pre-flight: "
+                         f"{'; '.join(result['errors'])}")
+
+
+@dataclass
+class QualityRules:
+    """The `quality:` config block; None disables a rule"""
+    min_width: Optional[int] = None
+    min_height: Optional[int] = None
+    min_duration: Optional[float] = None   # seconds
+    max_file_size: Optional[float] = None  # MB
+
+    @classmethod
+    def from_config(cls, config: Dict) -> 'QualityRules':
+        quality = config.get('quality') or {}
+        return cls(**{name: quality.get(name) for name in cls.__dataclass_fields__})
+
+
+def check_file(media_file: str, rules: QualityRules,
+               probe_cache: Optional[ProbeCache] = None) -> Dict:
+    """
+    Check one file; returns {'file', 'ok', 'errors', 'width', 'height',
+    'duration', 'size_mb', 'elapsed_ms'}
+    """
+    start = time.perf_counter()
+    result = {'file': str(media_file), 'ok': False, 'errors': [], 'width': None,
+              'height': None, 'duration': None, 'size_mb': None}
+
+    def finish() -> Dict:
+        result['ok'] = not result['errors']
+        result['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 2)
+        return result
+
+    # File size comes from stat alone: an oversized file never gets probed
+    try:
+        result['size_mb'] = round(Path(media_file).stat().st_size / (1024 * 1024), 2)
+    except OSError as e:
+        result['errors'].append(f"cannot read file: {e.strerror or e}")
+        return finish()
+    if rules.max_file_size and result['size_mb'] > rules.max_file_size:
+        result['errors'].append(f"file size {result['size_mb']}MB > {rules.max_file_size}MB")
+        return finish()
+
+    try:
+        info = (probe_cache or ProbeCache.default()).probe(str(media_file), PROBE_ENTRIES)
+    except (subprocess.CalledProcessError, OSError, ValueError) as e:
+        result['errors'].append(f"not a readable media file ({type(e).__name__})")
+        return finish()
+
+    video = next((stream for stream in info.get('streams', [])
+                  if stream.get('codec_type') == 'video'), None)
+    if video is None:
+        result['errors'].append("no video stream")
+    else:
+        result['width'], result['height'] = video.get('width'), video.get('height')
+        if rules.min_width and (result['width'] or 0) < rules.min_width:
+            result['errors'].append(f"width {result['width']} < {rules.min_width}")
+        if rules.min_height and (result['height'] or 0) < rules.min_height:
+            result['errors'].append(f"height {result['height']} < {rules.min_height}")
+
+    try:
+        result['duration'] = round(float(info['format']['duration']), 3)
+    except (KeyError, TypeError, ValueError):
+        pass
+    if rules.min_duration:
+        if result['duration'] is None:
+            result['errors'].append("duration not in container header")
+        elif result['duration'] < rules.min_duration:
+            result['errors'].append(f"duration {result['duration']}s < {rules.min_duration}s")
+
+    return finish()
+
+
+def preflight(media_files: List[str], rules: QualityRules, workers: int = 8,
+              probe_cache: Optional[ProbeCache] = None) -> Dict:
+    """Check files concurrently; returns the report (files in input order)"""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        results = list(executor.map(lambda f: check_file(f, rules, probe_cache), media_files))
+
+    failed = [result for result in results if not result['ok']]
+    return {
+        'rules': asdict(rules),
+        'checked': len(results),
+        'passed': len(results) - len(failed),
+        'failed': len(failed),
+        'elapsed_ms': round((time.perf_counter() - start) * 1000, 2),
+        'files': results
+    }
+
+
+def require(media_file: str, rules: QualityRules,
+            probe_cache: Optional[ProbeCache] = None) -> Dict:
+    """check_file that raises PreflightError on failure"""
+    result = check_file(media_file, rules, probe_cache)
+    if not result['ok']:
+        raise PreflightError(result)
+    return result
+
+
+def print_report(report: Dict):
+    """Human-readable pass/fail lines"""
+    for result in report['files']:
+        name = Path(result['file']).name
+        if result['ok']:
+            size = f"{result['width']}x{result['height']}" if result['width'] else '?'
+            print(f"  ✓ {name}: {size}, {result['duration']}s, {result['size_mb']}MB")
+        else:
+            print(f"  ✗ {name}: {'; '.join(result['errors'])}")
+    print(f"Pre-flight: {report['passed']}/{report['checked']} passed "
+          f"in {report['elapsed_ms']:.0f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check videos against the quality: rules')
+    parser.add_argument('paths', nargs='+', help='Video files or directories')
+    parser.add_argument('--recursive', action='store_true', help='Recurse into directories')
+    parser.add_argument('--workers', type=int, default=8, help='Concurrent checks')
+    parser.add_argument('--config', default='../config.yaml',
+                        help='Config file path (default: ../config.yaml)')
+    parser.add_argument('--json', metavar='REPORT_JSON', default=None,
+                        help='Write the report as JSON ("-" for stdout)')
+    parser.add_argument('--cache', default='../.cache/probe.db',
+                        help='Probe cache database (default: ../.cache/probe.db)')
+
+    args = parser.parse_args()
+
+    config_path = Path(__file__).parent / args.config
+    with open(config_path, 'r') as f:
+        rules = QualityRules.from_config(yaml.safe_load(f) or {})
+
+    media_files = []
+    for path in args.paths:
+        if Path(path).is_dir():
+            media_files.extend(f for f in iter_media_files(path, args.recursive)
+                               if f.suffix.lower() in VIDEO_EXTENSIONS)
+        else:
+            media_files.append(Path(path))
+
+    report = preflight([str(f) for f in media_files], rules, args.workers, ProbeCache(args.cache))
+
+    if args.json == '-':
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+        if args.json:
+            Path(args.json).write_text(json.dumps(report, indent=2))
+            print(f"Report written to {args.json}")
+
+    if report['failed']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Persistent ffprobe Metadata Cache
+Memoizes ffprobe results on disk, keyed by path, size, mtime and inode,
+and probes whole directories concurrently with JSONL output
+"""
+
+import os
+import sys
+import json
+import sqlite3
+import argparse
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Optional, List, Dict, Iterator
+
+MEDIA_EXTENSIONS = ['.mp4', '.mov', '.avi', '.mkv', '.webm', '.flv', '.wmv', '.m4v',
+                    '.mp3', '.wav', '.aac', '.flac', '.m4a']
+
+
+def run_ffprobe(media_file: str, entries: Optional[str] = None) -> Dict:
+    """
+    Run ffprobe and return its JSON output
+    entries: ffprobe -show_entries spec (e.g. "format=duration:stream=width,height");
+             None fetches every format and stream field
+    """
+    cmd = ['ffprobe', '-v', 'quiet', '-print_format', 'json']
+    if entries:
+        cmd += ['-show_entries', entries]
+    else:
+        cmd += ['-show_format', '-show_streams']
+    cmd.append(str(media_file))
+
+    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout)
+
+
+def iter_media_files(directory: str, recursive: bool = False) -> Iterator[Path]:
+    """Yield media files in a directory"""
+    pattern = '**/*' if recursive else '*'
+    for path in sorted(Path(directory).glob(pattern)):
+        if path.is_file() and path.suffix.lower() in MEDIA_EXTENSIONS:
+            yield path
+
+
+class ProbeCache:
+    """On-disk memo of ffprobe results"""
+
+    _default = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, db_path: str = "../.cache/probe.db"):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        with self._db:
+            self._db.execute('''
+                CREATE TABLE IF NOT EXISTS probes (
+                    path TEXT,
+                    entries TEXT,
+                    size INTEGER,
+                    mtime_ns INTEGER,
+                    inode INTEGER,
+                    result TEXT,
+                    PRIMARY KEY (path, entries)
+                )
+            ''')
+
+    @classmethod
+    def default(cls) -> 'ProbeCache':
+        """Process-wide cache at the default location"""
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls()
+            return cls._default
+
+    def probe(self, media_file: str, entries: Optional[str] = None) -> Dict:
+        """ffprobe a file, returning the cached result when the file is unchanged"""
+        path = Path(media_file).absolute()
+        stat = path.stat()
+        signature = (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+        entries_key = entries or '*'
+
+        with self._lock:
+            row = self._db.execute(
+                'SELECT size, mtime_ns, inode, result FROM probes WHERE path = ? AND entries = ?',
+                (str(path), entries_key)
+            ).fetchone()
+        if row and row[:3] == signature:
+            return json.loads(row[3])
+
+        info = run_ffprobe(str(path), entries)
+        with self._lock, self._db:
+            self._db.execute(
+                'INSERT OR REPLACE INTO probes VALUES (?, ?, ?, ?, ?, ?)',
+                (str(path), entries_key, *signature, json.dumps(info))
+            )
+        return info
+
+    def probe_many(self, media_files: List[str], entries: Optional[str] = None,
+                   workers: int = 8) -> Iterator[Dict]:
+        """
+        Probe many files concurrently, yielding results as they complete
+        Each result is {'file': path, 'info': {...}} or {'file': path, 'error': msg}
+        """
+        def probe_one(media_file):
+            try:
+                return {'file': str(media_file), 'info': self.probe(media_file, entries)}
+            except (subprocess.CalledProcessError, OSError, ValueError) as e:
+                return {'file': str(media_file), 'error': f"{type(e).__name__}: {e}"}
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(probe_one, f) for f in media_files]
+            for future in as_completed(futures):
+                yield future.result()
+
+    def prune(self) -> int:
+        """Drop entries for files that no longer exist; returns count removed"""
+        with self._lock:
+            paths = [row[0] for row in self._db.execute('SELECT DISTINCT path FROM probes')]
+        missing = [(p,) for p in paths if not os.path.exists(p)]
+        with self._lock, self._db:
+            self._db.executemany('DELETE FROM probes WHERE path = ?', missing)
+        return len(missing)
+
+
+def write_jsonl(results: Iterator[Dict], stream=None):
+    """Stream probe results as one JSON object per line"""
+    stream = stream or sys.stdout
+    for result in results:
+        stream.write(json.dumps(result) + '\n')
+        stream.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Probe media files concurrently, output JSONL')
+    parser.add_argument('paths', nargs='+', help='Media files or directories')
+    parser.add_argument('--entries', default=None,
+                       help='ffprobe -show_entries spec, e.g. "format=duration:stream=width,height"')
+    parser.add_argument('--workers', type=int, default=8, help='Concurrent ffprobe processes')
+    parser.add_argument('--recursive', action='store_true', help='Recurse into directories')
+    parser.add_argument('--cache', default='../.cache/probe.db',
+                       help='Cache database (default: ../.cache/probe.db)')
+
+    args = parser.parse_args()
+
+    media_files = []
+    for path in args.paths:
+        if Path(path).is_dir():
+            media_files.extend(iter_media_files(path, args.recursive))
+        else:
+            media_files.append(Path(path))
+
+    cache = ProbeCache(args.cache)
+    write_jsonl(cache.probe_many(media_files, args.entries, args.workers))
+
+
+if __name__ == '__main__':
+    main()
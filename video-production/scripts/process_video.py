@@ -7,47 +7,307 @@ Handles common video processing tasks for tutorial content
 import subprocess
 import os
 import sys
+import time
+import shutil
 import json
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Callable, Generator, Tuple, Any
+
+# Allow running as a script as well as importing from the toolkit root
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.render_cache import RenderCache
+from scripts.probe_cache import ProbeCache, iter_media_files, write_jsonl
+from scripts.encoder_tuning import EncoderTuner
+from scripts.ffmpeg_progress import (
+    ProgressCallback,
+    RunSummary,
+    format_summary,
+    install_signal_handlers,
+    kill_active_processes,
+    run_ffmpeg,
+)
+from scripts.tracing import span
+
+# Renditions produced by create_youtube_formats when none are configured
+DEFAULT_FORMATS = [
+    {'name': '1080p', 'width': 1920, 'height': 1080},
+    {'name': '720p', 'width': 1280, 'height': 720},
+]
+
+# Overlay coordinates for each watermark position
+WATERMARK_POSITIONS = {
+    'top-left': '10:10',
+    'top-right': 'W-w-10:10',
+    'bottom-left': '10:H-h-10',
+    'bottom-right': 'W-w-10:H-h-10'
+}
+
+
+def parse_timestamp(value) -> float:
+    """Convert seconds or "HH:MM:SS(.ms)" / "MM:SS" to seconds"""
+    if isinstance(value, (int, float)):
+        return float(value)
+
+    seconds = 0.0
+    for part in str(value).strip().split(':'):
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+
+def ladder_work_factor(video_stream: Dict, formats: List[Dict]) -> float:
+    """
+    Pixels encoded per source pixel when every rendition comes from one
+    decode, for scaling the speed a tuned preset must reach
+    """
+    source_pixels = video_stream.get('width', 0) * video_stream.get('height', 0)
+    ladder_pixels = sum(fmt['width'] * fmt['height'] for fmt in formats)
+    return ladder_pixels / source_pixels if source_pixels else 1.0
+
+
+def escape_filter_path(path: str) -> str:
+    """Escape a file path for use inside an FFmpeg filter argument"""
+    return str(Path(path).absolute()).replace('\\', '/').replace(':', '\\:')
+
+
+def write_concat_list(files: List[Path], list_file: Path) -> Path:
+    """Write an ffmpeg concat demuxer list (use with -f concat -safe 0)"""
+    with open(list_file, 'w') as f:
+        for path in files:
+            escaped = str(Path(path).absolute()).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+    return list_file
+
+
+@dataclass
+class FFmpegStep:
+    """
+    One ffmpeg run requested by an operation
+    Operations are generators that yield steps (or ParallelSteps) and are
+    sent back each run's RunSummary, so the same operation code drives the
+    blocking VideoProcessor methods and their AsyncVideoProcessor
+    counterparts (scripts/async_processing.py)
+    """
+    cmd: List[str]
+    outputs: List[Path]
+    inputs: Optional[List[str]] = None
+    operation: str = ''
+    duration: Optional[float] = None
+    then: Optional[Callable[[], None]] = None  # after ffmpeg succeeds (checkpoints)
+
+
+@dataclass
+class ParallelSteps:
+    """Independent steps to run concurrently, at most `workers` at a time"""
+    steps: List[FFmpegStep]
+    workers: int
+
+
+# An operation: yields FFmpegStep/ParallelSteps, returns the operation's result
+Steps = Generator[Any, Any, Any]
+
+
+def resume_steps(steps: Steps, result: Any = None,
+                 error: Optional[BaseException] = None) -> Tuple[bool, Any]:
+    """
+    Resume an operation with the last step's result, or raise the step's
+    exception inside it. Returns (finished, next step or return value).
+    """
+    try:
+        step = steps.throw(error) if error is not None else steps.send(result)
+    except StopIteration as done:
+        return True, done.value
+    return False, step
+
 
 class VideoProcessor:
-    def __init__(self, input_file: str, output_dir: str = "../processed-videos"):
+    def __init__(self, input_file: str, output_dir: str = "../processed-videos",
+                 threads: Optional[int] = None, cache: Optional[RenderCache] = None,
+                 probe_cache: Optional[ProbeCache] = None,
+                 progress_callback: Optional[ProgressCallback] = None):
         self.input_file = Path(input_file)
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        # Encoder thread cap; None lets ffmpeg use every core
+        self.threads = threads
+        # Optional RenderCache; unchanged renders are reused instead of re-encoded
+        self.cache = cache
+        self.probe_cache = probe_cache
+        # Progress events from every ffmpeg run go to these callbacks, and
+        # each run's RunSummary is appended to self.summaries
+        self.progress_callbacks = [progress_callback] if progress_callback else []
+        self.summaries: List[RunSummary] = []
+        self._duration = None
 
         if not self.input_file.exists():
             raise FileNotFoundError(f"Input file not found: {input_file}")
 
-    def get_video_info(self) -> Dict:
-        """Get video metadata using ffprobe"""
-        cmd = [
-            'ffprobe',
-            '-v', 'quiet',
-            '-print_format', 'json',
-            '-show_format',
-            '-show_streams',
-            str(self.input_file)
-        ]
+    def _thread_args(self) -> List[str]:
+        """ffmpeg -threads option when a thread cap is set"""
+        return ['-threads', str(self.threads)] if self.threads else []
+
+    def _drive(self, steps: Steps) -> Any:
+        """Run an operation's steps with blocking ffmpeg runs and return its result"""
+        result = error = None
+        while True:
+            finished, step = resume_steps(steps, result, error)
+            if finished:
+                return step
+            try:
+                result, error = self._execute(step), None
+            except Exception as e:
+                result, error = None, e
+            except BaseException:
+                # Interrupted: let the operation clean up, then stop
+                steps.close()
+                raise
+
+    def _execute(self, step) -> Any:
+        """Run one FFmpegStep (its RunSummary) or ParallelSteps (a list of them)"""
+        if isinstance(step, ParallelSteps):
+            with ThreadPoolExecutor(max_workers=step.workers) as executor:
+                # Copy the context so the steps' processes join the caller's process_scope
+                futures = [executor.submit(contextvars.copy_context().run, self._execute, s)
+                           for s in step.steps]
+                try:
+                    return [future.result() for future in futures]
+                except KeyboardInterrupt:
+                    # Steps run in their own sessions; stop them too
+                    kill_active_processes()
+                    raise
+
+        summary = self._run(step.cmd, step.outputs, step.inputs, step.operation, step.duration)
+        if step.then:
+            step.then()
+        return summary
+
+    def run_command(self, cmd: List[str], outputs: List[Path],
+                    inputs: Optional[List[str]] = None, operation: str = 'ffmpeg') -> RunSummary:
+        """
+        Run a prepared ffmpeg command (e.g. a FilterGraphPlanner plan) with
+        the progress, render cache and summaries of the built-in operations
+        inputs: files besides the input video that the command reads
+        """
+        return self._execute(FFmpegStep(cmd, list(outputs), inputs=inputs, operation=operation))
+
+    def _run(self, cmd: List[str], outputs: List[Path],
+             inputs: Optional[List[str]] = None, operation: str = '',
+             duration: Optional[float] = None) -> RunSummary:
+        """
+        Run an ffmpeg command with progress telemetry, reusing a cached
+        render when one matches. Commands whose outputs aren't known up
+        front (outputs=[]) always run.
+        duration: expected output length for percent/ETA (defaults to the input's)
+        """
+        with span(operation or 'ffmpeg', 'ffmpeg', input=str(self.input_file)) as trace:
+            summary = self._run_cached(cmd, outputs, inputs, operation, duration)
+            trace.set(cache_hit=summary.cache_hit, realtime_factor=summary.realtime_factor)
+            if summary.user_time is not None:
+                trace.set_child_usage(summary.user_time + summary.system_time,
+                                      summary.peak_rss_kb)
+        return summary
+
+    def _run_cached(self, cmd: List[str], outputs: List[Path], inputs: Optional[List[str]],
+                    operation: str, duration: Optional[float]) -> RunSummary:
+        """Cache lookup, then the ffmpeg run itself"""
+        key, summary = self._cache_lookup(cmd, outputs, inputs, operation)
+        if summary:
+            return summary
+
+        summary = run_ffmpeg(cmd, operation, duration or self._input_duration(),
+                             outputs, self.progress_callbacks)
+        return self._record(summary, key, outputs, operation)
+
+    def _cache_lookup(self, cmd: List[str], outputs: List[Path], inputs: Optional[List[str]],
+                      operation: str) -> Tuple[Optional[str], Optional[RunSummary]]:
+        """(cache key or None when uncached, cache-hit summary or None)"""
+        if not (self.cache and outputs):
+            return None, None
+
+        start = time.perf_counter()
+        input_files = [self.input_file] + [Path(f) for f in (inputs or []) if f]
+        key = self.cache.make_key(cmd, input_files, outputs)
+        if self.cache.lookup(key, outputs):
+            print(f"Reusing cached render for {operation}")
+            summary = RunSummary(operation, time.perf_counter() - start, cache_hit=True,
+                                 outputs=[str(p) for p in outputs])
+            self.summaries.append(summary)
+            return key, summary
+
+        # Outputs may be hard links into the cache; never overwrite in place
+        for output in outputs:
+            Path(output).unlink(missing_ok=True)
+        return key, None
+
+    def _record(self, summary: RunSummary, key: Optional[str], outputs: List[Path],
+                operation: str) -> RunSummary:
+        """Store a finished render in the cache and keep its summary"""
+        if key:
+            self.cache.store(key, outputs, operation)
+
+        self.summaries.append(summary)
+        print(format_summary(summary))
+        return summary
+
+    def _input_duration(self) -> Optional[float]:
+        """Input duration in seconds (for progress ETA), or None if unknown"""
+        if self._duration is None:
+            probe_cache = self.probe_cache or ProbeCache.default()
+            try:
+                info = probe_cache.probe(str(self.input_file), 'format=duration')
+                self._duration = float(info.get('format', {}).get('duration', 0))
+            except (subprocess.CalledProcessError, OSError, ValueError):
+                self._duration = 0.0
+        return self._duration or None
+
+    @property
+    def last_summary(self) -> Optional[RunSummary]:
+        """Summary of the most recent ffmpeg operation"""
+        return self.summaries[-1] if self.summaries else None
+
+    def get_video_info(self, entries: Optional[str] = None) -> Dict:
+        """
+        Get video metadata using ffprobe
+        Results are memoized on disk and reused until the file changes
+        entries: optional -show_entries spec to fetch only some fields
+        """
+        return self._video_info(entries)
+
+    def _video_info(self, entries: Optional[str] = None) -> Dict:
+        probe_cache = self.probe_cache or ProbeCache.default()
 
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            return json.loads(result.stdout)
-        except subprocess.CalledProcessError as e:
+            return probe_cache.probe(str(self.input_file), entries)
+        except (subprocess.CalledProcessError, ValueError) as e:
             print(f"Error getting video info: {e}")
             return {}
 
     def compress_video(self, output_name: Optional[str] = None,
-                       crf: int = 23, preset: str = 'medium') -> Path:
+                       crf: int = 23, preset: str = 'medium',
+                       target_speed: Optional[float] = None,
+                       deadline: Optional[float] = None) -> Path:
         """
         Compress video using H.264 codec
         CRF: 18-28 (lower = better quality, 23 is default)
-        Preset: ultrafast, fast, medium, slow, veryslow
+        Preset: ultrafast, fast, medium, slow, veryslow, or "auto" to pick
+                the slowest preset that meets target_speed (realtime
+                factor) or deadline (seconds) on this machine
         """
+        return self._drive(self._compress_video_steps(output_name, crf, preset,
+                                                      target_speed, deadline))
+
+    def _compress_video_steps(self, output_name: Optional[str], crf: int, preset: str,
+                              target_speed: Optional[float], deadline: Optional[float]) -> Steps:
         if not output_name:
             output_name = f"{self.input_file.stem}_compressed.mp4"
 
+        if preset == 'auto':
+            preset = EncoderTuner.default().choose(str(self.input_file), crf, target_speed,
+                                                   deadline, self.threads)
+
         output_file = self.output_dir / output_name
 
         cmd = [
@@ -58,32 +318,257 @@ class VideoProcessor:
             '-preset', preset,
             '-c:a', 'aac',
             '-b:a', '128k',
+            *self._thread_args(),
             '-y',
             str(output_file)
         ]
 
         print(f"Compressing video with CRF={crf}, preset={preset}...")
-        subprocess.run(cmd, check=True)
+        yield FFmpegStep(cmd, [output_file], operation='compress')
         print(f"Compressed video saved to: {output_file}")
         return output_file
 
+    def compress_video_chunked(self, output_name: Optional[str] = None,
+                               crf: int = 23, preset: str = 'medium',
+                               chunks: Optional[int] = None,
+                               workers: Optional[int] = None,
+                               min_chunk_seconds: float = 30.0,
+                               target_speed: Optional[float] = None,
+                               deadline: Optional[float] = None) -> Path:
+        """
+        Compress a long recording as concurrently encoded chunks
+        The source is split at keyframes (stream copy), every chunk is
+        encoded by its own ffmpeg process, audio is encoded once in
+        parallel, and the results are stitched losslessly with the concat
+        demuxer. Finished chunks are checkpointed in a work directory next
+        to the output, so a rerun after a crash only encodes what's missing.
+        chunks: segment count (default: 2 per worker, at least min_chunk_seconds each)
+        workers: concurrent encodes (default: one per 8 cores, x264's scaling limit)
+        preset "auto" is tuned per chunk encode, sharing the target across workers
+        """
+        return self._drive(self._compress_video_chunked_steps(
+            output_name, crf, preset, chunks, workers, min_chunk_seconds, target_speed, deadline))
+
+    def _compress_video_chunked_steps(self, output_name: Optional[str], crf: int, preset: str,
+                                      chunks: Optional[int], workers: Optional[int],
+                                      min_chunk_seconds: float, target_speed: Optional[float],
+                                      deadline: Optional[float]) -> Steps:
+        if not output_name:
+            output_name = f"{self.input_file.stem}_compressed.mp4"
+        output_file = self.output_dir / output_name
+
+        cpu_count = os.cpu_count() or 1
+        workers = workers or max(2, cpu_count // 8)
+        duration = self._input_duration()
+        if not duration:
+            print("Video duration unknown, can't place chunk boundaries; encoding in one pass")
+            return (yield from self._compress_video_steps(output_name, crf, preset,
+                                                          target_speed, deadline))
+        if chunks is None:
+            chunks = min(workers * 2, int(duration // min_chunk_seconds))
+        if chunks < 2:
+            print("Video too short to split, encoding in one pass")
+            return (yield from self._compress_video_steps(output_name, crf, preset,
+                                                          target_speed, deadline))
+
+        threads = self.threads or max(1, cpu_count // workers)
+        if preset == 'auto':
+            preset = EncoderTuner.default().choose(str(self.input_file), crf, target_speed, deadline,
+                                                   threads, work_factor=1 / workers)
+
+        work_dir = self._chunk_work_dir(output_file, {'crf': crf, 'preset': preset, 'chunks': chunks})
+        segments = yield from self._split_at_keyframes(work_dir, duration, chunks)
+        has_audio = self._has_audio()
+
+        pending = [seg for seg in segments if not seg['done'].exists()]
+        print(f"Encoding {len(segments)} chunks with {workers} worker(s), {threads} thread(s) each "
+              f"({len(segments) - len(pending)} already done)")
+
+        steps = [self._chunk_step(seg, crf, preset, threads) for seg in pending]
+        if has_audio and not (work_dir / 'audio.done').exists():
+            steps.append(self._chunk_audio_step(work_dir))
+        yield ParallelSteps(steps, workers)
+
+        return (yield from self._stitch_chunks(segments, work_dir, has_audio, output_file))
+
+    def split_chunks(self, output_file: Path, chunks: int, settings: Dict) -> Dict:
+        """
+        Split the input at keyframes for a chunked encode whose chunks are
+        encoded elsewhere (see encode_queue.py)
+        Returns {'work_dir', 'segments', 'has_audio'}; each segment has the
+        source, partial, encoded and done paths of its chunk. The settings
+        identify the encode: a rerun with the same ones resumes, exactly
+        like compress_video_chunked.
+        """
+        duration = self._input_duration()
+        if not duration:
+            raise ValueError(f"Unknown duration, can't split {self.input_file} into chunks")
+        work_dir = self._chunk_work_dir(output_file, dict(settings, chunks=chunks))
+        segments = self._drive(self._split_at_keyframes(work_dir, duration, chunks))
+        return {'work_dir': work_dir, 'segments': segments, 'has_audio': self._has_audio()}
+
+    def encode_chunk_audio(self, split: Dict):
+        """Encode the audio track for a split_chunks() result, unless already done"""
+        if split['has_audio'] and not (split['work_dir'] / 'audio.done').exists():
+            self._execute(self._chunk_audio_step(split['work_dir']))
+
+    def stitch_chunks(self, split: Dict, output_file: Path) -> Path:
+        """Stitch the encoded chunks of a split_chunks() result into output_file"""
+        return self._drive(self._stitch_chunks(split['segments'], split['work_dir'],
+                                               split['has_audio'], output_file))
+
+    def _chunk_step(self, seg: Dict, crf: int, preset: str, threads: int) -> FFmpegStep:
+        """Encode one segment, checkpointing it once ffmpeg succeeds"""
+        def checkpoint():
+            seg['partial'].replace(seg['encoded'])
+            seg['done'].touch()
+
+        return FFmpegStep(self.chunk_encode_cmd(seg, crf, preset, threads), [],
+                          operation=f"chunk {seg['index']}", duration=seg['duration'],
+                          then=checkpoint)
+
+    @staticmethod
+    def chunk_encode_cmd(seg: Dict, crf: int, preset: str, threads: int) -> List[str]:
+        """ffmpeg command encoding one split segment to its .partial file"""
+        return [
+            'ffmpeg',
+            '-i', str(seg['source']),
+            '-an',
+            '-c:v', 'libx264',
+            '-crf', str(crf),
+            '-preset', preset,
+            '-threads', str(threads),
+            '-y',
+            str(seg['partial'])
+        ]
+
+    def _chunk_audio_step(self, work_dir: Path) -> FFmpegStep:
+        """Encode the whole audio track once for the stitched output"""
+        partial = work_dir / 'audio.partial.m4a'
+        cmd = [
+            'ffmpeg',
+            '-i', str(self.input_file),
+            '-vn',
+            '-c:a', 'aac',
+            '-b:a', '128k',
+            '-y',
+            str(partial)
+        ]
+
+        def checkpoint():
+            partial.replace(work_dir / 'audio.m4a')
+            (work_dir / 'audio.done').touch()
+
+        return FFmpegStep(cmd, [], operation='chunk audio', then=checkpoint)
+
+    def _stitch_chunks(self, segments: List[Dict], work_dir: Path, has_audio: bool,
+                       output_file: Path) -> Steps:
+        """Concatenate encoded chunks (plus audio) without re-encoding"""
+        concat_list = write_concat_list([seg['encoded'] for seg in segments],
+                                        work_dir / 'concat_list.txt')
+        # Stitched inside the work directory and then moved into place: the
+        # output may be a hard link into the render cache from an earlier
+        # compress, and must never be overwritten in place
+        stitched = work_dir / f"stitched{output_file.suffix}"
+        cmd = ['ffmpeg', '-f', 'concat', '-safe', '0', '-i', str(concat_list)]
+        if has_audio:
+            cmd += ['-i', str(work_dir / 'audio.m4a'), '-map', '0:v', '-map', '1:a']
+        cmd += ['-c', 'copy', '-movflags', '+faststart', '-y', str(stitched)]
+
+        print("Stitching chunks...")
+        yield FFmpegStep(cmd, [], operation='chunk stitch')
+        os.replace(stitched, output_file)
+        shutil.rmtree(work_dir, ignore_errors=True)
+        print(f"Compressed video saved to: {output_file}")
+        return output_file
+
+    def _has_audio(self) -> bool:
+        streams = self._video_info('stream=codec_type').get('streams', [])
+        return any(stream.get('codec_type') == 'audio' for stream in streams)
+
+    def _chunk_work_dir(self, output_file: Path, settings: Dict) -> Path:
+        """
+        Checkpoint directory for a chunked encode
+        Reused when the source and settings match the previous attempt,
+        otherwise wiped so stale chunks are never stitched
+        """
+        work_dir = self.output_dir / f".{output_file.stem}_chunks"
+        stat = self.input_file.stat()
+        manifest = dict(settings, source=str(self.input_file.absolute()),
+                        size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+
+        manifest_file = work_dir / 'manifest.json'
+        try:
+            with open(manifest_file) as f:
+                if json.load(f) == manifest:
+                    print(f"Resuming chunked encode from {work_dir}")
+                    return work_dir
+        except (OSError, ValueError):
+            pass
+
+        shutil.rmtree(work_dir, ignore_errors=True)
+        work_dir.mkdir(parents=True)
+        with open(manifest_file, 'w') as f:
+            json.dump(manifest, f)
+        return work_dir
+
+    def _split_at_keyframes(self, work_dir: Path, duration: float, chunks: int) -> Steps:
+        """
+        Split the video stream into roughly equal segments (stream copy)
+        The segment muxer cuts at the first keyframe after each requested
+        time, so every segment decodes on its own
+        """
+        segment_list = work_dir / 'segments.csv'
+        if not (work_dir / 'split.done').exists():
+            times = [duration * i / chunks for i in range(1, chunks)]
+            cmd = [
+                'ffmpeg',
+                '-i', str(self.input_file),
+                '-map', '0:v:0',
+                '-c', 'copy',
+                '-f', 'segment',
+                '-segment_times', ','.join(f'{t:.3f}' for t in times),
+                '-segment_list', str(segment_list),
+                '-segment_list_type', 'csv',
+                '-reset_timestamps', '1',
+                '-y',
+                str(work_dir / 'source_%04d.mp4')
+            ]
+            print(f"Splitting into {chunks} chunks at keyframes...")
+            yield FFmpegStep(cmd, [], operation='chunk split')
+            (work_dir / 'split.done').touch()
+
+        # Each line: filename,start,end in source time
+        segments = []
+        with open(segment_list) as f:
+            for index, line in enumerate(f):
+                name, start, end = line.strip().rsplit(',', 2)
+                segments.append({
+                    'index': index,
+                    'source': work_dir / name,
+                    'encoded': work_dir / f'encoded_{index:04d}.mp4',
+                    'partial': work_dir / f'encoded_{index:04d}.partial.mp4',
+                    'done': work_dir / f'encoded_{index:04d}.done',
+                    'duration': float(end) - float(start)
+                })
+        return segments
+
     def add_intro_outro(self, intro_file: Optional[str] = None,
                         outro_file: Optional[str] = None,
                         output_name: Optional[str] = None) -> Path:
         """Concatenate intro, main video, and outro"""
+        return self._drive(self._add_intro_outro_steps(intro_file, outro_file, output_name))
+
+    def _add_intro_outro_steps(self, intro_file: Optional[str], outro_file: Optional[str],
+                               output_name: Optional[str]) -> Steps:
         if not output_name:
             output_name = f"{self.input_file.stem}_final.mp4"
 
         output_file = self.output_dir / output_name
 
         # Create concat file list
-        concat_list = self.output_dir / 'concat_list.txt'
-        with open(concat_list, 'w') as f:
-            if intro_file and Path(intro_file).exists():
-                f.write(f"file '{Path(intro_file).absolute()}'\n")
-            f.write(f"file '{self.input_file.absolute()}'\n")
-            if outro_file and Path(outro_file).exists():
-                f.write(f"file '{Path(outro_file).absolute()}'\n")
+        segments = [f for f in (intro_file, self.input_file, outro_file) if f and Path(f).exists()]
+        concat_list = write_concat_list(segments, self.output_dir / 'concat_list.txt')
 
         cmd = [
             'ffmpeg',
@@ -96,7 +581,7 @@ class VideoProcessor:
         ]
 
         print("Adding intro/outro...")
-        subprocess.run(cmd, check=True)
+        yield FFmpegStep(cmd, [output_file], inputs=[intro_file, outro_file], operation='intro_outro')
         concat_list.unlink()  # Clean up
         print(f"Final video saved to: {output_file}")
         return output_file
@@ -107,20 +592,16 @@ class VideoProcessor:
         Add watermark to video
         Position: top-left, top-right, bottom-left, bottom-right
         """
+        return self._drive(self._add_watermark_steps(watermark_file, position, output_name))
+
+    def _add_watermark_steps(self, watermark_file: str, position: str,
+                             output_name: Optional[str]) -> Steps:
         if not output_name:
             output_name = f"{self.input_file.stem}_watermarked.mp4"
 
         output_file = self.output_dir / output_name
 
-        # Position mapping
-        positions = {
-            'top-left': '10:10',
-            'top-right': 'W-w-10:10',
-            'bottom-left': '10:H-h-10',
-            'bottom-right': 'W-w-10:H-h-10'
-        }
-
-        overlay_pos = positions.get(position, 'W-w-10:H-h-10')
+        overlay_pos = WATERMARK_POSITIONS.get(position, WATERMARK_POSITIONS['bottom-right'])
 
         cmd = [
             'ffmpeg',
@@ -128,17 +609,21 @@ class VideoProcessor:
             '-i', watermark_file,
             '-filter_complex', f'[1:v]scale=120:-1[wm];[0:v][wm]overlay={overlay_pos}',
             '-c:a', 'copy',
+            *self._thread_args(),
             '-y',
             str(output_file)
         ]
 
         print(f"Adding watermark at {position}...")
-        subprocess.run(cmd, check=True)
+        yield FFmpegStep(cmd, [output_file], inputs=[watermark_file], operation='watermark')
         print(f"Watermarked video saved to: {output_file}")
         return output_file
 
     def extract_audio(self, output_name: Optional[str] = None) -> Path:
         """Extract audio track from video"""
+        return self._drive(self._extract_audio_steps(output_name))
+
+    def _extract_audio_steps(self, output_name: Optional[str]) -> Steps:
         if not output_name:
             output_name = f"{self.input_file.stem}_audio.mp3"
 
@@ -150,20 +635,31 @@ class VideoProcessor:
             '-vn',
             '-acodec', 'libmp3lame',
             '-q:a', '2',
+            *self._thread_args(),
             '-y',
             str(output_file)
         ]
 
         print("Extracting audio...")
-        subprocess.run(cmd, check=True)
+        yield FFmpegStep(cmd, [output_file], operation='extract_audio')
         print(f"Audio saved to: {output_file}")
         return output_file
 
-    def create_clips(self, timestamps: List[tuple], output_prefix: str = "clip") -> List[Path]:
+    def create_clips(self, timestamps: List[tuple], output_prefix: str = "clip",
+                     single_pass: bool = False) -> List[Path]:
         """
         Create multiple clips from timestamps
         timestamps: [(start, end), ...] in format "HH:MM:SS" or seconds
+        single_pass: read the input once for all clips (see create_clips_single_pass)
         """
+        return self._drive(self._create_clips_steps(timestamps, output_prefix, single_pass))
+
+    def _create_clips_steps(self, timestamps: List[tuple], output_prefix: str,
+                            single_pass: bool) -> Steps:
+        if single_pass:
+            clips = yield from self._create_clips_single_pass_steps(timestamps, output_prefix)
+            return [clip['file'] for clip in clips]
+
         clips = []
 
         for i, (start, end) in enumerate(timestamps, 1):
@@ -180,38 +676,187 @@ class VideoProcessor:
             ]
 
             print(f"Creating clip {i}: {start} to {end}...")
-            subprocess.run(cmd, check=True)
+            yield FFmpegStep(cmd, [output_file], operation='clip')
             clips.append(output_file)
 
         print(f"Created {len(clips)} clips")
         return clips
 
+    def create_clips_single_pass(self, timestamps: List[tuple],
+                                 output_prefix: str = "clip") -> List[Dict]:
+        """
+        Create all clips with one ffmpeg process, cost linear in clip count
+        Non-overlapping clips are cut by the segment muxer in a single read
+        of the input; overlapping clips use one input-seeked input per clip.
+        Stream copy cuts on keyframes, so each result reports the actual
+        start/end alongside the requested ones:
+        [{'file': Path, 'start': 0.0, 'end': 150.0,
+          'actual_start': 0.0, 'actual_end': 150.2}, ...]
+        """
+        return self._drive(self._create_clips_single_pass_steps(timestamps, output_prefix))
+
+    def _create_clips_single_pass_steps(self, timestamps: List[tuple], output_prefix: str) -> Steps:
+        clips = [
+            {
+                'file': self.output_dir / f"{output_prefix}_{i:02d}.mp4",
+                'start': parse_timestamp(start),
+                'end': parse_timestamp(end)
+            }
+            for i, (start, end) in enumerate(timestamps, 1)
+        ]
+
+        # Stream copy can only start a clip on a keyframe, so both cutting
+        # paths start each clip at the keyframe before its requested start
+        for clip in clips:
+            clip['cut'] = self._keyframe_before(clip['start']) if clip['start'] > 0 else 0.0
+
+        ordered = sorted(clips, key=lambda clip: clip['cut'])
+        overlapping = any(a['end'] > b['cut'] for a, b in zip(ordered, ordered[1:]))
+
+        if overlapping or not (yield from self._segment_clips(ordered, output_prefix)):
+            yield from self._seek_clips(clips)
+
+        for i, clip in enumerate(clips, 1):
+            del clip['cut']
+            print(f"Clip {i}: requested {clip['start']:.3f}-{clip['end']:.3f}s, "
+                  f"actual {clip['actual_start']:.3f}-{clip['actual_end']:.3f}s -> {clip['file']}")
+
+        print(f"Created {len(clips)} clips")
+        return clips
+
+    def _segment_clips(self, ordered: List[Dict], output_prefix: str) -> Steps:
+        """
+        Cut sorted, non-overlapping clips with the segment muxer
+        Each clip's segment starts at its keyframe-snapped start (the muxer
+        would otherwise cut at the keyframe after it) and runs to the first
+        keyframe at or after its end. Returns False when the muxer's
+        segments can't be matched to clips.
+        """
+        boundaries = sorted({clip['cut'] for clip in ordered} | {clip['end'] for clip in ordered})
+        if boundaries[0] > 0:
+            boundaries.insert(0, 0.0)
+        segment_of = {boundary: i for i, boundary in enumerate(boundaries)}
+
+        work_dir = self.output_dir / f".{output_prefix}_segments"
+        shutil.rmtree(work_dir, ignore_errors=True)
+        work_dir.mkdir(parents=True)
+        segment_list = work_dir / 'segments.csv'
+
+        cmd = [
+            'ffmpeg',
+            '-i', str(self.input_file),
+            '-t', str(boundaries[-1]),
+            '-map', '0:v?',
+            '-map', '0:a?',
+            '-c', 'copy',
+            '-f', 'segment'
+        ]
+        if len(boundaries) > 2:
+            # Full precision: rounding a keyframe time up would cut at the next one
+            cmd += ['-segment_times', ','.join(f'{t:.6f}' for t in boundaries[1:-1])]
+        cmd += [
+            '-segment_list', str(segment_list),
+            '-segment_list_type', 'csv',
+            '-reset_timestamps', '1',
+            '-y',
+            str(work_dir / 'segment_%04d.mp4')
+        ]
+
+        print(f"Cutting {len(ordered)} clips in a single pass...")
+        try:
+            yield FFmpegStep(cmd, [], operation='clips', duration=boundaries[-1])
+
+            # Each line: filename,start,end in source time
+            segments = []
+            with open(segment_list) as f:
+                for line in f:
+                    name, start, end = line.strip().rsplit(',', 2)
+                    segments.append((work_dir / name, float(start), float(end)))
+
+            if len(segments) < len(boundaries) - 1:
+                print("Segment boundaries collapsed onto shared keyframes, "
+                      "falling back to per-clip seeking")
+                return False
+
+            for clip in ordered:
+                path, start, end = segments[segment_of[clip['cut']]]
+                path.replace(clip['file'])
+                clip['actual_start'], clip['actual_end'] = start, end
+            return True
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    def _seek_clips(self, clips: List[Dict]) -> Steps:
+        """Cut clips in one ffmpeg process with an input-seeked input per clip"""
+        cmd = ['ffmpeg']
+        for clip in clips:
+            cmd += [
+                '-ss', f"{clip['start']:.3f}",
+                '-t', f"{clip['end'] - clip['start']:.3f}",
+                '-i', str(self.input_file)
+            ]
+        for i, clip in enumerate(clips):
+            cmd += ['-map', f'{i}:v?', '-map', f'{i}:a?', '-c', 'copy', '-y', str(clip['file'])]
+
+        print(f"Cutting {len(clips)} clips with input seeking...")
+        yield FFmpegStep(cmd, [clip['file'] for clip in clips], operation='clips')
+
+        probe_cache = self.probe_cache or ProbeCache.default()
+        for clip in clips:
+            clip['actual_start'] = clip['cut']
+            duration = float(probe_cache.probe(str(clip['file']), 'format=duration')
+                             .get('format', {}).get('duration', 0))
+            clip['actual_end'] = clip['actual_start'] + duration
+
+    def _keyframe_before(self, seconds: float) -> float:
+        """Timestamp of the keyframe an input seek to `seconds` lands on"""
+        cmd = [
+            'ffprobe',
+            '-v', 'quiet',
+            '-select_streams', 'v:0',
+            '-read_intervals', f'{seconds:.3f}%+#1',
+            '-show_entries', 'packet=pts_time',
+            '-of', 'csv=p=0',
+            str(self.input_file)
+        ]
+
+        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+        first = result.stdout.strip().splitlines()
+        try:
+            return float(first[0].strip(',')) if first else seconds
+        except ValueError:
+            return seconds
+
     def add_subtitles(self, subtitle_file: str, output_name: Optional[str] = None) -> Path:
         """Burn subtitles into video"""
+        return self._drive(self._add_subtitles_steps(subtitle_file, output_name))
+
+    def _add_subtitles_steps(self, subtitle_file: str, output_name: Optional[str]) -> Steps:
         if not output_name:
             output_name = f"{self.input_file.stem}_subtitled.mp4"
 
         output_file = self.output_dir / output_name
 
-        # Escape path for FFmpeg filter
-        subtitle_path = str(Path(subtitle_file).absolute()).replace('\\', '/').replace(':', '\\:')
-
         cmd = [
             'ffmpeg',
             '-i', str(self.input_file),
-            '-vf', f"subtitles='{subtitle_path}'",
+            '-vf', f"subtitles='{escape_filter_path(subtitle_file)}'",
             '-c:a', 'copy',
+            *self._thread_args(),
             '-y',
             str(output_file)
         ]
 
         print("Adding subtitles...")
-        subprocess.run(cmd, check=True)
+        yield FFmpegStep(cmd, [output_file], inputs=[subtitle_file], operation='subtitles')
         print(f"Subtitled video saved to: {output_file}")
         return output_file
 
     def resize_video(self, width: int, height: int, output_name: Optional[str] = None) -> Path:
         """Resize video to specific dimensions"""
+        return self._drive(self._resize_video_steps(width, height, output_name))
+
+    def _resize_video_steps(self, width: int, height: int, output_name: Optional[str]) -> Steps:
         if not output_name:
             output_name = f"{self.input_file.stem}_{width}x{height}.mp4"
 
@@ -222,28 +867,81 @@ class VideoProcessor:
             '-i', str(self.input_file),
             '-vf', f'scale={width}:{height}',
             '-c:a', 'copy',
+            *self._thread_args(),
             '-y',
             str(output_file)
         ]
 
         print(f"Resizing video to {width}x{height}...")
-        subprocess.run(cmd, check=True)
+        yield FFmpegStep(cmd, [output_file], operation='resize')
         print(f"Resized video saved to: {output_file}")
         return output_file
 
-    def create_youtube_formats(self) -> Dict[str, Path]:
-        """Create optimized versions for YouTube (1080p, 720p, etc.)"""
-        formats = {}
+    def create_youtube_formats(self, formats: Optional[List[Dict]] = None,
+                               crf: int = 23, preset: str = 'medium',
+                               target_speed: Optional[float] = None,
+                               deadline: Optional[float] = None) -> Dict[str, Path]:
+        """
+        Create optimized versions for YouTube (1080p, 720p, etc.)
+        The source is decoded once and split into every rendition in a
+        single ffmpeg invocation, each encoded with the given CRF and preset
+        (as the fused pipeline does). preset "auto" is tuned for the whole
+        ladder.
+        formats: [{'name': '1080p', 'width': 1920, 'height': 1080}, ...]
+        """
+        return self._drive(self._create_youtube_formats_steps(formats, crf, preset,
+                                                              target_speed, deadline))
+
+    def _create_youtube_formats_steps(self, formats: Optional[List[Dict]], crf: int = 23,
+                                      preset: str = 'medium',
+                                      target_speed: Optional[float] = None,
+                                      deadline: Optional[float] = None) -> Steps:
+        if not formats:
+            formats = DEFAULT_FORMATS
+
+        if preset == 'auto':
+            streams = self._video_info('stream=codec_type,width,height').get('streams', [])
+            video = next((s for s in streams if s.get('codec_type') == 'video'), {})
+            preset = EncoderTuner.default().choose(str(self.input_file), crf, target_speed,
+                                                   deadline, self.threads,
+                                                   work_factor=ladder_work_factor(video, formats))
+
+        outputs = {}
+        split_labels = ''.join(f'[s{i}]' for i in range(len(formats)))
+        filters = [f'[0:v]split={len(formats)}{split_labels}']
+        output_args = []
+
+        for i, fmt in enumerate(formats):
+            output_file = self.output_dir / f"{self.input_file.stem}_{fmt['name']}.mp4"
+            filters.append(f"[s{i}]scale={fmt['width']}:{fmt['height']}[v{i}]")
+            output_args += [
+                '-map', f'[v{i}]',
+                '-map', '0:a?',
+                '-c:v', 'libx264',
+                '-crf', str(crf),
+                '-preset', preset,
+                '-c:a', 'copy',
+                *self._thread_args(),
+                # Index up front so the file plays while it downloads
+                '-movflags', '+faststart',
+                str(output_file)
+            ]
+            outputs[fmt['name']] = output_file
 
-        # 1080p
-        print("Creating 1080p version...")
-        formats['1080p'] = self.resize_video(1920, 1080, f"{self.input_file.stem}_1080p.mp4")
+        cmd = [
+            'ffmpeg',
+            '-i', str(self.input_file),
+            '-filter_complex', ';'.join(filters),
+            '-y'
+        ] + output_args
 
-        # 720p
-        print("Creating 720p version...")
-        formats['720p'] = self.resize_video(1280, 720, f"{self.input_file.stem}_720p.mp4")
+        names = ', '.join(fmt['name'] for fmt in formats)
+        print(f"Creating {names} versions in a single pass (CRF={crf}, preset={preset})...")
+        yield FFmpegStep(cmd, list(outputs.values()), operation='youtube_formats')
+        for name, output_file in outputs.items():
+            print(f"{name} version saved to: {output_file}")
 
-        return formats
+        return outputs
 
 
 def main():
@@ -251,20 +949,38 @@ def main():
         print("Usage: python process_video.py <input_file> [options]")
         print("\nExamples:")
         print("  python process_video.py video.mp4 --compress")
+        print("  python process_video.py video.mp4 --compress --chunked")
         print("  python process_video.py video.mp4 --watermark logo.png")
         print("  python process_video.py video.mp4 --info")
+        print("  python process_video.py raw-footage/ --info --entries format=duration")
         sys.exit(1)
 
     input_file = sys.argv[1]
+
+    entries = None
+    if '--entries' in sys.argv:
+        idx = sys.argv.index('--entries')
+        if idx + 1 < len(sys.argv):
+            entries = sys.argv[idx + 1]
+
+    # Directory probe: concurrent, cached, streamed as JSONL
+    if '--info' in sys.argv and Path(input_file).is_dir():
+        write_jsonl(ProbeCache.default().probe_many(list(iter_media_files(input_file)), entries))
+        return
+
     processor = VideoProcessor(input_file)
+    install_signal_handlers()
 
     # Simple command-line interface
     if '--info' in sys.argv:
-        info = processor.get_video_info()
+        info = processor.get_video_info(entries)
         print(json.dumps(info, indent=2))
 
     elif '--compress' in sys.argv:
-        processor.compress_video()
+        if '--chunked' in sys.argv:
+            processor.compress_video_chunked()
+        else:
+            processor.compress_video()
 
     elif '--watermark' in sys.argv:
         idx = sys.argv.index('--watermark')
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Content-Addressed Render Cache
+Remembers ffmpeg outputs keyed on a fingerprint of every input file plus
+the exact command, so unchanged renders are reused instead of re-encoded
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import sqlite3
+import argparse
+import threading
+from pathlib import Path
+from typing import Optional, List, Dict
+
+# Read size when hashing
+CHUNK_BYTES = 1024 * 1024
+
+# Prefix of stored fingerprints; fingerprints memoized under another
+# scheme (the old sampled-block hash) are recomputed
+FINGERPRINT_SCHEME = 'sha256:'
+
+
+def file_fingerprint(path: Path) -> str:
+    """
+    Hash a file's entire content
+    Sampling only some blocks lets same-length files that differ elsewhere
+    (a re-export, an edit mid-recording) collide and serve a stale render.
+    The full read is paid once per file version: RenderCache.fingerprint
+    memoizes it on the file's stat signature.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while chunk := f.read(CHUNK_BYTES):
+            digest.update(chunk)
+    return FINGERPRINT_SCHEME + digest.hexdigest()
+
+
+class RenderCache:
+    """Size-bounded LRU cache of rendered files"""
+
+    def __init__(self, cache_dir: str = "../.cache/renders", max_size_mb: float = 50000):
+        self.cache_dir = Path(cache_dir)
+        self.objects_dir = self.cache_dir / 'objects'
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.cache_dir / 'index.db'), timeout=30,
+                                   check_same_thread=False)
+        with self._db:
+            self._db.execute('''
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    operation TEXT,
+                    objects TEXT,
+                    size INTEGER,
+                    created REAL,
+                    last_used REAL
+                )
+            ''')
+            self._db.execute('CREATE INDEX IF NOT EXISTS entries_lru ON entries (last_used)')
+            self._db.execute('''
+                CREATE TABLE IF NOT EXISTS fingerprints (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER,
+                    mtime_ns INTEGER,
+                    inode INTEGER,
+                    fingerprint TEXT
+                )
+            ''')
+
+    def fingerprint(self, path: Path) -> str:
+        """Content fingerprint of a file, memoized on its stat signature"""
+        path = Path(path).absolute()
+        stat = path.stat()
+
+        with self._lock:
+            row = self._db.execute(
+                'SELECT size, mtime_ns, inode, fingerprint FROM fingerprints WHERE path = ?',
+                (str(path),)
+            ).fetchone()
+        if (row and row[:3] == (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+                and row[3].startswith(FINGERPRINT_SCHEME)):
+            return row[3]
+
+        fingerprint = file_fingerprint(path)
+        with self._lock, self._db:
+            self._db.execute(
+                'INSERT OR REPLACE INTO fingerprints VALUES (?, ?, ?, ?, ?)',
+                (str(path), stat.st_size, stat.st_mtime_ns, stat.st_ino, fingerprint)
+            )
+        return fingerprint
+
+    def make_key(self, cmd: List[str], inputs: List[Path], outputs: List[Path]) -> str:
+        """
+        Cache key for an ffmpeg command
+        Input paths are replaced by their content fingerprints and output
+        paths by their position, so the key covers content and parameters
+        but not where the files happen to live. The -threads cap is left
+        out, so batch runs (a share of the cores) and single runs (all of
+        them) share renders.
+        """
+        substitutions = {}
+        for path in inputs:
+            if path and Path(path).exists():
+                substitutions[str(path)] = f'<input:{self.fingerprint(Path(path))}>'
+        for i, path in enumerate(outputs):
+            substitutions[str(path)] = f'<output:{i}{Path(path).suffix}>'
+
+        normalized = []
+        args = iter(cmd)
+        for arg in args:
+            if arg == '-threads':
+                next(args, None)
+                continue
+            normalized.append(substitutions.get(arg, arg))
+        extra = sorted(v for k, v in substitutions.items() if k not in cmd)
+        payload = json.dumps({'cmd': normalized, 'inputs': extra})
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def lookup(self, key: str, outputs: List[Path]) -> bool:
+        """Materialize cached outputs for key; returns False on a miss"""
+        with self._lock:
+            row = self._db.execute('SELECT objects FROM entries WHERE key = ?', (key,)).fetchone()
+        if not row:
+            return False
+
+        objects = [self.objects_dir / name for name in json.loads(row[0])]
+        if len(objects) != len(outputs) or not all(obj.exists() for obj in objects):
+            self._remove(key)
+            return False
+
+        for obj, output in zip(objects, outputs):
+            _link_or_copy(obj, Path(output))
+
+        with self._lock, self._db:
+            self._db.execute('UPDATE entries SET last_used = ? WHERE key = ?', (time.time(), key))
+        return True
+
+    def store(self, key: str, outputs: List[Path], operation: str = ''):
+        """Add freshly rendered outputs to the cache, then enforce the size limit"""
+        names = []
+        size = 0
+        for i, output in enumerate(outputs):
+            output = Path(output)
+            name = f'{key}_{i}{output.suffix}'
+            _link_or_copy(output, self.objects_dir / name)
+            names.append(name)
+            size += output.stat().st_size
+
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute(
+                'INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)',
+                (key, operation, json.dumps(names), size, now, now)
+            )
+        self.prune()
+
+    def entries(self) -> List[Dict]:
+        """List cache entries, most recently used first"""
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT key, operation, objects, size, created, last_used '
+                'FROM entries ORDER BY last_used DESC'
+            ).fetchall()
+        return [
+            {
+                'key': key,
+                'operation': operation,
+                'objects': json.loads(objects),
+                'size': size,
+                'created': created,
+                'last_used': last_used
+            }
+            for key, operation, objects, size, created, last_used in rows
+        ]
+
+    def total_size(self) -> int:
+        """Total bytes held by the cache"""
+        with self._lock:
+            return self._db.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+
+    def prune(self, max_bytes: Optional[int] = None) -> int:
+        """Evict least recently used entries until under max_bytes; returns count evicted"""
+        if max_bytes is None:
+            max_bytes = self.max_bytes
+
+        total = self.total_size()
+        if total <= max_bytes:
+            return 0
+
+        with self._lock:
+            rows = self._db.execute('SELECT key, size FROM entries ORDER BY last_used ASC').fetchall()
+
+        evicted = 0
+        for key, size in rows:
+            if total <= max_bytes:
+                break
+            self._remove(key)
+            total -= size
+            evicted += 1
+        return evicted
+
+    def clear(self) -> int:
+        """Remove every entry; returns count removed"""
+        return self.prune(max_bytes=0)
+
+    def _remove(self, key: str):
+        with self._lock, self._db:
+            row = self._db.execute('SELECT objects FROM entries WHERE key = ?', (key,)).fetchone()
+            self._db.execute('DELETE FROM entries WHERE key = ?', (key,))
+        if row:
+            for name in json.loads(row[0]):
+                (self.objects_dir / name).unlink(missing_ok=True)
+
+
+def _link_or_copy(source: Path, target: Path):
+    """Hard-link source to target (constant time), copying across filesystems"""
+    if target.exists() and os.path.samefile(source, target):
+        return
+
+    temp = target.with_name(f'.{target.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+    try:
+        os.link(source, temp)
+    except OSError:
+        shutil.copy2(source, temp)
+    os.replace(temp, target)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inspect and prune the render cache')
+    parser.add_argument('command', choices=['list', 'stats', 'prune', 'clear'])
+    parser.add_argument('--cache-dir', default='../.cache/renders',
+                       help='Cache directory (default: ../.cache/renders)')
+    parser.add_argument('--max-size-mb', type=float, default=None,
+                       help='Size limit to prune down to')
+
+    args = parser.parse_args()
+    cache = RenderCache(args.cache_dir)
+
+    if args.command == 'list':
+        for entry in cache.entries():
+            last_used = time.strftime('%Y-%m-%d %H:%M', time.localtime(entry['last_used']))
+            print(f"{entry['key'][:12]}  {entry['operation']:<16} "
+                  f"{entry['size'] / 1024 / 1024:>10.1f} MB  last used {last_used}")
+
+    elif args.command == 'stats':
+        entries = cache.entries()
+        print(f"Entries: {len(entries)}")
+        print(f"Total size: {cache.total_size() / 1024 / 1024:.1f} MB")
+
+    elif args.command == 'prune':
+        max_bytes = int(args.max_size_mb * 1024 * 1024) if args.max_size_mb is not None else None
+        evicted = cache.prune(max_bytes)
+        print(f"Evicted {evicted} entries, {cache.total_size() / 1024 / 1024:.1f} MB remaining")
+
+    elif args.command == 'clear':
+        print(f"Removed {cache.clear()} entries")
+
+
+if __name__ == '__main__':
+    main()
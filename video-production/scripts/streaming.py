@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Streaming Stage Pipeline
+Runs the stepwise workflow (compress -> watermark -> YouTube formats) as
+ffmpeg processes joined by pipes. Intermediate renditions travel as NUT
+over stdout/stdin instead of being written as _compressed.mp4 and
+_final.mp4 and read back, so the only files on disk are the final
+outputs. The final outputs are MP4 with +faststart.
+"""
+
+import os
+import sys
+import argparse
+import subprocess
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Optional, List, Dict, Tuple
+
+# Add parent directory to path to import our modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.process_video import DEFAULT_FORMATS, WATERMARK_POSITIONS
+from scripts.probe_cache import ProbeCache
+from scripts.encoder_tuning import EncoderTuner
+from scripts.ffmpeg_progress import (
+    FFmpegJob,
+    ProgressCallback,
+    RunSummary,
+    format_summary,
+    install_signal_handlers,
+    managed_process,
+)
+from scripts.tracing import span
+
+# Streamable intermediate: NUT needs no seekable output or trailing index
+# and carries H.264/AAC with very little overhead
+INTERMEDIATE = ['-f', 'nut', 'pipe:1']
+
+
+class StreamingPipeline:
+    """
+    compress -> [watermark] -> formats, stage to stage over pipes
+        pipeline = StreamingPipeline('raw.mp4', '../processed-videos', threads=4)
+        outputs = pipeline.run(crf=23, preset='medium', watermark='logo.png')
+    Outputs are named as the stepwise path names them
+    (<stem>_compressed_<format>.mp4, or <stem>_final_<format>.mp4 with a
+    watermark). They are rendered under temporary names and moved into
+    place only once every stage succeeded: the stepwise files may be hard
+    links into the render cache and must never be written in place.
+    """
+
+    def __init__(self, input_file: str, output_dir: str = "../processed-videos",
+                 threads: Optional[int] = None,
+                 progress_callback: Optional[ProgressCallback] = None):
+        self.input_file = Path(input_file)
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.threads = threads
+        self.progress_callbacks = [progress_callback] if progress_callback else []
+        self.last_summary: Optional[RunSummary] = None
+
+        if not self.input_file.exists():
+            raise FileNotFoundError(f"Input file not found: {input_file}")
+
+    def _thread_args(self) -> List[str]:
+        return ['-threads', str(self.threads)] if self.threads else []
+
+    def stages(self, crf: int = 23, preset: str = 'medium',
+               watermark: Optional[str] = None, position: str = 'bottom-right',
+               formats: Optional[List[Dict]] = None,
+               target_speed: Optional[float] = None,
+               deadline: Optional[float] = None) -> Tuple[List[Tuple[str, List[str]]], Dict[str, Path]]:
+        """([(operation, ffmpeg command)] in pipe order, {format name: output file})"""
+        if preset == 'auto':
+            preset = EncoderTuner.default().choose(str(self.input_file), crf, target_speed,
+                                                   deadline, self.threads)
+
+        # Upstream stages only report errors; the last stage carries the progress
+        quiet = ['-hide_banner', '-loglevel', 'error', '-nostats']
+        stages = [('compress', [
+            'ffmpeg', *quiet,
+            '-i', str(self.input_file),
+            '-c:v', 'libx264',
+            '-crf', str(crf),
+            '-preset', preset,
+            '-c:a', 'aac',
+            '-b:a', '128k',
+            *self._thread_args(),
+            *INTERMEDIATE
+        ])]
+        stem = f"{self.input_file.stem}_compressed"
+
+        if watermark:
+            overlay_pos = WATERMARK_POSITIONS.get(position, WATERMARK_POSITIONS['bottom-right'])
+            stages.append(('watermark', [
+                'ffmpeg', *quiet,
+                '-i', 'pipe:0',
+                '-i', watermark,
+                '-filter_complex', f'[1:v]scale=120:-1[wm];[0:v][wm]overlay={overlay_pos}',
+                # What the stepwise .mp4 output gets by default (NUT's would be mpeg4)
+                '-c:v', 'libx264',
+                '-c:a', 'copy',
+                *self._thread_args(),
+                *INTERMEDIATE
+            ]))
+            stem = f"{self.input_file.stem}_final"
+
+        formats = formats or DEFAULT_FORMATS
+        outputs = {}
+        split_labels = ''.join(f'[s{i}]' for i in range(len(formats)))
+        filters = [f'[0:v]split={len(formats)}{split_labels}']
+        output_args = []
+        for i, fmt in enumerate(formats):
+            output_file = self.output_dir / f"{stem}_{fmt['name']}.mp4"
+            filters.append(f"[s{i}]scale={fmt['width']}:{fmt['height']}[v{i}]")
+            output_args += [
+                '-map', f'[v{i}]',
+                '-map', '0:a?',
+                '-c:v', 'libx264',
+                '-crf', str(crf),
+                '-preset', preset,
+                '-c:a', 'copy',
+                *self._thread_args(),
+                '-movflags', '+faststart',
+                str(self._temp_path(output_file))
+            ]
+            outputs[fmt['name']] = output_file
+
+        stages.append(('youtube_formats', [
+            'ffmpeg',
+            '-i', 'pipe:0',
+            '-filter_complex', ';'.join(filters),
+            '-y'
+        ] + output_args))
+        return stages, outputs
+
+    @staticmethod
+    def _temp_path(output_file: Path) -> Path:
+        """Where the last stage writes output_file until the run succeeds"""
+        return output_file.with_name(f".{output_file.stem}.streaming{output_file.suffix}")
+
+    def _duration(self) -> Optional[float]:
+        try:
+            info = ProbeCache.default().probe(str(self.input_file), 'format=duration')
+            return float(info['format']['duration'])
+        except (subprocess.CalledProcessError, OSError, KeyError, ValueError):
+            return None
+
+    def run(self, crf: int = 23, preset: str = 'medium',
+            watermark: Optional[str] = None, position: str = 'bottom-right',
+            formats: Optional[List[Dict]] = None,
+            target_speed: Optional[float] = None,
+            deadline: Optional[float] = None) -> Dict[str, Path]:
+        """Run every stage concurrently, piped together; returns {format name: output file}"""
+        stages, outputs = self.stages(crf, preset, watermark, position, formats,
+                                      target_speed, deadline)
+        names = ' | '.join(operation for operation, _ in stages)
+        print(f"Streaming {self.input_file.name}: {names} (CRF={crf})")
+
+        temps = {name: self._temp_path(output_file) for name, output_file in outputs.items()}
+        try:
+            with span('streaming', 'ffmpeg', input=str(self.input_file)) as trace, ExitStack() as stack:
+                upstream = None
+                processes = []
+                for operation, cmd in stages[:-1]:
+                    process = stack.enter_context(
+                        managed_process(cmd, stdin=upstream, stdout=subprocess.PIPE))
+                    # The next stage owns the read end now; closing ours lets an
+                    # upstream stage see a broken pipe if its reader dies
+                    if upstream:
+                        upstream.close()
+                    upstream = process.stdout
+                    processes.append((operation, cmd, process))
+
+                operation, cmd = stages[-1]
+                job = FFmpegJob(cmd, 'streaming', self._duration(), list(temps.values()),
+                                stdin=upstream)
+                try:
+                    summary = job.run(self.progress_callbacks)
+                finally:
+                    if upstream:
+                        upstream.close()
+
+                for operation, cmd, process in processes:
+                    if process.wait() != 0:
+                        raise subprocess.CalledProcessError(process.returncode, cmd)
+
+                trace.set(realtime_factor=summary.realtime_factor)
+
+            # A replace swaps the directory entry, so a previous output that
+            # is hard-linked into the render cache is left untouched there
+            for name, output_file in outputs.items():
+                os.replace(temps[name], output_file)
+            summary.outputs = [str(output_file) for output_file in outputs.values()]
+        finally:
+            for temp in temps.values():
+                temp.unlink(missing_ok=True)
+
+        self.last_summary = summary
+        print(format_summary(summary))
+        for name, output_file in outputs.items():
+            print(f"{name} version saved to: {output_file}")
+        return outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compress, watermark and render YouTube formats through pipes, '
+                    'without intermediate files'
+    )
+    parser.add_argument('input_file', help='Input video')
+    parser.add_argument('--output-dir', default='../processed-videos',
+                        help='Output directory (default: ../processed-videos)')
+    parser.add_argument('--crf', type=int, default=23)
+    parser.add_argument('--preset', default='medium')
+    parser.add_argument('--watermark', default=None, help='Watermark image')
+    parser.add_argument('--position', default='bottom-right', choices=list(WATERMARK_POSITIONS))
+    parser.add_argument('--threads', type=int, default=None, help='ffmpeg threads per stage')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Print the piped commands without running them')
+
+    args = parser.parse_args()
+    pipeline = StreamingPipeline(args.input_file, args.output_dir, args.threads)
+
+    if args.dry_run:
+        stages, _ = pipeline.stages(args.crf, args.preset, args.watermark, args.position)
+        print(' \\\n  | '.join(' '.join(cmd) for _, cmd in stages))
+        return
+
+    install_signal_handlers()
+    pipeline.run(args.crf, args.preset, args.watermark, args.position)
+
+
+if __name__ == '__main__':
+    main()
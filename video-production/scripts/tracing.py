@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Workflow Tracing
+Nested timing spans for workflow stages and their ffmpeg/PIL sub-operations,
+exportable as Chrome trace-event JSON (chrome://tracing, ui.perfetto.dev)
+plus a plain-text summary table
+"""
+
+import os
+import json
+import time
+import argparse
+import threading
+import contextvars
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional, List, Dict, Iterator
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def _io_counters() -> Optional[Dict[str, int]]:
+    """
+    Bytes read and written by this process, including reaped children
+    (Linux /proc/self/io; None elsewhere). rchar/wchar count every read
+    and write, so page-cache hits are included.
+    """
+    try:
+        with open('/proc/self/io') as f:
+            fields = dict(line.split(': ') for line in f.read().splitlines() if ': ' in line)
+        return {'read': int(fields['rchar']), 'write': int(fields['wchar'])}
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _child_cpu() -> Optional[float]:
+    """User + system CPU seconds of all reaped child processes"""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+@dataclass
+class Span:
+    """One timed operation"""
+    name: str
+    category: str
+    start: float                      # seconds since the tracer started
+    thread_id: int
+    thread_name: str
+    depth: int
+    wall_time: float = 0.0
+    cpu_time: float = 0.0             # this thread's CPU time
+    child_cpu_time: Optional[float] = None
+    child_peak_rss_kb: Optional[int] = None
+    bytes_read: Optional[int] = None
+    bytes_written: Optional[int] = None
+    args: Dict = field(default_factory=dict)
+
+    def set(self, **args):
+        """Attach extra fields (shown in the trace viewer)"""
+        self.args.update(args)
+
+    def set_child_usage(self, cpu_time: Optional[float] = None,
+                        peak_rss_kb: Optional[int] = None):
+        """Record exact child-process usage (e.g. from wait4) instead of the estimate"""
+        if cpu_time is not None:
+            self.child_cpu_time = cpu_time
+        if peak_rss_kb is not None:
+            self.child_peak_rss_kb = max(self.child_peak_rss_kb or 0, peak_rss_kb)
+
+
+class Tracer:
+    """
+    Collects spans from every thread and asyncio task
+    The current span stack is a context variable, so concurrent tasks on
+    one event loop nest their spans independently, as threads do.
+    Child CPU and I/O counters are process-wide, so spans that overlap
+    (parallel batch workers, concurrent tasks) share them; ffmpeg spans
+    record their own process's usage exactly.
+    """
+
+    def __init__(self):
+        self.spans: List[Span] = []
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self._stack = contextvars.ContextVar(f'trace_stack_{id(self)}', default=())
+
+    @contextmanager
+    def span(self, name: str, category: str = 'stage', **args) -> Iterator[Span]:
+        """Time the enclosed block as a span nested under the current one"""
+        stack = self._stack.get()
+        thread = threading.current_thread()
+        span = Span(name, category, time.perf_counter() - self._origin,
+                    thread.ident, thread.name, len(stack), args=dict(args))
+
+        io_before = _io_counters()
+        child_before = _child_cpu()
+        cpu_before = time.thread_time()
+        token = self._stack.set(stack + (span,))
+        try:
+            yield span
+        except BaseException as e:
+            span.set(error=f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            self._stack.reset(token)
+            span.wall_time = time.perf_counter() - self._origin - span.start
+            span.cpu_time = time.thread_time() - cpu_before
+
+            child_after = _child_cpu()
+            if span.child_cpu_time is None and child_before is not None:
+                span.child_cpu_time = child_after - child_before
+
+            io_after = _io_counters()
+            if io_before and io_after:
+                span.bytes_read = io_after['read'] - io_before['read']
+                span.bytes_written = io_after['write'] - io_before['write']
+
+            if stack and span.child_peak_rss_kb:
+                stack[-1].set_child_usage(peak_rss_kb=span.child_peak_rss_kb)
+
+            with self._lock:
+                self.spans.append(span)
+
+    def chrome_trace(self) -> Dict:
+        """Spans as Chrome trace-event JSON ("X" complete events)"""
+        pid = os.getpid()
+        events = []
+        threads = {}
+        for span in sorted(self.spans, key=lambda s: (s.start, s.depth)):
+            threads.setdefault(span.thread_id, span.thread_name)
+            args = dict(span.args)
+            args['cpu_time_s'] = round(span.cpu_time, 4)
+            for key in ('child_cpu_time', 'child_peak_rss_kb', 'bytes_read', 'bytes_written'):
+                value = getattr(span, key)
+                if value is not None:
+                    args[key] = round(value, 4) if isinstance(value, float) else value
+            events.append({
+                'name': span.name,
+                'cat': span.category,
+                'ph': 'X',
+                'ts': round(span.start * 1_000_000),
+                'dur': round(span.wall_time * 1_000_000),
+                'pid': pid,
+                'tid': span.thread_id,
+                'args': args
+            })
+
+        for thread_id, thread_name in threads.items():
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': thread_id,
+                           'args': {'name': thread_name}})
+
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def write_chrome_trace(self, path: str) -> Path:
+        """Write the trace for chrome://tracing or ui.perfetto.dev"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.chrome_trace(), f)
+        return path
+
+    def summary_table(self) -> str:
+        """Per-operation totals, slowest first"""
+        return format_summary_table(self.chrome_trace())
+
+
+def format_summary_table(trace: Dict) -> str:
+    """Aggregate trace events by (category, name) into a text table"""
+    totals = {}
+    end = 0
+    for event in trace.get('traceEvents', []):
+        if event.get('ph') != 'X':
+            continue
+        end = max(end, event['ts'] + event['dur'])
+        args = event.get('args', {})
+        row = totals.setdefault((event['cat'], event['name']), {
+            'count': 0, 'wall': 0.0, 'cpu': 0.0, 'child_cpu': 0.0,
+            'read': 0, 'written': 0, 'rss': 0
+        })
+        row['count'] += 1
+        row['wall'] += event['dur'] / 1_000_000
+        row['cpu'] += args.get('cpu_time_s', 0)
+        row['child_cpu'] += args.get('child_cpu_time', 0)
+        row['read'] += args.get('bytes_read', 0)
+        row['written'] += args.get('bytes_written', 0)
+        row['rss'] = max(row['rss'], args.get('child_peak_rss_kb', 0))
+
+    total_wall = end / 1_000_000 or 1
+    header = (f"{'operation':<32} {'count':>5} {'wall s':>9} {'%':>6} {'cpu s':>8} "
+              f"{'child cpu s':>11} {'read MB':>9} {'write MB':>9} {'peak RSS MB':>11}")
+    lines = [header, '-' * len(header)]
+    for (category, name), row in sorted(totals.items(), key=lambda item: -item[1]['wall']):
+        label = f"{category}:{name}"
+        lines.append(
+            f"{label[:32]:<32} {row['count']:>5} {row['wall']:>9.2f} "
+            f"{row['wall'] / total_wall * 100:>5.1f}% {row['cpu']:>8.2f} "
+            f"{row['child_cpu']:>11.2f} {row['read'] / 1024 / 1024:>9.1f} "
+            f"{row['written'] / 1024 / 1024:>9.1f} "
+            f"{(row['rss'] / 1024 if row['rss'] else 0):>11.0f}"
+        )
+    lines.append(f"Trace wall time: {end / 1_000_000:.2f}s "
+                 f"(% is of trace wall time; nested spans overlap their parents)")
+    return '\n'.join(lines)
+
+
+# Process-wide tracer; None means tracing is off and span() is a no-op
+_tracer: Optional[Tracer] = None
+
+
+def enable_tracing() -> Tracer:
+    """Start collecting spans process-wide"""
+    global _tracer
+    _tracer = Tracer()
+    return _tracer
+
+
+def disable_tracing() -> Optional[Tracer]:
+    """Stop collecting spans; returns the tracer that was active"""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer
+
+
+def get_tracer() -> Optional[Tracer]:
+    return _tracer
+
+
+@contextmanager
+def span(name: str, category: str = 'stage', **args) -> Iterator[Span]:
+    """Trace a block with the active tracer (a cheap no-op when tracing is off)"""
+    if _tracer is None:
+        yield Span(name, category, 0.0, 0, '', 0, args=dict(args))
+        return
+    with _tracer.span(name, category, **args) as active:
+        yield active
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Summarize a Chrome trace written with --trace')
+    parser.add_argument('trace_file', help='Trace JSON file')
+
+    args = parser.parse_args()
+
+    with open(args.trace_file) as f:
+        print(format_summary_table(json.load(f)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,6 @@
+"""Shared pytest setup: import the toolkit as `scripts.*` / `metadata.*`"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
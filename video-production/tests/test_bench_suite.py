@@ -0,0 +1,42 @@
+"""bench_suite.compare regression detection"""
+
+import pytest
+
+from benchmarks.bench_suite import compare, NOISE_FLOOR
+
+
+def results(**medians):
+    return {'machine': {}, 'results': [{'case': case, 'median': median}
+                                       for case, median in medians.items()]}
+
+
+def status(rows):
+    return {row['case']: row['status'] for row in rows}
+
+
+def test_threshold_classifies_changes():
+    rows = compare(results(compress=1.0, thumbnail=1.0, metadata=1.0),
+                   results(compress=1.2, thumbnail=0.8, metadata=1.05), threshold=0.10)
+    assert status(rows) == {'compress': 'regression', 'thumbnail': 'improvement',
+                            'metadata': 'ok'}
+    assert rows[0]['change'] == pytest.approx(0.2)
+    assert (rows[0]['baseline'], rows[0]['candidate']) == (1.0, 1.2)
+
+
+def test_changes_under_the_noise_floor_are_ok():
+    # +100%, but only by a fraction of the noise floor
+    tiny = NOISE_FLOOR / 4
+    rows = compare(results(metadata=tiny), results(metadata=tiny * 2))
+    assert status(rows) == {'metadata': 'ok'}
+
+
+def test_only_cases_in_both_runs_are_compared():
+    rows = compare(results(compress=1.0, removed=1.0, broken=0),
+                   results(compress=1.0, added=1.0, broken=1.0))
+    assert [row['case'] for row in rows] == ['compress']
+
+
+def test_custom_threshold():
+    baseline, candidate = results(compress=1.0), results(compress=1.2)
+    assert status(compare(baseline, candidate, threshold=0.25)) == {'compress': 'ok'}
+    assert status(compare(baseline, candidate, threshold=0.05)) == {'compress': 'regression'}
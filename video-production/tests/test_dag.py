@@ -0,0 +1,123 @@
+"""TaskGraph budget clamping, failure handling and critical path"""
+
+import time
+import threading
+
+import pytest
+
+from scripts.dag import TaskGraph
+
+
+class Tracker:
+    """Task bodies that record how many of them run at once"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+
+    def task(self, seconds: float, result=None):
+        def run():
+            with self.lock:
+                self.active += 1
+                self.peak = max(self.peak, self.active)
+            time.sleep(seconds)
+            with self.lock:
+                self.active -= 1
+            return result
+        return run
+
+
+def test_results_and_dependency_order():
+    graph = TaskGraph()
+    order = []
+    graph.add('encode', lambda: order.append('encode') or 'video.mp4')
+    graph.add('upload', lambda: order.append('upload') or graph.results['encode'] + ' uploaded',
+              deps=['encode'])
+
+    assert graph.run() == {'encode': 'video.mp4', 'upload': 'video.mp4 uploaded'}
+    assert order == ['encode', 'upload']
+
+
+def test_add_rejects_duplicates_and_unknown_deps():
+    graph = TaskGraph()
+    graph.add('a', lambda: None)
+    with pytest.raises(ValueError):
+        graph.add('a', lambda: None)
+    with pytest.raises(ValueError):
+        graph.add('b', lambda: None, deps=['missing'])
+
+
+def test_budget_limits_concurrency():
+    tracker = Tracker()
+    graph = TaskGraph(budget={'cpu': 4})
+    for name in ('a', 'b', 'c'):
+        graph.add(name, tracker.task(0.05), cost={'cpu': 3})
+    graph.run()
+    assert tracker.peak == 1
+
+
+def test_tasks_within_budget_overlap():
+    tracker = Tracker()
+    graph = TaskGraph(budget={'cpu': 4})
+    for name in ('a', 'b'):
+        graph.add(name, tracker.task(0.1), cost={'cpu': 2})
+    graph.run()
+    assert tracker.peak == 2
+
+
+def test_oversized_task_is_clamped_and_runs_alone():
+    tracker = Tracker()
+    graph = TaskGraph(budget={'cpu': 4})
+    graph.add('huge', tracker.task(0.05), cost={'cpu': 16})
+    graph.add('small', tracker.task(0.05), cost={'cpu': 1})
+
+    graph.run()
+    assert graph._cost(graph.tasks['huge']) == {'cpu': 4}
+    assert tracker.peak == 1
+    assert all(task.status == 'done' for task in graph.tasks.values())
+
+
+def test_unbudgeted_resources_are_free():
+    tracker = Tracker()
+    graph = TaskGraph(budget={'cpu': 1})
+    graph.add('a', tracker.task(0.1), cost={'gpu': 5})
+    graph.add('b', tracker.task(0.1), cost={'gpu': 5})
+    graph.run()
+    assert tracker.peak == 2
+
+
+def test_failure_skips_dependents_and_raises():
+    graph = TaskGraph()
+
+    def broken():
+        raise RuntimeError('encode failed')
+
+    graph.add('encode', broken)
+    graph.add('thumbnail', lambda: 'thumb.jpg')
+    graph.add('upload', lambda: None, deps=['encode'])
+    graph.add('announce', lambda: None, deps=['upload'])
+
+    with pytest.raises(RuntimeError, match='encode failed'):
+        graph.run()
+    statuses = {name: task.status for name, task in graph.tasks.items()}
+    assert statuses == {'encode': 'failed', 'thumbnail': 'done',
+                        'upload': 'skipped', 'announce': 'skipped'}
+
+
+def test_critical_path_follows_last_finishing_dependency():
+    graph = TaskGraph()
+    graph.add('probe', lambda: time.sleep(0.01))
+    graph.add('encode', lambda: time.sleep(0.15), deps=['probe'])
+    graph.add('thumbnail', lambda: time.sleep(0.01), deps=['probe'])
+    graph.add('upload', lambda: time.sleep(0.01), deps=['encode', 'thumbnail'])
+    graph.run()
+
+    assert [task.name for task in graph.critical_path()] == ['probe', 'encode', 'upload']
+    assert 'Critical path (*): probe -> encode -> upload' in graph.report()
+
+
+def test_critical_path_before_run_is_empty():
+    graph = TaskGraph()
+    graph.add('a', lambda: None)
+    assert graph.critical_path() == []
@@ -0,0 +1,173 @@
+"""EncodeQueue lease, heartbeat and commit transitions"""
+
+import os
+import time
+
+import pytest
+
+from scripts.encode_queue import EncodeQueue, EncodeWorker
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return EncodeQueue(str(tmp_path / 'spool'), lease_seconds=30, max_attempts=2)
+
+
+def expire(queue, job_id):
+    """Age a lease past lease_seconds"""
+    old = time.time() - queue.lease_seconds - 5
+    os.utime(queue._path('leased', job_id), (old, old))
+
+
+def test_lease_takes_oldest_pending_job(queue):
+    first = queue.submit('ffmpeg', {'n': 1})
+    second = queue.submit('ffmpeg', {'n': 2})
+
+    job = queue.lease('w1')
+    assert job['id'] == first
+    assert job['attempts'] == 1 and job['worker'] == 'w1'
+    assert queue.status(first) == 'leased'
+    assert queue.lease('w2')['id'] == second
+    assert queue.lease('w3') is None
+
+
+def test_heartbeat_keeps_lease(queue):
+    job_id = queue.submit('ffmpeg', {})
+    job = queue.lease('w1')
+    expire(queue, job_id)
+
+    assert queue.heartbeat(job)
+    assert queue.requeue_expired() == 0
+    assert queue.status(job_id) == 'leased'
+
+
+def test_expired_lease_is_requeued_then_failed(queue):
+    job_id = queue.submit('ffmpeg', {})
+    queue.lease('w1')
+    expire(queue, job_id)
+    assert queue.requeue_expired() == 1
+    assert queue.status(job_id) == 'pending'
+
+    queue.lease('w2')
+    expire(queue, job_id)
+    assert queue.requeue_expired() == 1
+    job = queue.result(job_id)
+    assert job['state'] == 'failed'
+    assert 'lease expired 2' in job['error']
+
+
+def test_complete_runs_commit_then_records_result(queue):
+    job_id = queue.submit('ffmpeg', {})
+    job = queue.lease('w1')
+    seen = []
+
+    assert queue.complete(job, {'wall_time': 1.0}, lambda: seen.append(queue.status(job_id)))
+    # The lease was already claimed while commit ran
+    assert seen == [None]
+    assert queue.result(job_id)['result'] == {'wall_time': 1.0}
+    assert queue.status(job_id) == 'done'
+
+
+def test_worker_that_lost_its_lease_cannot_commit(queue):
+    job_id = queue.submit('ffmpeg', {})
+    stale = queue.lease('w1')
+    expire(queue, job_id)
+    queue.requeue_expired()
+    assert not queue.heartbeat(stale)
+
+    current = queue.lease('w2')
+    committed = []
+    assert queue.complete(current, {'by': 'w2'}, lambda: committed.append('w2'))
+    assert not queue.complete(stale, {'by': 'w1'}, lambda: committed.append('w1'))
+    assert committed == ['w2']
+    assert queue.result(job_id)['result'] == {'by': 'w2'}
+
+
+def test_stale_worker_cannot_take_over_a_new_lease(queue):
+    job_id = queue.submit('ffmpeg', {})
+    stale = queue.lease('w1')
+    expire(queue, job_id)
+    queue.requeue_expired()
+    current = queue.lease('w2')
+
+    assert not queue.heartbeat(stale)
+    assert not queue.complete(stale, {'by': 'w1'}, lambda: pytest.fail('stale commit ran'))
+    assert not queue.fail(stale, 'boom')
+    assert queue.status(job_id) == 'leased'
+    assert queue.heartbeat(current)
+    assert queue.complete(current, {'by': 'w2'})
+
+
+def test_failed_commit_hands_the_lease_back(queue):
+    job_id = queue.submit('ffmpeg', {})
+    job = queue.lease('w1')
+
+    def commit():
+        raise OSError('disk full')
+
+    with pytest.raises(OSError):
+        queue.complete(job, {}, commit)
+    assert queue.status(job_id) == 'leased'
+    assert queue.fail(job, 'OSError: disk full')
+    assert queue.status(job_id) == 'pending'
+
+
+def test_fail_retries_until_max_attempts(queue):
+    job_id = queue.submit('ffmpeg', {})
+    assert queue.fail(queue.lease('w1'), 'boom')
+    assert queue.status(job_id) == 'pending'
+
+    assert queue.fail(queue.lease('w1'), 'boom again')
+    job = queue.result(job_id)
+    assert job['state'] == 'failed' and job['error'] == 'boom again'
+
+
+def test_wait_returns_finished_jobs(queue):
+    job_id = queue.submit('ffmpeg', {})
+    queue.complete(queue.lease('w1'), {})
+    assert queue.wait([job_id], timeout=1, poll_interval=0.01)[job_id]['state'] == 'done'
+
+    pending = queue.submit('ffmpeg', {})
+    with pytest.raises(TimeoutError):
+        queue.wait([pending], timeout=0.05, poll_interval=0.01)
+
+
+def test_worker_commits_attempt_outputs(queue, tmp_path, monkeypatch):
+    partial = tmp_path / 'chunk.partial.mp4'
+    final = tmp_path / 'chunk.mp4'
+    marker = tmp_path / 'chunk.done'
+    job_id = queue.submit('ffmpeg', {'cmd': ['ffmpeg', str(partial)],
+                                     'renames': [[str(partial), str(final)]],
+                                     'markers': [str(marker)]})
+    worker = EncodeWorker(queue, 'w1')
+
+    def execute(job):
+        # Each attempt writes its own partial file
+        attempt, _ = worker._attempt_renames(job)[0]
+        assert attempt != str(partial)
+        open(attempt, 'w').write('encoded')
+        return {}
+
+    monkeypatch.setattr(worker, 'execute', execute)
+    assert worker.run(exit_when_idle=True) == 1
+
+    assert final.read_text() == 'encoded' and marker.exists()
+    assert queue.result(job_id)['result']['worker'] == 'w1'
+    assert list(tmp_path.glob('chunk.partial.*')) == []
+
+
+def test_worker_failure_requeues_and_cleans_up(queue, tmp_path, monkeypatch):
+    partial = tmp_path / 'chunk.partial.mp4'
+    job_id = queue.submit('ffmpeg', {'cmd': [], 'renames': [[str(partial), str(tmp_path / 'c.mp4')]]})
+    worker = EncodeWorker(queue, 'w1')
+
+    def execute(job):
+        open(worker._attempt_renames(job)[0][0], 'w').write('half')
+        raise RuntimeError('ffmpeg failed')
+
+    monkeypatch.setattr(worker, 'execute', execute)
+    worker.run(max_jobs=1)
+
+    assert queue.status(job_id) == 'pending'
+    assert not (tmp_path / 'c.mp4').exists()
+    assert list(tmp_path.glob('chunk.partial.*')) == []
@@ -0,0 +1,156 @@
+"""JobStore.run_stage skip and resume rules"""
+
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from scripts.job_store import JobStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(str(tmp_path / 'jobs.db'))
+
+
+@pytest.fixture
+def video(tmp_path):
+    path = tmp_path / 'video.mp4'
+    path.write_bytes(b'source')
+    return path
+
+
+def touch_later(path: Path, content: bytes):
+    """Rewrite a file with a visibly newer mtime"""
+    path.write_bytes(content)
+    later = time.time_ns() + 10**9
+    os.utime(path, ns=(later, later))
+
+
+class Stage:
+    """Stage body that writes one output and counts its runs"""
+
+    def __init__(self, output: Path):
+        self.output = output
+        self.runs = 0
+
+    def __call__(self):
+        self.runs += 1
+        self.output.write_bytes(b'rendered %d' % self.runs)
+        return {'video': self.output}
+
+
+def test_finished_stage_is_skipped(store, video, tmp_path):
+    job = store.job_for(str(video))
+    stage = Stage(tmp_path / 'out.mp4')
+
+    first = store.run_stage(job, 'compress', {'crf': 23}, stage)
+    again = store.run_stage(job, 'compress', {'crf': 23}, stage)
+    assert stage.runs == 1
+    assert again == first and isinstance(again['video'], Path)
+
+
+def test_changed_params_rerun(store, video, tmp_path):
+    job = store.job_for(str(video))
+    stage = Stage(tmp_path / 'out.mp4')
+    store.run_stage(job, 'compress', {'crf': 23}, stage)
+    store.run_stage(job, 'compress', {'crf': 20}, stage)
+    assert stage.runs == 2
+
+
+def test_missing_or_changed_output_reruns(store, video, tmp_path):
+    job = store.job_for(str(video))
+    stage = Stage(tmp_path / 'out.mp4')
+    store.run_stage(job, 'compress', {}, stage)
+
+    stage.output.unlink()
+    store.run_stage(job, 'compress', {}, stage)
+    assert stage.runs == 2
+
+    touch_later(stage.output, b'edited by hand')
+    store.run_stage(job, 'compress', {}, stage)
+    assert stage.runs == 3
+
+
+def test_changed_auxiliary_input_reruns(store, video, tmp_path):
+    job = store.job_for(str(video))
+    subtitles = tmp_path / 'subs.srt'
+    subtitles.write_text('1')
+    stage = Stage(tmp_path / 'out.mp4')
+
+    store.run_stage(job, 'subtitles', {}, stage, inputs=[str(subtitles)])
+    store.run_stage(job, 'subtitles', {}, stage, inputs=[str(subtitles)])
+    assert stage.runs == 1
+
+    touch_later(subtitles, b'2')
+    store.run_stage(job, 'subtitles', {}, stage, inputs=[str(subtitles)])
+    assert stage.runs == 2
+
+
+def test_explicit_outputs(store, video, tmp_path):
+    job = store.job_for(str(video))
+    sidecar = tmp_path / 'meta.json'
+    runs = []
+
+    def stage():
+        runs.append(1)
+        sidecar.write_text('{}')
+        return {'title': 'no paths in here'}
+
+    store.run_stage(job, 'metadata', {}, stage, outputs=lambda _: [sidecar])
+    sidecar.unlink()
+    store.run_stage(job, 'metadata', {}, stage, outputs=lambda _: [sidecar])
+    assert len(runs) == 2
+
+
+def test_failed_stage_reruns(store, video, tmp_path):
+    job = store.job_for(str(video))
+
+    def broken():
+        raise RuntimeError('ffmpeg exited 1')
+
+    with pytest.raises(RuntimeError):
+        store.run_stage(job, 'compress', {}, broken)
+    assert store.stages(job)[0]['status'] == 'failed'
+    assert 'ffmpeg exited 1' in store.stages(job)[0]['error']
+
+    stage = Stage(tmp_path / 'out.mp4')
+    store.run_stage(job, 'compress', {}, stage)
+    assert stage.runs == 1
+    assert store.stages(job)[0]['status'] == 'done'
+
+
+def test_interrupted_stage_is_resumable(store, video):
+    job = store.job_for(str(video))
+
+    def interrupted():
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        store.run_stage(job, 'compress', {}, interrupted)
+    assert store.stages(job)[0]['status'] == 'interrupted'
+    assert store.completed(job, 'compress', {}) is None
+
+
+def test_changed_input_video_starts_over(store, video, tmp_path):
+    job = store.job_for(str(video))
+    stage = Stage(tmp_path / 'out.mp4')
+    store.run_stage(job, 'compress', {}, stage)
+    assert store.job_for(str(video)) == job
+
+    touch_later(video, b'new recording')
+    assert store.job_for(str(video)) == job
+    assert store.stages(job) == []
+    store.run_stage(job, 'compress', {}, stage)
+    assert stage.runs == 2
+
+
+def test_reset_one_stage(store, video, tmp_path):
+    job = store.job_for(str(video))
+    store.run_stage(job, 'compress', {}, Stage(tmp_path / 'a.mp4'))
+    store.run_stage(job, 'watermark', {}, Stage(tmp_path / 'b.mp4'))
+
+    assert store.reset(str(video), 'watermark') == 1
+    assert [record['stage'] for record in store.stages(job)] == ['compress']
+    assert store.reset(str(tmp_path / 'unknown.mp4')) == 0
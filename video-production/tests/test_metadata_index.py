@@ -0,0 +1,99 @@
+"""MetadataIndex term, tag, link and prefix search"""
+
+import json
+
+import pytest
+
+from metadata.metadata_index import MetadataIndex
+
+
+RECORDS = {
+    'flask_metadata.json': {
+        'title': 'Flask REST API Tutorial',
+        'tags': ['python', 'flask'],
+        'description': 'Build an API. Code: https://github.com/example/flask-api.'
+    },
+    'pandas_metadata.json': {
+        'title': 'Pandas Dataframes',
+        'tags': ['python', 'pandas'],
+        'description': 'Filtering and grouping data'
+    },
+    'rust_metadata.json': {
+        'title': 'Rust Ownership',
+        'tags': ['rust'],
+        'description': 'Borrowing explained, see https://www.rust-lang.org/learn'
+    },
+}
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = MetadataIndex(str(tmp_path / 'index.db'))
+    for file, metadata in RECORDS.items():
+        index.add(file, metadata)
+    return index
+
+
+def files(results):
+    return [result['file'] for result in results]
+
+
+def test_prefix_matches_any_field(index):
+    assert files(index.search(prefixes=['pand'])) == ['pandas_metadata.json']
+    # 'f' hits the flask tag/title and the 'filtering' description word
+    assert files(index.search(prefixes=['f'])) == ['flask_metadata.json', 'pandas_metadata.json']
+    # Links are indexed as the full URL and the bare host
+    assert files(index.search(prefixes=['https://github.com/ex'])) == ['flask_metadata.json']
+    assert files(index.search(prefixes=['rust-'])) == ['rust_metadata.json']
+
+
+def test_prefix_limited_to_one_field(index):
+    assert files(index.search(prefixes=['fil'], field='title')) == []
+    assert files(index.search(prefixes=['fil'], field='description')) == ['pandas_metadata.json']
+
+
+def test_prefix_is_case_insensitive_and_not_a_substring(index):
+    assert files(index.search(prefixes=['RUS'])) == ['rust_metadata.json']
+    assert index.search(prefixes=['ust']) == []
+
+
+def test_conditions_are_combined(index):
+    assert files(index.search(tags=['python'])) == ['flask_metadata.json', 'pandas_metadata.json']
+    assert files(index.search(tags=['python'], prefixes=['api'])) == ['flask_metadata.json']
+    assert index.search(tags=['rust'], terms=['flask']) == []
+
+
+def test_links_and_hosts(index):
+    assert files(index.search(links=['rust-lang.org'])) == ['rust_metadata.json']
+    assert files(index.search(has_links=True)) == ['flask_metadata.json', 'rust_metadata.json']
+    # Trailing punctuation isn't part of the URL
+    assert files(index.search(links=['https://github.com/example/flask-api'])) == [
+        'flask_metadata.json']
+
+
+def test_reindexing_replaces_terms(index):
+    index.add('rust_metadata.json', {'title': 'Rust Lifetimes', 'tags': ['rust']})
+    assert index.search(prefixes=['owner']) == []
+    assert files(index.search(prefixes=['lifet'])) == ['rust_metadata.json']
+
+    index.remove('rust_metadata.json')
+    assert index.search(tags=['rust']) == []
+
+
+def test_refresh_follows_files_on_disk(tmp_path):
+    metadata_dir = tmp_path / 'metadata'
+    metadata_dir.mkdir()
+    for file, metadata in RECORDS.items():
+        (metadata_dir / file).write_text(json.dumps(metadata))
+    (metadata_dir / 'catalog.jsonl').write_text(
+        json.dumps({'file': 'go_metadata.json', 'metadata': {'title': 'Go Channels'}}) + '\n')
+
+    index = MetadataIndex(str(metadata_dir / 'index.db'))
+    assert index.refresh(str(metadata_dir)) == 4
+    assert index.refresh(str(metadata_dir)) == 0
+    assert files(index.search(prefixes=['chan'])) == ['go_metadata.json']
+
+    (metadata_dir / 'pandas_metadata.json').unlink()
+    index.refresh(str(metadata_dir))
+    assert index.search(prefixes=['pand']) == []
+    assert index.stats()['documents'] == 3
@@ -0,0 +1,104 @@
+"""QualityRules and the header-only pre-flight checks"""
+
+import subprocess
+
+import pytest
+
+from scripts.preflight import QualityRules, PreflightError, check_file, preflight, require
+
+
+class FakeProbe:
+    """ProbeCache stand-in: canned ffprobe output per file name"""
+
+    def __init__(self, infos):
+        self.infos = infos
+        self.probed = []
+
+    def probe(self, media_file, entries=None):
+        self.probed.append(media_file)
+        info = self.infos[media_file.rsplit('/', 1)[-1]]
+        if info is None:
+            raise subprocess.CalledProcessError(1, 'ffprobe')
+        return info
+
+
+def media(width=1920, height=1080, duration='600.0'):
+    return {'streams': [{'codec_type': 'audio'},
+                        {'codec_type': 'video', 'width': width, 'height': height}],
+            'format': {'duration': duration}}
+
+
+@pytest.fixture
+def files(tmp_path):
+    def make(name, size=1024):
+        path = tmp_path / name
+        path.write_bytes(b'\0' * size)
+        return str(path)
+    return make
+
+
+RULES = QualityRules(min_width=1280, min_height=720, min_duration=60, max_file_size=1)
+
+
+def test_from_config():
+    rules = QualityRules.from_config({'quality': {'enabled': False, 'min_width': 1920,
+                                                  'max_file_size': 500}})
+    assert rules == QualityRules(min_width=1920, max_file_size=500)
+    assert QualityRules.from_config({}) == QualityRules()
+
+
+def test_passing_file(files):
+    probe = FakeProbe({'good.mp4': media()})
+    result = check_file(files('good.mp4'), RULES, probe)
+    assert result['ok'] and result['errors'] == []
+    assert (result['width'], result['height'], result['duration']) == (1920, 1080, 600.0)
+
+
+def test_every_failed_rule_is_reported(files):
+    probe = FakeProbe({'small.mp4': media(640, 360, '12.5')})
+    result = check_file(files('small.mp4'), RULES, probe)
+    assert not result['ok']
+    assert result['errors'] == ['width 640 < 1280', 'height 360 < 720', 'duration 12.5s < 60s']
+
+
+def test_oversized_file_is_never_probed(files):
+    probe = FakeProbe({})
+    result = check_file(files('huge.mp4', 2 * 1024 * 1024), RULES, probe)
+    assert result['errors'] == ['file size 2.0MB > 1MB']
+    assert probe.probed == []
+
+
+def test_missing_duration_only_matters_with_a_duration_rule(files):
+    probe = FakeProbe({'live.mp4': media(duration='N/A')})
+    assert check_file(files('live.mp4'), RULES, probe)['errors'] == [
+        'duration not in container header']
+    assert check_file(files('live.mp4'), QualityRules(min_width=1280), probe)['ok']
+
+
+def test_unreadable_and_audio_only_files(files, tmp_path):
+    probe = FakeProbe({'broken.mp4': None, 'podcast.mp4': {'streams': [{'codec_type': 'audio'}],
+                                                           'format': {'duration': '900'}}})
+    assert check_file(files('broken.mp4'), RULES, probe)['errors'] == [
+        'not a readable media file (CalledProcessError)']
+    assert check_file(files('podcast.mp4'), RULES, probe)['errors'] == ['no video stream']
+    assert check_file(str(tmp_path / 'missing.mp4'), RULES, probe)['errors'][0].startswith(
+        'cannot read file')
+
+
+def test_no_rules_accepts_any_video(files):
+    probe = FakeProbe({'tiny.mp4': media(16, 16, '0.1')})
+    assert check_file(files('tiny.mp4', 10 * 1024 * 1024), QualityRules(), probe)['ok']
+
+
+def test_report_keeps_input_order(files):
+    probe = FakeProbe({f'{i}.mp4': media(width=640 if i % 2 else 1920) for i in range(6)})
+    report = preflight([files(f'{i}.mp4') for i in range(6)], RULES, workers=3, probe_cache=probe)
+    assert (report['checked'], report['passed'], report['failed']) == (6, 3, 3)
+    assert [result['ok'] for result in report['files']] == [True, False] * 3
+    assert report['rules']['min_width'] == 1280
+
+
+def test_require_raises(files):
+    probe = FakeProbe({'small.mp4': media(640, 360)})
+    with pytest.raises(PreflightError, match='small.mp4 failed pre-flight: width 640 < 1280'):
+        require(files('small.mp4'), RULES, probe)
@@ -0,0 +1,129 @@
+"""RenderCache key normalization and LRU pruning"""
+
+import os
+import time
+
+import pytest
+
+from scripts.render_cache import RenderCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return RenderCache(str(tmp_path / 'cache'))
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / 'in.mp4'
+    path.write_bytes(b'frame data')
+    return path
+
+
+def encode_cmd(source, output, *extra):
+    return ['ffmpeg', '-i', str(source), *extra, '-crf', '23', str(output), '-y']
+
+
+def test_key_ignores_where_outputs_live(cache, source, tmp_path):
+    a = tmp_path / 'a' / 'out.mp4'
+    b = tmp_path / 'b' / 'other.mp4'
+    assert (cache.make_key(encode_cmd(source, a), [source], [a])
+            == cache.make_key(encode_cmd(source, b), [source], [b]))
+
+
+def test_key_keeps_output_extension(cache, source, tmp_path):
+    mp4, mkv = tmp_path / 'out.mp4', tmp_path / 'out.mkv'
+    assert (cache.make_key(encode_cmd(source, mp4), [source], [mp4])
+            != cache.make_key(encode_cmd(source, mkv), [source], [mkv]))
+
+
+def test_key_ignores_thread_cap(cache, source, tmp_path):
+    output = tmp_path / 'out.mp4'
+    plain = cache.make_key(encode_cmd(source, output), [source], [output])
+    capped = cache.make_key(encode_cmd(source, output, '-threads', '4'), [source], [output])
+    assert plain == capped
+
+
+def test_key_follows_parameters(cache, source, tmp_path):
+    output = tmp_path / 'out.mp4'
+    cmd = encode_cmd(source, output)
+    slower = [arg if arg != '23' else '18' for arg in cmd]
+    assert cache.make_key(cmd, [source], [output]) != cache.make_key(slower, [source], [output])
+
+
+def test_key_follows_input_content_not_path(cache, source, tmp_path):
+    output = tmp_path / 'out.mp4'
+    copy = tmp_path / 'copy.mp4'
+    copy.write_bytes(source.read_bytes())
+    key = cache.make_key(encode_cmd(source, output), [source], [output])
+    assert cache.make_key(encode_cmd(copy, output), [copy], [output]) == key
+
+    # Same length, different content
+    source.write_bytes(b'frame DATA')
+    os.utime(source, ns=(time.time_ns() + 10**9, time.time_ns() + 10**9))
+    assert cache.make_key(encode_cmd(source, output), [source], [output]) != key
+
+
+def test_inputs_outside_the_command_count(cache, source, tmp_path):
+    output = tmp_path / 'out.mp4'
+    font = tmp_path / 'font.ttf'
+    font.write_bytes(b'glyphs')
+    cmd = encode_cmd(source, output)
+    assert cache.make_key(cmd, [source], [output]) != cache.make_key(cmd, [source, font], [output])
+
+
+def test_store_then_lookup(cache, tmp_path):
+    rendered = tmp_path / 'rendered.mp4'
+    rendered.write_bytes(b'encoded')
+    cache.store('k', [rendered], 'compress')
+
+    target = tmp_path / 'elsewhere.mp4'
+    assert cache.lookup('k', [target])
+    assert target.read_bytes() == b'encoded'
+    assert not cache.lookup('missing', [target])
+
+
+def test_lookup_drops_entry_with_missing_object(cache, tmp_path):
+    rendered = tmp_path / 'rendered.mp4'
+    rendered.write_bytes(b'encoded')
+    cache.store('k', [rendered])
+    for obj in cache.objects_dir.iterdir():
+        obj.unlink()
+
+    assert not cache.lookup('k', [tmp_path / 'out.mp4'])
+    assert cache.entries() == []
+
+
+def test_prune_evicts_least_recently_used(cache, tmp_path):
+    for name in ('old', 'middle', 'new'):
+        rendered = tmp_path / f'{name}.mp4'
+        rendered.write_bytes(b'x' * 100)
+        cache.store(name, [rendered])
+        time.sleep(0.01)
+
+    # Touching 'old' makes 'middle' the least recently used
+    assert cache.lookup('old', [tmp_path / 'restored.mp4'])
+
+    assert cache.prune(max_bytes=200) == 1
+    assert sorted(entry['key'] for entry in cache.entries()) == ['new', 'old']
+    assert not list(cache.objects_dir.glob('middle_*'))
+    assert cache.total_size() == 200
+
+
+def test_store_enforces_size_limit(tmp_path):
+    cache = RenderCache(str(tmp_path / 'cache'), max_size_mb=150 / 1024 / 1024)
+    for name in ('first', 'second'):
+        rendered = tmp_path / f'{name}.mp4'
+        rendered.write_bytes(b'x' * 100)
+        cache.store(name, [rendered])
+        time.sleep(0.01)
+
+    assert [entry['key'] for entry in cache.entries()] == ['second']
+
+
+def test_clear(cache, tmp_path):
+    rendered = tmp_path / 'rendered.mp4'
+    rendered.write_bytes(b'encoded')
+    cache.store('k', [rendered])
+    assert cache.clear() == 1
+    assert cache.total_size() == 0
@@ -0,0 +1,101 @@
+"""SeriesStore episodes and the legacy <series>_series.json round trip"""
+
+import json
+
+import pytest
+
+from metadata.series_store import SeriesStore
+
+
+LEGACY = {
+    'series_name': 'Python Basics',
+    'description': 'Learn Python from scratch',
+    'playlist_id': 'PL123',
+    'videos': [
+        {'episode': 2, 'title': 'Python Basics #2: Loops', 'metadata_file': 'ep02.json'},
+        {'episode': 1, 'title': 'Python Basics #1: Variables', 'metadata_file': 'ep01.json'},
+    ],
+    'created_at': '2024-01-01T10:00:00'
+}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SeriesStore(str(tmp_path / 'series.db'))
+
+
+def test_legacy_json_round_trip(store, tmp_path):
+    legacy_file = tmp_path / 'Python Basics_series.json'
+    legacy_file.write_text(json.dumps(LEGACY))
+
+    assert store.import_json(str(legacy_file)) == 'Python Basics'
+    exported = store.export_json('Python Basics')
+    assert exported == dict(LEGACY, videos=sorted(LEGACY['videos'], key=lambda v: v['episode']))
+    assert list(exported) == list(LEGACY)
+
+
+def test_reimport_replaces_episodes(store, tmp_path):
+    legacy_file = tmp_path / 'series.json'
+    legacy_file.write_text(json.dumps(LEGACY))
+    store.import_json(str(legacy_file))
+
+    legacy_file.write_text(json.dumps(dict(LEGACY, videos=LEGACY['videos'][:1])))
+    store.import_json(str(legacy_file))
+    assert [video['episode'] for video in store.episodes('Python Basics')] == [2]
+
+
+def test_episodes_in_order_and_lookup(store):
+    store.create_series('Web', 'Bootcamp')
+    for number in (3, 1, 2):
+        store.add_episode('Web', number, f'Web #{number}', f'ep{number}.json')
+
+    assert [video['episode'] for video in store.episodes('Web')] == [1, 2, 3]
+    assert store.episode('Web', 2)['metadata_file'] == 'ep2.json'
+    assert store.episode('Web', 9) is None
+    assert store.find_episodes('Web', 'Web #3') == [
+        {'episode': 3, 'title': 'Web #3', 'metadata_file': 'ep3.json'}]
+
+
+def test_create_series_resets_episodes(store):
+    store.create_series('Web', 'Bootcamp')
+    store.add_episode('Web', 1, 'Web #1', 'ep1.json')
+    store.create_series('Web', 'Bootcamp, second edition')
+
+    assert store.episodes('Web') == []
+    assert store.get_series('Web')['description'] == 'Bootcamp, second edition'
+    assert store.series_names() == ['Web']
+
+
+def test_series_are_separate(store):
+    store.create_series('A', '')
+    store.create_series('B', '')
+    store.add_episode('A', 1, 'A #1', 'a1.json')
+    assert store.episodes('B') == []
+
+
+def test_export_unknown_series(store):
+    with pytest.raises(ValueError):
+        store.export_json('Missing')
+
+
+def test_manager_imports_legacy_file_and_rejects_duplicate_episodes(tmp_path, monkeypatch):
+    from metadata.youtube_metadata import TutorialSeriesManager
+
+    # The manager keeps its files in ../metadata, like every tool run from scripts/
+    (tmp_path / 'scripts').mkdir()
+    (tmp_path / 'metadata').mkdir()
+    (tmp_path / 'metadata' / 'Python Basics_series.json').write_text(json.dumps(LEGACY))
+    monkeypatch.chdir(tmp_path / 'scripts')
+
+    series = TutorialSeriesManager('Python Basics')
+    assert [video['episode'] for video in series.episodes()] == [1, 2]
+
+    with pytest.raises(ValueError, match='already in series'):
+        series.add_episode(2, 'Loops again')
+    series.add_episode(2, 'Loops again', replace=True)
+    series.add_episode(3, 'Functions')
+    assert [video['title'] for video in series.episodes()][1:] == [
+        'Python Basics #2: Loops again', 'Python Basics #3: Functions']
+
+    exported = json.loads(series.export_series_json().read_text())
+    assert [video['episode'] for video in exported['videos']] == [1, 2, 3]
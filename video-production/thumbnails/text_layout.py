@@ -0,0 +1,134 @@
+"""
+Thumbnail Text Layout
+Process-wide font cache plus a layout engine that wraps and shrinks
+titles until they fit the thumbnail canvas
+"""
+
+import os
+from functools import lru_cache
+from typing import Optional, Tuple, List
+
+from PIL import ImageFont
+
+# Bold fonts tried in order when no font file is configured
+FONT_PATHS = [
+    "C:/Windows/Fonts/arialbd.ttf",  # Windows
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",  # Linux
+    "/System/Library/Fonts/Helvetica.ttc",  # macOS
+]
+
+# Title style used when config.yaml has no thumbnail.title block
+DEFAULT_TITLE_STYLE = {
+    'font_size': 80,
+    'min_font_size': 40,
+    'max_lines': 2,
+    'position': 'bottom',
+    'bg_color': (0, 0, 0, 180),
+    'text_color': (255, 255, 255),
+    'font_file': None,
+}
+
+
+@lru_cache(maxsize=None)
+def find_font_path(preferred: Optional[str] = None) -> Optional[str]:
+    """First existing font file, checking `preferred` before the defaults"""
+    for font_path in ([preferred] if preferred else []) + FONT_PATHS:
+        if os.path.exists(font_path):
+            return font_path
+    return None
+
+
+@lru_cache(maxsize=256)
+def get_font(size: int, font_path: Optional[str] = None) -> ImageFont.ImageFont:
+    """Load a font once per (path, size) for the lifetime of the process"""
+    path = find_font_path(font_path)
+    if path:
+        try:
+            return ImageFont.truetype(path, size)
+        except OSError:
+            pass
+
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:  # Pillow < 10.1 has no sized default font
+        return ImageFont.load_default()
+
+
+@lru_cache(maxsize=65536)
+def text_width(text: str, size: int, font_path: Optional[str] = None) -> float:
+    """Rendered width of text, cached per (text, size, font)"""
+    return get_font(size, font_path).getlength(text)
+
+
+@lru_cache(maxsize=256)
+def line_height(size: int, font_path: Optional[str] = None) -> int:
+    """Height of one line of text (ascent + descent)"""
+    font = get_font(size, font_path)
+    try:
+        ascent, descent = font.getmetrics()
+        return ascent + descent
+    except AttributeError:
+        bbox = font.getbbox("Ag")
+        return bbox[3] - bbox[1]
+
+
+def wrap_text(text: str, size: int, max_width: int,
+              font_path: Optional[str] = None) -> List[str]:
+    """Greedy word wrap; a single word wider than max_width gets its own line"""
+    lines = []
+    current = ''
+    for word in text.split():
+        candidate = f'{current} {word}' if current else word
+        if current and text_width(candidate, size, font_path) > max_width:
+            lines.append(current)
+            current = word
+        else:
+            current = candidate
+    if current:
+        lines.append(current)
+    return lines
+
+
+def _fits(lines: List[str], size: int, max_width: int, max_lines: int,
+          font_path: Optional[str]) -> bool:
+    return (len(lines) <= max_lines and
+            all(text_width(line, size, font_path) <= max_width for line in lines))
+
+
+def fit_text(text: str, max_width: int, max_lines: int = 2,
+             max_size: int = 80, min_size: int = 40,
+             font_path: Optional[str] = None) -> Tuple[int, List[str]]:
+    """
+    Largest font size (binary search between min_size and max_size) at
+    which text wraps into at most max_lines lines of at most max_width.
+    If even min_size doesn't fit, the last line is truncated with an
+    ellipsis. Returns (size, lines).
+    """
+    low, high = min_size, max_size
+    best = None
+    while low <= high:
+        size = (low + high) // 2
+        lines = wrap_text(text, size, max_width, font_path)
+        if _fits(lines, size, max_width, max_lines, font_path):
+            best = (size, lines)
+            low = size + 1
+        else:
+            high = size - 1
+
+    if best:
+        return best
+
+    wrapped = wrap_text(text, min_size, max_width, font_path)
+    lines = wrapped[:max_lines]
+    for i, line in enumerate(lines):
+        overflow = i == len(lines) - 1 and len(wrapped) > max_lines
+        if overflow or text_width(line, min_size, font_path) > max_width:
+            lines[i] = _truncate(line, min_size, max_width, font_path)
+    return min_size, lines
+
+
+def _truncate(line: str, size: int, max_width: int, font_path: Optional[str]) -> str:
+    """Shorten line until it fits with a trailing ellipsis"""
+    while line and text_width(line + '…', size, font_path) > max_width:
+        line = line[:-1].rstrip()
+    return line + '…'
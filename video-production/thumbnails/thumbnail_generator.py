@@ -4,16 +4,52 @@ Automated Thumbnail Generator for YouTube Videos
 Creates eye-catching thumbnails with text overlays and styling
 """
 
-from PIL import Image, ImageDraw, ImageFont, ImageFilter, ImageEnhance
+from PIL import Image, ImageDraw, ImageFilter, ImageEnhance
+import numpy as np
 import subprocess
 import os
+import re
+import sys
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Optional, Tuple, List, Dict
 import json
 
+# Allow running as a script as well as importing from the toolkit root
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from thumbnails.text_layout import (
+    DEFAULT_TITLE_STYLE,
+    fit_text,
+    get_font,
+    line_height,
+    text_width,
+)
+from scripts.tracing import span
+
+# Frame picked when "auto" selection can't run (e.g. no duration in the header)
+DEFAULT_TIMESTAMP = "00:00:05"
+
+# pts of each frame passing ffmpeg's showinfo filter (logged to stderr)
+SHOWINFO_PTS = re.compile(rb'\bpts_time:\s*(-?[\d.]+)')
+
+# Weights for combining normalized frame-quality metrics in select_best_frame
+FRAME_SCORE_WEIGHTS = {
+    'sharpness': 0.35,
+    'contrast': 0.25,
+    'colorfulness': 0.2,
+    'text_area': 0.2,
+}
+
+
+def _clip8(value: float) -> int:
+    """Truncate and clamp to 0-255, as PIL's blend does"""
+    return max(0, min(255, int(value)))
+
 
 class ThumbnailGenerator:
-    def __init__(self, output_dir: str = "../thumbnails"):
+    def __init__(self, output_dir: str = "../thumbnails",
+                 title_style: Optional[Dict] = None,
+                 effects: Optional[Dict] = None):
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
 
@@ -21,38 +57,242 @@ class ThumbnailGenerator:
         self.width = 1280
         self.height = 720
 
-    def extract_frame_from_video(self, video_file: str, timestamp: str = "00:00:05") -> Image.Image:
-        """Extract a frame from video at specified timestamp"""
-        temp_frame = self.output_dir / "temp_frame.jpg"
-
-        cmd = [
+        # Title text style (the thumbnail.title block of config.yaml)
+        self.title_style = {**DEFAULT_TITLE_STYLE, **(title_style or {})}
+
+        # Color effects applied to every thumbnail (thumbnail.effects in config.yaml)
+        self.effects = effects or {}
+
+    def extract_frame_from_video(self, video_file: str, timestamp: str = "00:00:05",
+                                 size: Optional[Tuple[int, int]] = None) -> Image.Image:
+        """
+        Extract a frame from video at specified timestamp
+        ffmpeg scales the frame to `size` (thumbnail dimensions by default)
+        and streams it as raw RGB over stdout, so no temp file is written
+        and concurrent calls don't collide
+        """
+        size = size or (self.width, self.height)
+        cmd = self._frame_cmd(video_file, timestamp, size)
+        result = subprocess.run(cmd, check=True, capture_output=True)
+        return self._frame_image(result.stdout, size, video_file, timestamp)
+
+    @staticmethod
+    def _frame_cmd(video_file: str, timestamp: str, size: Tuple[int, int]) -> List[str]:
+        """ffmpeg command streaming one scaled RGB frame to stdout"""
+        width, height = size
+        return [
             'ffmpeg',
+            '-v', 'error',
             '-ss', timestamp,
             '-i', video_file,
             '-vframes', '1',
-            '-q:v', '2',
-            '-y',
-            str(temp_frame)
+            '-vf', f'scale={width}:{height}:flags=lanczos',
+            '-f', 'rawvideo',
+            '-pix_fmt', 'rgb24',
+            'pipe:1'
         ]
 
-        subprocess.run(cmd, check=True, capture_output=True)
-        image = Image.open(temp_frame)
-        temp_frame.unlink()  # Clean up temp file
+    @staticmethod
+    def _frame_image(output: bytes, size: Tuple[int, int], video_file: str,
+                     timestamp: str) -> Image.Image:
+        width, height = size
+        frame_size = width * height * 3
+        if len(output) < frame_size:
+            raise ValueError(f"No frame decoded at {timestamp} in {video_file}")
 
-        return image
+        return Image.frombytes('RGB', (width, height), output[:frame_size])
+
+    def get_video_duration(self, video_file: str) -> float:
+        """Video duration in seconds from the container header (0.0 when unknown)"""
+        result = subprocess.run(self._duration_cmd(video_file), check=True, capture_output=True)
+        return self._parse_duration(result.stdout)
+
+    @staticmethod
+    def _parse_duration(output: bytes) -> float:
+        # Streams without a duration in the header report N/A (or nothing)
+        try:
+            return max(0.0, float(output.strip()))
+        except ValueError:
+            return 0.0
+
+    @staticmethod
+    def _duration_cmd(video_file: str) -> List[str]:
+        return [
+            'ffprobe',
+            '-v', 'quiet',
+            '-show_entries', 'format=duration',
+            '-of', 'csv=p=0',
+            video_file
+        ]
+
+    def sample_frames(self, video_file: str, count: int = 12,
+                      size: Tuple[int, int] = (320, 180),
+                      max_fraction: float = 0.25) -> Tuple[List[float], np.ndarray]:
+        """
+        Sample `count` evenly spaced low-resolution frames in one ffmpeg pass
+        Only keyframes are decoded, and the pass is cut off after
+        max_fraction of the video's duration (whatever was sampled by then
+        is used). Returns (timestamps, frames) with frames shaped
+        (n, height, width, 3); timestamps are the frames' own pts, so
+        extracting at one returns that frame. Raises ValueError when the
+        duration is unknown.
+        """
+        duration = self.get_video_duration(video_file)
+        cmd, interval = self._sample_cmd(video_file, duration, count, size)
+
+        timeout = max(10.0, duration * max_fraction)
+        try:
+            result = subprocess.run(cmd, check=True, capture_output=True, timeout=timeout)
+            output, log = result.stdout, result.stderr
+        except subprocess.TimeoutExpired as e:
+            print(f"Frame sampling hit its {timeout:.0f}s budget, using frames sampled so far")
+            output, log = e.stdout or b'', e.stderr or b''
+
+        return self._sampled_frames(output, log, interval, size, video_file)
+
+    @staticmethod
+    def _sample_cmd(video_file: str, duration: float, count: int,
+                    size: Tuple[int, int]) -> Tuple[List[str], float]:
+        """ffmpeg command streaming `count` keyframe samples, and the sample interval"""
+        if duration <= 0:
+            raise ValueError(f"Unknown duration for {video_file}, can't sample frames")
+        interval = duration / count
+        width, height = size
+
+        # select keeps each keyframe's own pts (fps would retime it onto
+        # its grid), and showinfo logs that pts for _sampled_frames
+        cmd = [
+            'ffmpeg',
+            '-v', 'info', '-hide_banner', '-nostats',
+            '-skip_frame', 'nokey',
+            '-ss', f'{interval / 2:.3f}',
+            '-i', video_file,
+            '-an', '-sn',
+            '-vf', (f"select='isnan(prev_selected_t)+gte(t-prev_selected_t,{interval:.6f})',"
+                    f"showinfo,scale={width}:{height}"),
+            '-fps_mode', 'passthrough',
+            '-vframes', str(count),
+            '-f', 'rawvideo',
+            '-pix_fmt', 'rgb24',
+            'pipe:1'
+        ]
+        return cmd, interval
+
+    @staticmethod
+    def _sampled_frames(output: bytes, log: bytes, interval: float, size: Tuple[int, int],
+                        video_file: str) -> Tuple[List[float], np.ndarray]:
+        width, height = size
+        frame_size = width * height * 3
+        n = len(output) // frame_size
+        if n == 0:
+            raise ValueError(f"No frames sampled from {video_file}")
+
+        frames = np.frombuffer(output[:n * frame_size], dtype=np.uint8).reshape(n, height, width, 3)
+        # Input seeking rebases timestamps on the -ss point (interval / 2)
+        pts = [float(t) for t in SHOWINFO_PTS.findall(log)]
+        if len(pts) >= n:
+            timestamps = [max(0.0, interval / 2 + t) for t in pts[:n]]
+        else:
+            timestamps = [interval / 2 + i * interval for i in range(n)]
+        return timestamps, frames
+
+    @staticmethod
+    def score_frames(frames: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Score candidate frames with vectorized quality metrics
+        sharpness: variance of the Laplacian
+        contrast: luminance standard deviation
+        colorfulness: Hasler-Suesstrunk colorfulness
+        text_area: share of pixels on strong horizontal edges (text/UI proxy)
+        Near-black, near-white and flat frames get a score of -inf.
+        """
+        rgb = frames.astype(np.float32)
+        r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+        gray = 0.299 * r + 0.587 * g + 0.114 * b
+
+        laplacian = (gray[:, :-2, 1:-1] + gray[:, 2:, 1:-1] +
+                     gray[:, 1:-1, :-2] + gray[:, 1:-1, 2:] -
+                     4 * gray[:, 1:-1, 1:-1])
+
+        rg = r - g
+        yb = 0.5 * (r + g) - b
+        colorfulness = (np.sqrt(rg.std(axis=(1, 2)) ** 2 + yb.std(axis=(1, 2)) ** 2) +
+                        0.3 * np.sqrt(rg.mean(axis=(1, 2)) ** 2 + yb.mean(axis=(1, 2)) ** 2))
+
+        edges = np.abs(np.diff(gray, axis=2)) > 40
+
+        metrics = {
+            'sharpness': laplacian.var(axis=(1, 2)),
+            'contrast': gray.std(axis=(1, 2)),
+            'colorfulness': colorfulness,
+            'text_area': edges.mean(axis=(1, 2)),
+        }
+
+        score = np.zeros(len(frames), dtype=np.float64)
+        for name, weight in FRAME_SCORE_WEIGHTS.items():
+            peak = metrics[name].max()
+            if peak > 0:
+                score += weight * metrics[name] / peak
+
+        brightness = gray.mean(axis=(1, 2))
+        blank = (brightness < 16) | (brightness > 240) | (metrics['contrast'] < 8)
+        score[blank] = -np.inf
+
+        metrics['score'] = score
+        return metrics
+
+    def select_best_frame(self, video_file: str, candidates: int = 12,
+                          max_fraction: float = 0.25) -> float:
+        """Pick the timestamp (seconds) of the best-scoring candidate frame"""
+        with span('sample_frames', 'ffmpeg'):
+            timestamps, frames = self.sample_frames(video_file, candidates, max_fraction=max_fraction)
+        with span('score_frames', 'numpy', frames=len(frames)):
+            scores = self.score_frames(frames)['score']
+        return self._best_timestamp(timestamps, scores)
+
+    def _auto_timestamp(self, video_file: str) -> str:
+        """Best frame's timestamp, or DEFAULT_TIMESTAMP when frames can't be sampled"""
+        try:
+            return f"{self.select_best_frame(video_file):.3f}"
+        except ValueError as e:
+            print(f"Warning: {e}; using the frame at {DEFAULT_TIMESTAMP}")
+            return DEFAULT_TIMESTAMP
+
+    @staticmethod
+    def _best_timestamp(timestamps: List[float], scores: np.ndarray) -> float:
+        # Every candidate blank: fall back to the middle sample
+        best = int(np.argmax(scores)) if np.isfinite(scores).any() else len(timestamps) // 2
+        print(f"Selected frame at {timestamps[best]:.1f}s from {len(timestamps)} candidates")
+        return timestamps[best]
 
     def create_thumbnail_from_video(self, video_file: str, title: str,
                                     timestamp: str = "00:00:05",
                                     output_name: Optional[str] = None) -> Path:
-        """Create thumbnail from video frame with title overlay"""
-        # Extract frame
-        image = self.extract_frame_from_video(video_file, timestamp)
-
-        # Resize to thumbnail dimensions
-        image = image.resize((self.width, self.height), Image.Resampling.LANCZOS)
+        """
+        Create thumbnail from video frame with title overlay
+        timestamp: "HH:MM:SS", seconds, or "auto" to pick the best frame
+        """
+        if timestamp == 'auto':
+            with span('select_best_frame', 'thumbnail'):
+                timestamp = self._auto_timestamp(video_file)
+
+        # Extract frame (already scaled to thumbnail dimensions by ffmpeg)
+        with span('extract_frame', 'ffmpeg', timestamp=timestamp):
+            image = self.extract_frame_from_video(video_file, timestamp)
+
+        return self._finish_thumbnail(image, title, video_file, output_name)
+
+    def _finish_thumbnail(self, image: Image.Image, title: str, video_file: str,
+                          output_name: Optional[str]) -> Path:
+        """Effects, title overlay and JPEG save for an extracted frame"""
+        # Apply configured color effects
+        if self.effects:
+            with span('apply_effects', 'pil'):
+                image = self.apply_effects(image, **self.effects)
 
         # Add title overlay
-        image = self.add_title_overlay(image, title)
+        with span('title_overlay', 'pil'):
+            image = self.add_title_overlay(image, title)
 
         # Save
         if not output_name:
@@ -60,7 +300,8 @@ class ThumbnailGenerator:
             output_name = f"{video_name}_thumbnail.jpg"
 
         output_path = self.output_dir / output_name
-        image.save(output_path, quality=95, optimize=True)
+        with span('save_jpeg', 'pil'):
+            image.save(output_path, quality=95, optimize=True)
 
         print(f"Thumbnail saved to: {output_path}")
         return output_path
@@ -73,6 +314,10 @@ class ThumbnailGenerator:
         # Resize to thumbnail dimensions
         image = image.resize((self.width, self.height), Image.Resampling.LANCZOS)
 
+        # Apply configured color effects
+        if self.effects:
+            image = self.apply_effects(image, **self.effects)
+
         # Add title overlay
         image = self.add_title_overlay(image, title)
 
@@ -87,42 +332,38 @@ class ThumbnailGenerator:
         return output_path
 
     def add_title_overlay(self, image: Image.Image, title: str,
-                         font_size: int = 80,
-                         position: str = 'bottom',
-                         bg_color: Tuple[int, int, int, int] = (0, 0, 0, 180),
-                         text_color: Tuple[int, int, int] = (255, 255, 255)) -> Image.Image:
-        """Add text overlay to image"""
+                         font_size: Optional[int] = None,
+                         position: Optional[str] = None,
+                         bg_color: Optional[Tuple[int, int, int, int]] = None,
+                         text_color: Optional[Tuple[int, int, int]] = None) -> Image.Image:
+        """
+        Add text overlay to image
+        Unset arguments come from the title style (thumbnail.title in
+        config.yaml). Long titles are wrapped and shrunk to fit.
+        """
+        style = self.title_style
+        font_size = font_size or style['font_size']
+        position = position or style['position']
+        bg_color = tuple(bg_color or style['bg_color'])
+        text_color = tuple(text_color or style['text_color'])
+        font_path = style['font_file']
+
         # Create drawing context
         draw = ImageDraw.Draw(image, 'RGBA')
 
-        # Try to load a bold font, fallback to default
-        try:
-            # Try common font paths
-            font_paths = [
-                "C:/Windows/Fonts/arialbd.ttf",  # Windows
-                "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",  # Linux
-                "/System/Library/Fonts/Helvetica.ttc",  # macOS
-            ]
-
-            font = None
-            for font_path in font_paths:
-                if os.path.exists(font_path):
-                    font = ImageFont.truetype(font_path, font_size)
-                    break
-
-            if font is None:
-                font = ImageFont.load_default()
-        except:
-            font = ImageFont.load_default()
-
-        # Calculate text size and position
-        bbox = draw.textbbox((0, 0), title, font=font)
-        text_width = bbox[2] - bbox[0]
-        text_height = bbox[3] - bbox[1]
-
         # Add padding
         padding = 40
-        box_height = text_height + padding * 2
+        size, lines = fit_text(
+            title,
+            max_width=self.width - padding * 2,
+            max_lines=style['max_lines'],
+            max_size=font_size,
+            min_size=min(style['min_font_size'], font_size),
+            font_path=font_path
+        )
+        font = get_font(size, font_path)
+        height = line_height(size, font_path)
+        box_height = height * len(lines) + padding * 2
 
         # Position the overlay
         if position == 'bottom':
@@ -138,17 +379,18 @@ class ThumbnailGenerator:
             fill=bg_color
         )
 
-        # Calculate centered text position
-        x_pos = (self.width - text_width) // 2
-        text_y = y_pos + padding
-
-        # Add text shadow for better readability
         shadow_offset = 3
-        draw.text((x_pos + shadow_offset, text_y + shadow_offset), title,
-                 font=font, fill=(0, 0, 0, 200))
+        for i, line in enumerate(lines):
+            # Calculate centered text position
+            x_pos = (self.width - int(text_width(line, size, font_path))) // 2
+            text_y = y_pos + padding + i * height
+
+            # Add text shadow for better readability
+            draw.text((x_pos + shadow_offset, text_y + shadow_offset), line,
+                     font=font, fill=(0, 0, 0, 200))
 
-        # Draw main text
-        draw.text((x_pos, text_y), title, font=font, fill=text_color)
+            # Draw main text
+            draw.text((x_pos, text_y), line, font=font, fill=text_color)
 
         return image
 
@@ -192,8 +434,60 @@ class ThumbnailGenerator:
                      brightness: float = 1.0,
                      contrast: float = 1.0,
                      saturation: float = 1.0,
-                     blur: bool = False) -> Image.Image:
-        """Apply visual effects to enhance thumbnail"""
+                     blur: bool = False,
+                     fused: bool = True) -> Image.Image:
+        """
+        Apply visual effects to enhance thumbnail
+        Brightness and contrast are folded into one per-channel lookup
+        table and saturation into one color matrix, so the image is
+        traversed at most twice. Output matches the ImageEnhance passes
+        (fused=False) to within a couple of levels per channel.
+        """
+        if not fused or image.mode not in ('RGB', 'RGBA'):
+            return self._apply_effects_stepwise(image, brightness, contrast, saturation, blur)
+
+        alpha = image.getchannel('A') if image.mode == 'RGBA' else None
+        rgb = image.convert('RGB') if alpha else image
+
+        # Brightness + contrast: one LUT, with ImageEnhance's truncation and
+        # clipping after each step so the result matches the separate passes
+        if brightness != 1.0 or contrast != 1.0:
+            brightened = [_clip8(v * brightness) for v in range(256)]
+            lut = brightened
+            if contrast != 1.0:
+                # Contrast pivots on the mean luminance of the brightened image
+                histogram = rgb.convert('L').histogram()
+                total = sum(histogram)
+                mean = int(sum(count * brightened[v] for v, count in enumerate(histogram)) / total + 0.5)
+                lut = [_clip8(mean + contrast * (level - mean)) for level in brightened]
+            rgb = rgb.point(lut * 3)
+
+        # Saturation: blend toward ITU-R 601 luminance as a color matrix
+        if saturation != 1.0:
+            weights = (0.299, 0.587, 0.114)
+            matrix = []
+            for channel in range(3):
+                matrix += [(saturation if channel == j else 0) + (1 - saturation) * weights[j]
+                           for j in range(3)]
+                matrix.append(0)
+            rgb = rgb.convert('RGB', tuple(matrix))
+
+        if alpha:
+            rgb.putalpha(alpha)
+        image = rgb
+
+        # Slight blur for artistic effect
+        if blur:
+            image = image.filter(ImageFilter.GaussianBlur(radius=2))
+
+        return image
+
+    def _apply_effects_stepwise(self, image: Image.Image,
+                                brightness: float = 1.0,
+                                contrast: float = 1.0,
+                                saturation: float = 1.0,
+                                blur: bool = False) -> Image.Image:
+        """Apply effects as separate ImageEnhance passes"""
         # Brightness
         if brightness != 1.0:
             enhancer = ImageEnhance.Brightness(image)
@@ -224,47 +518,34 @@ class ThumbnailGenerator:
         image = Image.new('RGB', (self.width, self.height), background_color)
         draw = ImageDraw.Draw(image)
 
-        # Load fonts
-        try:
-            font_paths = [
-                "C:/Windows/Fonts/arialbd.ttf",
-                "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
-            ]
-
-            title_font = None
-            for font_path in font_paths:
-                if os.path.exists(font_path):
-                    title_font = ImageFont.truetype(font_path, 90)
-                    subtitle_font = ImageFont.truetype(font_path, 50)
-                    break
-
-            if title_font is None:
-                title_font = ImageFont.load_default()
-                subtitle_font = ImageFont.load_default()
-        except:
-            title_font = ImageFont.load_default()
-            subtitle_font = ImageFont.load_default()
+        font_path = self.title_style['font_file']
+        max_width = self.width - 80
 
         # Draw title
-        bbox = draw.textbbox((0, 0), title, font=title_font)
-        text_width = bbox[2] - bbox[0]
-        x_pos = (self.width - text_width) // 2
-        y_pos = self.height // 3
-
-        # Shadow
-        draw.text((x_pos + 4, y_pos + 4), title, font=title_font, fill=(0, 0, 0))
-        # Main text
-        draw.text((x_pos, y_pos), title, font=title_font, fill=(255, 255, 255))
+        size, lines = fit_text(title, max_width, max_lines=2, max_size=90, min_size=40,
+                               font_path=font_path)
+        title_font = get_font(size, font_path)
+        height = line_height(size, font_path)
+        y_pos = self.height // 3 - (len(lines) - 1) * height // 2
+
+        for line in lines:
+            x_pos = (self.width - int(text_width(line, size, font_path))) // 2
+            # Shadow
+            draw.text((x_pos + 4, y_pos + 4), line, font=title_font, fill=(0, 0, 0))
+            # Main text
+            draw.text((x_pos, y_pos), line, font=title_font, fill=(255, 255, 255))
+            y_pos += height
 
         # Draw subtitle if provided
-        if subtitle:
-            bbox = draw.textbbox((0, 0), subtitle, font=subtitle_font)
-            text_width = bbox[2] - bbox[0]
-            x_pos = (self.width - text_width) // 2
-            y_pos = self.height // 2 + 50
+        if subtitle.strip():
+            size, lines = fit_text(subtitle, max_width, max_lines=1, max_size=50, min_size=28,
+                                   font_path=font_path)
+            subtitle_font = get_font(size, font_path)
+            x_pos = (self.width - int(text_width(lines[0], size, font_path))) // 2
+            y_pos = max(self.height // 2 + 50, y_pos + 20)
 
-            draw.text((x_pos + 3, y_pos + 3), subtitle, font=subtitle_font, fill=(0, 0, 0))
-            draw.text((x_pos, y_pos), subtitle, font=subtitle_font, fill=(200, 200, 200))
+            draw.text((x_pos + 3, y_pos + 3), lines[0], font=subtitle_font, fill=(0, 0, 0))
+            draw.text((x_pos, y_pos), lines[0], font=subtitle_font, fill=(200, 200, 200))
 
         # Save
         output_path = self.output_dir / output_name
@@ -275,13 +556,12 @@ class ThumbnailGenerator:
 
 
 def main():
-    import sys
-
     if len(sys.argv) < 3:
         print("Usage: python thumbnail_generator.py <video/image_file> <title> [timestamp]")
         print("\nExamples:")
         print("  python thumbnail_generator.py video.mp4 'Tutorial Title'")
         print("  python thumbnail_generator.py video.mp4 'Tutorial Title' 00:00:10")
+        print("  python thumbnail_generator.py video.mp4 'Tutorial Title' auto")
         print("  python thumbnail_generator.py image.jpg 'Tutorial Title'")
         sys.exit(1)
 